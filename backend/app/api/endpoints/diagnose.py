@@ -1,12 +1,132 @@
-from fastapi import APIRouter, HTTPException
+import json
+import time
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from ...schemas.diagnose import BatchDiagnoseRequest, BaselineRequest, RescoreRequest
 from ...services.vibration_analysis import VibrationAnalysisService
+from ...services.batch_diagnosis import BatchDiagnosisService, pool_size
+from ...services.job_queue import get_job_queue
+from ...services.analysis_cache import get_analysis_cache
+from ...services.baseline import get_baseline_store
+from ...services.rule_engine import get_rule_engine, reload_rule_engine
+from ...services.supabase_service import SupabaseService
 
 
 router = APIRouter()
 
 
+@router.post("/batch")
+def diagnose_batch(payload: BatchDiagnoseRequest):
+    """Diagnose many records in parallel across a process pool"""
+    try:
+        service = BatchDiagnosisService()
+        record_ids = service.resolve_record_ids(
+            payload.record_ids, payload.machine_id, payload.start_time, payload.end_time
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if payload.stream:
+        # Newline-delimited JSON, one line per record in completion order
+        def generate():
+            for result in service.run(record_ids):
+                yield json.dumps(result) + "\n"
+
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+    started = time.perf_counter()
+    results = list(service.run(record_ids))
+    elapsed = time.perf_counter() - started
+    failed = sum(1 for r in results if r.get("status") == "error")
+    return {
+        "workers": pool_size(),
+        "requested": len(record_ids),
+        "completed": len(results) - failed,
+        "failed": failed,
+        "elapsed_seconds": elapsed,
+        "records_per_second": len(results) / elapsed if elapsed > 0 else 0.0,
+        "results": results,
+    }
+
+
+@router.post("/rescore")
+def rescore_records(payload: RescoreRequest):
+    """Re-apply the fault rules to the stored features of every processed record"""
+    try:
+        engine = reload_rule_engine() if payload.reload_rules else get_rule_engine()
+    except (ValueError, OSError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid rules: {e}")
+    started = time.perf_counter()
+    results = VibrationAnalysisService().rescore(payload.machine_id, payload.store)
+    return {
+        "rules": len(engine.rules),
+        "rules_fingerprint": engine.fingerprint,
+        "records": len(results),
+        "elapsed_seconds": time.perf_counter() - started,
+        "results": results,
+    }
+
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """Hit/miss counters and occupancy of the analysis result cache"""
+    return get_analysis_cache().stats()
+
+
+@router.get("/writes/stats")
+def get_write_stats():
+    """Pending rows, bulk requests and retries of the Supabase write-behind buffer"""
+    return SupabaseService().write_stats()
+
+
+@router.post("/baselines/{machine_id}")
+def create_baseline(machine_id: str, payload: BaselineRequest):
+    """Fit a machine's (or one sensor's) baseline from healthy records"""
+    try:
+        signature = VibrationAnalysisService().build_baseline(machine_id, payload.sensor_id, payload.record_ids)
+    except (ValueError, RuntimeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"machine_id": machine_id, "sensor_id": payload.sensor_id, **signature.summary()}
+
+
+@router.get("/baselines/{machine_id}")
+def get_baseline(machine_id: str, sensor_id: Optional[str] = None):
+    signature = get_baseline_store().get(machine_id, sensor_id)
+    if signature is None:
+        raise HTTPException(status_code=404, detail="Baseline not found")
+    return {"machine_id": machine_id, "sensor_id": sensor_id, **signature.summary()}
+
+
+@router.get("/jobs")
+def get_job_stats():
+    """Queue depth and job counts by status"""
+    return get_job_queue().stats()
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def _enqueue(record_id: str) -> JSONResponse:
+    job = get_job_queue().submit(record_id)
+    return JSONResponse(status_code=202, content={
+        "job_id": job["id"],
+        "status": job["status"],
+        "queue_depth": job["queue_depth"],
+    })
+
+
 @router.post("/{record_id}")
-def diagnose_record(record_id: str):
+def diagnose_record(record_id: str, async_: bool = Query(False, alias="async")):
+    if async_:
+        return _enqueue(record_id)
     try:
         service = VibrationAnalysisService()
         result = service.process_record(record_id)
@@ -16,8 +136,10 @@ def diagnose_record(record_id: str):
 
 
 @router.post("/analyze/{vibration_id}")
-def analyze_vibration(vibration_id: str):
+def analyze_vibration(vibration_id: str, async_: bool = Query(False, alias="async")):
     """Analyze a vibration record - alias for diagnose_record to match frontend API"""
+    if async_:
+        return _enqueue(vibration_id)
     try:
         service = VibrationAnalysisService()
         result = service.process_record(vibration_id)
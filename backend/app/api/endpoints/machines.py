@@ -1,12 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 import uuid
+from ...services.local_db import LocalDatabase, decode_cursor, encode_cursor, get_local_db
 
 router = APIRouter()
 
 # Pydantic models for machines
+class BearingGeometry(BaseModel):
+    """Rolling-element bearing dimensions for envelope analysis (diameters in any common unit)"""
+    n_balls: int = Field(gt=0)
+    ball_diameter: float = Field(gt=0)
+    pitch_diameter: float = Field(gt=0)
+    contact_angle: float = 0.0  # degrees
+
 class MachineBase(BaseModel):
     name: str
     type: str
@@ -17,6 +25,7 @@ class MachineBase(BaseModel):
     location: Optional[str] = None
     status: str = "operational"
     rpm_nominal: Optional[int] = None
+    bearing: Optional[BearingGeometry] = None
     power_kw: Optional[float] = None
     description: Optional[str] = None
 
@@ -33,15 +42,11 @@ class Machine(MachineBase):
     created_at: datetime
     updated_at: datetime
 
-# In-memory storage for now (replace with database later)
-machines_db = {}
-
-# Initialize with some default machines for testing
-def initialize_default_machines():
-    if not machines_db:  # Only initialize if empty
+# Persisted in the embedded local database
+def initialize_default_machines(db: LocalDatabase) -> None:
+    if db.count("machines") == 0:  # Only initialize if empty
         default_machines = [
             {
-                "id": str(uuid.uuid4()),
                 "name": "Motor Pump 001",
                 "type": "Centrifugal Pump",
                 "manufacturer": "Grundfos",
@@ -51,11 +56,8 @@ def initialize_default_machines():
                 "rpm_nominal": 1800,
                 "power_kw": 15.0,
                 "description": "Main cooling water pump",
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat()
             },
             {
-                "id": str(uuid.uuid4()),
                 "name": "Compressor Unit 002", 
                 "type": "Rotary Compressor",
                 "manufacturer": "Atlas Copco",
@@ -65,11 +67,8 @@ def initialize_default_machines():
                 "rpm_nominal": 3600,
                 "power_kw": 22.0,
                 "description": "Air compressor for pneumatic systems",
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat()
             },
             {
-                "id": str(uuid.uuid4()),
                 "name": "Fan Motor 003",
                 "type": "Axial Fan",
                 "manufacturer": "ABB",
@@ -79,31 +78,43 @@ def initialize_default_machines():
                 "rpm_nominal": 1450,
                 "power_kw": 7.5,
                 "description": "Ventilation system fan",
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat()
             }
         ]
         
         for machine_data in default_machines:
-            machines_db[machine_data["id"]] = machine_data
+            now = datetime.utcnow().isoformat()
+            db.put_machine({"id": str(uuid.uuid4()), **machine_data, "created_at": now, "updated_at": now})
+
+_seeded = False
+
+# Handlers that touch the database are plain functions: SQLite calls block (up to
+# the busy timeout while another writer holds the lock), so FastAPI runs them in
+# its threadpool instead of on the event loop
 
-# Initialize default machines
-initialize_default_machines()
+def _db() -> LocalDatabase:
+    """Local database, seeded with the default machines on first use"""
+    global _seeded
+    db = get_local_db()
+    if not _seeded:
+        initialize_default_machines(db)
+        _seeded = True
+    return db
 
 @router.get("/machines")
-async def get_machines():
+def get_machines():
     """Get all machines"""
-    return list(machines_db.values())
+    return _db().list_machines()
 
 @router.get("/machines/{machine_id}")
-async def get_machine(machine_id: str):
+def get_machine(machine_id: str):
     """Get a specific machine by ID"""
-    if machine_id not in machines_db:
+    machine = _db().get_machine(machine_id)
+    if machine is None:
         raise HTTPException(status_code=404, detail="Machine not found")
-    return machines_db[machine_id]
+    return machine
 
 @router.post("/machines")
-async def create_machine(machine: MachineCreate):
+def create_machine(machine: MachineCreate):
     """Create a new machine"""
     machine_id = str(uuid.uuid4())
     now = datetime.utcnow().isoformat()
@@ -115,37 +126,34 @@ async def create_machine(machine: MachineCreate):
         **machine.dict()
     }
     
-    machines_db[machine_id] = new_machine
-    return new_machine
+    return _db().put_machine(new_machine)
 
 @router.put("/machines/{machine_id}")
-async def update_machine(machine_id: str, machine: MachineUpdate):
+def update_machine(machine_id: str, machine: MachineUpdate):
     """Update an existing machine"""
-    if machine_id not in machines_db:
+    db = _db()
+    existing_machine = db.get_machine(machine_id)
+    if existing_machine is None:
         raise HTTPException(status_code=404, detail="Machine not found")
     
-    existing_machine = machines_db[machine_id]
     update_data = machine.dict(exclude_unset=True)
     
     for field, value in update_data.items():
         existing_machine[field] = value
     
     existing_machine["updated_at"] = datetime.utcnow().isoformat()
-    machines_db[machine_id] = existing_machine
     
-    return existing_machine
+    return db.put_machine(existing_machine)
 
 @router.delete("/machines/{machine_id}")
-async def delete_machine(machine_id: str):
+def delete_machine(machine_id: str):
     """Delete a machine"""
-    if machine_id not in machines_db:
+    if not _db().delete_machine(machine_id):
         raise HTTPException(status_code=404, detail="Machine not found")
     
-    del machines_db[machine_id]
     return {"message": "Machine deleted successfully"}
 
 # Vibration records endpoints
-vibration_records_db = {}
 
 class VibrationRecordBase(BaseModel):
     machine_id: str
@@ -163,143 +171,149 @@ class VibrationRecord(VibrationRecordBase):
     id: str
     created_at: datetime
 
-@router.get("/vibrations")
-async def get_vibration_records():
-    """Get all vibration records from both in-memory and Supabase storage"""
-    from ...services.supabase_service import SupabaseService
-    
-    print(f"Fetching vibration records. In-memory database contains {len(vibration_records_db)} records:")
-    for record_id, record in vibration_records_db.items():
-        print(f"  - {record_id}: {record.get('file_name', 'Unknown')} (processed: {record.get('processed', False)})")
-    
-    # Also get records from Supabase service local storage
-    supabase_service = SupabaseService()
-    supabase_records = []
+def _to_api_record(record: dict) -> dict:
+    """Vibration record in the shape the frontend expects, with defaults for missing metadata"""
+    file_path = record.get("file_path") or ""
+    return {
+        "id": record["id"],
+        "machine_id": record.get("machine_id") or record.get("sensor_id", "unknown"),
+        "file_url": record.get("file_url") or (f"/uploads/{file_path.split('/')[-1]}" if file_path else ""),
+        "file_name": record.get("file_name", "Unknown"),
+        "sensor_position": record.get("sensor_position") or "Drive End",  # Default value
+        "axis": record.get("axis") or "Horizontal",  # Default value
+        "sampling_rate": record.get("sampling_rate") or 12000,  # Default value
+        "measurement_date": record.get("measurement_date") or record.get("timestamp", record.get("created_at", "")),
+        "created_at": record.get("created_at", record.get("timestamp", "")),
+        "processed": record.get("status") == "processed"
+    }
+
+# Record document keys behind each field of _to_api_record
+_FIELD_KEYS = {
+    "id": [],
+    "machine_id": ["machine_id", "sensor_id"],
+    "file_url": ["file_url", "file_path"],
+    "file_name": ["file_name"],
+    "sensor_position": ["sensor_position"],
+    "axis": ["axis"],
+    "sampling_rate": ["sampling_rate"],
+    "measurement_date": ["measurement_date", "timestamp"],
+    "created_at": ["timestamp"],
+    "processed": ["status"],
+}
+
+def _page_vibration_records(
+    response: Response,
+    machine_id: Optional[str],
+    status: Optional[str],
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    cursor: Optional[str],
+    limit: int,
+    fields: Optional[str],
+) -> List[dict]:
+    """
+    One page of records; the cursor of the next page goes in the X-Next-Cursor header
     
+    Pages the local database, which every upload mirrors with its full
+    metadata and which the create and delete endpoints write to. Only the
+    document keys behind the requested fields are read, in SQL, so stored
+    channel features are never loaded.
+    """
+    requested = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    unknown = sorted(set(requested or []) - set(_FIELD_KEYS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
     try:
-        # Access the local records from SupabaseService
-        local_records = getattr(supabase_service, '_local_records', {})
-        print(f"Supabase local storage contains {len(local_records)} records:")
-        
-        for record_id, record in local_records.items():
-            print(f"  - {record_id}: {record.get('file_name', 'Unknown')} (status: {record.get('status', 'unknown')})")
-            
-            # Convert Supabase record format to match the expected format
-            converted_record = {
-                "id": record_id,
-                "machine_id": record.get("sensor_id", "unknown"),  # Use sensor_id as machine_id for now
-                "file_url": f"/uploads/{record.get('file_path', '').split('/')[-1]}" if record.get('file_path') else "",
-                "file_name": record.get("file_name", "Unknown"),
-                "sensor_position": "Drive End",  # Default value
-                "axis": "Horizontal",  # Default value
-                "sampling_rate": 12000,  # Default value
-                "measurement_date": record.get("timestamp", record.get("created_at", "")),
-                "created_at": record.get("created_at", record.get("timestamp", "")),
-                "processed": record.get("status") == "processed"
-            }
-            supabase_records.append(converted_record)
-    except Exception as e:
-        print(f"Error accessing Supabase local records: {e}")
-    
-    # Combine records from both sources, avoiding duplicates
-    all_records = list(vibration_records_db.values())
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Add Supabase records that aren't already in the in-memory database
-    existing_ids = set(vibration_records_db.keys())
-    for record in supabase_records:
-        if record["id"] not in existing_ids:
-            all_records.append(record)
+    keys = [k for f in (requested or _FIELD_KEYS) for k in _FIELD_KEYS[f]]
+    # One row past the page tells whether another page follows
+    rows = _db().list_records(
+        machine_id=machine_id,
+        status=status,
+        start_time=start_time,
+        end_time=end_time,
+        after=after,
+        limit=limit + 1,
+        keys=keys,
+    )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor((str(rows[-1]["created_at"]), str(rows[-1]["id"])))
     
-    print(f"Total records returned: {len(all_records)}")
-    return all_records
+    records = [_to_api_record(r) for r in rows]
+    if requested:
+        records = [{f: r[f] for f in requested} for r in records]
+    return records
+
+@router.get("/vibrations")
+def get_vibration_records(
+    response: Response,
+    machine_id: Optional[str] = None,
+    status: Optional[str] = Query(None, description="processed or unprocessed"),
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+):
+    """Get one page of vibration records, oldest first"""
+    return _page_vibration_records(response, machine_id, status, start_time, end_time, cursor, limit, fields)
 
 @router.get("/vibrations/machine/{machine_id}")
-async def get_vibration_records_by_machine(machine_id: str):
-    """Get vibration records for a specific machine"""
-    records = [r for r in vibration_records_db.values() if r.get("machine_id") == machine_id]
-    return records
+def get_vibration_records_by_machine(
+    machine_id: str,
+    response: Response,
+    status: Optional[str] = Query(None, description="processed or unprocessed"),
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+):
+    """Get one page of vibration records for a specific machine"""
+    return _page_vibration_records(response, machine_id, status, start_time, end_time, cursor, limit, fields)
 
 @router.post("/vibrations")
-async def create_vibration_record(record: VibrationRecordCreate):
+def create_vibration_record(record: VibrationRecordCreate):
     """Create a new vibration record"""
-    record_id = str(uuid.uuid4())
-    now = datetime.utcnow().isoformat()
-    
-    new_record = {
-        "id": record_id,
-        "created_at": now,
+    new_record = _db().put_record({
+        "id": str(uuid.uuid4()),
+        "created_at": datetime.utcnow().isoformat(),
+        "status": "unprocessed",
         **record.dict()
-    }
-    
-    vibration_records_db[record_id] = new_record
-    return new_record
+    })
+    return _to_api_record(new_record)
 
 @router.delete("/vibrations/{record_id}")
-async def delete_vibration_record(record_id: str):
+def delete_vibration_record(record_id: str):
     """Delete a vibration record"""
-    if record_id not in vibration_records_db:
+    if not _db().delete_record(record_id):
         raise HTTPException(status_code=404, detail="Vibration record not found")
     
-    del vibration_records_db[record_id]
     return {"message": "Vibration record deleted successfully"}
 
 @router.get("/debug/storage")
-async def debug_storage():
-    """Debug endpoint to see what's in each storage system"""
-    from ...services.supabase_service import SupabaseService
-    
-    supabase_service = SupabaseService()
-    local_records = getattr(supabase_service, '_local_records', {})
-    local_diagnoses = getattr(supabase_service, '_local_diagnoses', {})
-    local_fault_detections = getattr(supabase_service, '_local_fault_detections', {})
-    
+def debug_storage():
+    """Debug endpoint to see what's in the local database"""
+    db = _db()
     return {
-        "in_memory_db": {
-            "vibration_records": len(vibration_records_db),
-            "records": list(vibration_records_db.keys())
-        },
-        "supabase_local": {
-            "vibration_records": len(local_records),
-            "diagnoses": len(local_diagnoses),
-            "fault_detections": len(local_fault_detections),
-            "record_ids": list(local_records.keys())
+        "local_db": {
+            "path": db.path,
+            "machines": db.count("machines"),
+            "vibration_records": db.count("vibration_records"),
+            "diagnoses": db.count("diagnoses"),
+            "fault_detections": db.count("fault_detections"),
         },
-        "sample_records": {
-            "in_memory": list(vibration_records_db.values())[:2],
-            "supabase_local": list(local_records.values())[:2]
-        }
+        "sample_records": db.list_records(limit=2),
     }
 
 @router.post("/debug/sync-storage")
-async def sync_storage():
-    """Sync records from Supabase local storage to in-memory database"""
-    from ...services.supabase_service import SupabaseService
-    
-    supabase_service = SupabaseService()
-    local_records = getattr(supabase_service, '_local_records', {})
-    
-    synced_count = 0
-    
-    for record_id, record in local_records.items():
-        if record_id not in vibration_records_db:
-            # Convert Supabase record format to in-memory format
-            converted_record = {
-                "id": record_id,
-                "machine_id": record.get("machine_id", record.get("sensor_id", "unknown")),
-                "file_url": f"/uploads/{record.get('file_path', '').split('/')[-1]}" if record.get('file_path') else "",
-                "file_name": record.get("file_name", "Unknown"),
-                "sensor_position": record.get("sensor_position", "Drive End"),
-                "axis": record.get("axis", "Horizontal"),
-                "sampling_rate": record.get("sampling_rate", 12000),
-                "measurement_date": record.get("timestamp", record.get("created_at", "")),
-                "created_at": record.get("created_at", record.get("timestamp", "")),
-                "processed": record.get("status") == "processed"
-            }
-            
-            vibration_records_db[record_id] = converted_record
-            synced_count += 1
-    
+def sync_storage():
+    """Kept for the frontend; records and diagnoses now share one local database"""
     return {
-        "message": f"Synced {synced_count} records from Supabase local storage to in-memory database",
-        "total_records_now": len(vibration_records_db)
+        "message": "Synced 0 records: all records live in the local database",
+        "total_records_now": _db().count("vibration_records")
     }
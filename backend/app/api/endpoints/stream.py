@@ -0,0 +1,120 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
+from ...services.live_stream import get_live_streams
+from ...services.supabase_service import SupabaseService
+
+
+router = APIRouter()
+
+
+def _open(sensor_id: str, sampling_rate: Optional[float], channels: int, window_size: Optional[int], hop_size: Optional[int]):
+    streams = get_live_streams()
+    if sampling_rate is not None:
+        return streams.open(sensor_id, sampling_rate, channels, window_size, hop_size)
+    # Without an explicit rate, take it from the registered sensor
+    try:
+        sensor = SupabaseService().get_sensor(sensor_id)
+    except Exception:
+        sensor = None
+    if not sensor:
+        raise ValueError("sampling_rate is required for unregistered sensors")
+    return streams.open_for_sensor(sensor, channels, window_size=window_size, hop_size=hop_size)
+
+
+@router.get("/stats")
+def get_stream_stats():
+    """Open streams and buffer memory against the configured budget"""
+    return get_live_streams().stats()
+
+
+@router.post("/{sensor_id}")
+async def push_samples(
+    sensor_id: str,
+    request: Request,
+    sampling_rate: Optional[float] = Query(None, gt=0),
+    channels: int = Query(1, ge=1),
+    window_size: Optional[int] = Query(None, ge=1),
+    hop_size: Optional[int] = Query(None, ge=1),
+):
+    """
+    Feed raw samples (little-endian float32, channels interleaved) to a live stream
+
+    The body may be sent with chunked transfer encoding; chunks are analyzed as
+    they arrive and the features of every window completed by this request are
+    returned.
+    """
+    # May look the sensor up in Supabase, which blocks
+    try:
+        stream = await run_in_threadpool(_open, sensor_id, sampling_rate, channels, window_size, hop_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    windows = []
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            windows.extend(await run_in_threadpool(stream.push_bytes, chunk))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "sensor_id": sensor_id,
+        "bytes_received": received,
+        "samples_seen": stream.samples_seen,
+        "windows": windows,
+    }
+
+
+@router.websocket("/{sensor_id}/ws")
+async def stream_samples(
+    websocket: WebSocket,
+    sensor_id: str,
+    sampling_rate: Optional[float] = Query(None, gt=0),
+    channels: int = Query(1, ge=1),
+    window_size: Optional[int] = Query(None, ge=1),
+    hop_size: Optional[int] = Query(None, ge=1),
+):
+    """Binary frames of raw samples in, one JSON message per completed window out"""
+    try:
+        stream = await run_in_threadpool(_open, sensor_id, sampling_rate, channels, window_size, hop_size)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    await websocket.accept()
+    try:
+        while True:
+            data = await websocket.receive_bytes()
+            for window in await run_in_threadpool(stream.push_bytes, data):
+                await websocket.send_json(window)
+    except WebSocketDisconnect:
+        pass
+
+
+@router.get("/{sensor_id}")
+def get_stream(sensor_id: str):
+    """Counters and the most recent window of a live stream"""
+    stream = get_live_streams().get(sensor_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return stream.status()
+
+
+@router.get("/{sensor_id}/samples")
+def get_stream_samples(sensor_id: str, seconds: float = Query(1.0, gt=0)):
+    """Conditioned samples of the last seconds of a live stream, one list per channel"""
+    stream = get_live_streams().get(sensor_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    samples = stream.buffer.last_seconds(seconds)
+    return {
+        "sensor_id": sensor_id,
+        "sampling_rate": stream.sampling_rate,
+        "samples": samples.tolist(),
+    }
+
+
+@router.delete("/{sensor_id}")
+def close_stream(sensor_id: str):
+    if not get_live_streams().close(sensor_id):
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return {"sensor_id": sensor_id, "closed": True}
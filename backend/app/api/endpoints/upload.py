@@ -1,10 +1,13 @@
 from fastapi import APIRouter, HTTPException, File, UploadFile, Form
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 import os
 import uuid
 from datetime import datetime
-from ...services.supabase_service import SupabaseService
+from ...services.supabase_async import get_async_supabase
+from ...services.local_db import get_local_db
+from ...services.local_storage import LocalStorage, UploadTooLargeError
 from ...core.config import settings
 
 
@@ -30,7 +33,7 @@ async def upload_file(
         print(f"Metadata: machine_id={machine_id}, sensor_position={sensor_position}, axis={axis}, sampling_rate={sampling_rate}")
         
         # Validate file type
-        allowed_extensions = ['.csv', '.wav', '.tdms', '.mat', '.mdf']
+        allowed_extensions = ['.csv', '.wav', '.tdms', '.mat', '.mdf', '.mf4']
         file_extension = os.path.splitext(file.filename or "")[1].lower()
         
         print(f"File extension: {file_extension}")
@@ -41,20 +44,27 @@ async def upload_file(
                 detail=f"Unsupported file type: {file_extension}. Allowed: {', '.join(allowed_extensions)}"
             )
         
-        # Read file contents
-        contents = await file.read()
-        
-        print(f"File size: {len(contents)} bytes")
-        
-        if len(contents) == 0:
-            raise HTTPException(status_code=400, detail="File is empty")
-        
         # Generate unique filename for Supabase Storage
         unique_filename = f"{uuid.uuid4()}{file_extension}"
         storage_path = f"uploads/{unique_filename}"
         
+        # Stream the upload to local disk in fixed-size chunks so memory stays bounded
+        local_storage = LocalStorage()
+        try:
+            size, checksum = await local_storage.save_upload(
+                file, unique_filename, settings.upload_chunk_size, settings.upload_max_bytes
+            )
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        
+        print(f"File size: {size} bytes (sha256 {checksum})")
+        
+        if size == 0:
+            local_storage.remove(unique_filename)
+            raise HTTPException(status_code=400, detail="File is empty")
+        
         # Try to upload to Supabase Storage, fallback to local storage
-        supabase = SupabaseService()
+        supabase = get_async_supabase()
         
         # Determine content type
         content_type_map = {
@@ -62,27 +72,22 @@ async def upload_file(
             '.wav': 'audio/wav',
             '.mat': 'application/octet-stream',
             '.tdms': 'application/octet-stream',
-            '.mdf': 'application/octet-stream'
+            '.mdf': 'application/octet-stream',
+            '.mf4': 'application/octet-stream'
         }
         content_type = content_type_map.get(file_extension, 'application/octet-stream')
         
-        # Try to upload to Supabase Storage
+        # Try to upload to Supabase Storage, streaming from the spooled local file
         try:
-            if supabase._client is not None:
-                supabase.upload_storage_file(storage_path, contents, content_type)
+            if supabase.configured:
+                await supabase.upload_storage_file(storage_path, local_storage.path_for(unique_filename), content_type)
+                local_storage.remove(unique_filename)
                 file_url = f"/{settings.supabase_bucket}/{storage_path}"
             else:
                 raise RuntimeError("Supabase not configured")
         except Exception as e:
             print(f"Supabase upload failed, using local storage: {e}")
-            # Fallback to local storage
-            upload_dir = "uploads"
-            os.makedirs(upload_dir, exist_ok=True)
-            local_file_path = os.path.join(upload_dir, unique_filename)
-            
-            with open(local_file_path, "wb") as f:
-                f.write(contents)
-            
+            # Fallback to local storage: the streamed file already lives in uploads/
             storage_path = f"local/{unique_filename}"
             file_url = f"/uploads/{unique_filename}"
         
@@ -92,7 +97,8 @@ async def upload_file(
             "file_name": file.filename,
             "file_path": storage_path,
             "storage_path": storage_path,
-            "size": len(contents),
+            "size": size,
+            "sha256": checksum,
             "uploaded_at": datetime.utcnow().isoformat(),
             "metadata": {
                 "machine_id": machine_id,
@@ -134,7 +140,7 @@ async def create_vibration_record(payload: VibrationRecordRequest):
         print(f"Creating vibration record for: {payload.file_name}")
         print(f"Payload: {payload.dict()}")
         
-        supabase = SupabaseService()
+        supabase = get_async_supabase()
         
         # First, we need to find or create a sensor for this measurement
         # For MVP, we'll create a simple sensor record
@@ -143,7 +149,7 @@ async def create_vibration_record(payload: VibrationRecordRequest):
         # Check if we have machines and sensors tables properly set up
         # For now, we'll create a sensor if needed
         try:
-            sensor_id = supabase.create_sensor(
+            sensor_id = await supabase.create_sensor(
                 machine_id=payload.machine_id,
                 position=payload.sensor_position,
                 axis=payload.axis,
@@ -169,17 +175,19 @@ async def create_vibration_record(payload: VibrationRecordRequest):
         
         print(f"Creating record with data: {record_data}")
         
-        result = supabase.create_vibration_record_from_dict(record_data)
+        result = await supabase.create_vibration_record_from_dict(record_data)
         
         print(f"Record created: {result}")
         
-        # Also store in the in-memory database for the /records/vibrations endpoint
+        # Keep the machine metadata on the local copy that backs /records/vibrations
         try:
-            from .machines import vibration_records_db
-            
             record_id = result.get("id") or str(uuid.uuid4())
-            in_memory_record = {
+            await run_in_threadpool(get_local_db().put_record, {
                 "id": record_id,
+                "sensor_id": sensor_id,
+                "file_path": payload.file_path,
+                "timestamp": payload.measurement_date,
+                "status": result.get("status", "unprocessed"),
                 "machine_id": payload.machine_id,
                 "file_url": payload.file_url,
                 "file_name": payload.file_name,
@@ -187,29 +195,10 @@ async def create_vibration_record(payload: VibrationRecordRequest):
                 "axis": payload.axis,
                 "sampling_rate": payload.sampling_rate,
                 "measurement_date": payload.measurement_date,
-                "created_at": datetime.utcnow().isoformat(),
-                "processed": False
-            }
-            
-            vibration_records_db[record_id] = in_memory_record
-            print(f"Also stored in in-memory database: {record_id}")
-            
-            # Also ensure the record has the correct machine_id mapping
-            # Update the Supabase local record to include machine_id for easier access
-            try:
-                supabase_service = SupabaseService()
-                local_records = getattr(supabase_service, '_local_records', {})
-                if record_id in local_records:
-                    local_records[record_id]["machine_id"] = payload.machine_id
-                    local_records[record_id]["sensor_position"] = payload.sensor_position
-                    local_records[record_id]["axis"] = payload.axis
-                    local_records[record_id]["sampling_rate"] = payload.sampling_rate
-                    print(f"Updated Supabase local record with machine metadata: {record_id}")
-            except Exception as e:
-                print(f"Failed to update Supabase local record: {e}")
-            
+            })
+            print(f"Stored record metadata in local database: {record_id}")
         except Exception as e:
-            print(f"Failed to store in in-memory database: {e}")
+            print(f"Failed to store in local database: {e}")
         
         return {
             "success": True,
@@ -1,35 +1,162 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+from collections import OrderedDict
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import httpx
 from .config import settings
+from ..services.supabase_async import get_async_supabase
 
 bearer_scheme = HTTPBearer(auto_error=True)
 
 
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _jwt_parts(token: str) -> Tuple[Dict[str, Any], Dict[str, Any], bytes, bytes]:
+    """Header, claims, signing input and signature of a compact JWT; ValueError if malformed"""
+    try:
+        header_b64, claims_b64, signature_b64 = token.split(".")
+        header = json.loads(_b64decode(header_b64))
+        claims = json.loads(_b64decode(claims_b64))
+        signature = _b64decode(signature_b64)
+    except Exception:
+        raise ValueError("Malformed token")
+    if not isinstance(header, dict) or not isinstance(claims, dict):
+        raise ValueError("Malformed token")
+    return header, claims, f"{header_b64}.{claims_b64}".encode("ascii"), signature
+
+
+def verify_hs256(token: str, secret: str, now: Optional[float] = None) -> Dict[str, Any]:
+    """Claims of an HS256 token signed with secret; ValueError if invalid or expired"""
+    header, claims, signing_input, signature = _jwt_parts(token)
+    if header.get("alg") != "HS256":
+        raise ValueError("Unsupported token algorithm")
+    expected = hmac.new(secret.encode("utf-8"), signing_input, hashlib.sha256).digest()
+    if not hmac.compare_digest(expected, signature):
+        raise ValueError("Invalid token signature")
+    exp = claims.get("exp")
+    if not isinstance(exp, (int, float)) or exp <= (time.time() if now is None else now):
+        raise ValueError("Token expired")
+    if not claims.get("sub"):
+        raise ValueError("Token has no subject")
+    return claims
+
+
+def _user_from_claims(claims: Dict[str, Any]) -> Dict[str, Any]:
+    # The subset of the /auth/v1/user payload that Supabase puts in its access tokens
+    return {
+        "id": claims["sub"],
+        "aud": claims.get("aud"),
+        "role": claims.get("role"),
+        "email": claims.get("email"),
+        "phone": claims.get("phone"),
+        "app_metadata": claims.get("app_metadata", {}),
+        "user_metadata": claims.get("user_metadata", {}),
+    }
+
+
+class TokenCache:
+    """
+    LRU of verified tokens, keyed by the token's SHA-256
+
+    Each entry expires after ttl seconds or at the token's own exp, whichever
+    comes first, so a cached token is never accepted past its expiry.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl: float = 300.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        now = time.time() if now is None else now
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, token: str, user: Dict[str, Any], exp: Optional[float], now: Optional[float] = None) -> None:
+        if self.max_entries <= 0:
+            return
+        now = time.time() if now is None else now
+        expires_at = now + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        if expires_at <= now:
+            return
+        key = self.key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries)}
+
+
+_token_cache = TokenCache(settings.auth_cache_entries, settings.auth_cache_ttl_seconds)
+
+
+def _token_exp(token: str) -> Optional[float]:
+    # Only bounds the cache lifetime of a token Supabase has already accepted
+    try:
+        exp = _jwt_parts(token)[1].get("exp")
+    except ValueError:
+        return None
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
 ) -> Dict[str, Any]:
-    if not settings.supabase_url:
-        raise HTTPException(status_code=500, detail="SUPABASE_URL not configured")
-
     token = credentials.credentials
-    auth_url = settings.supabase_url.rstrip("/") + "/auth/v1/user"
+    user = _token_cache.get(token)
+    if user is not None:
+        return user
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "apikey": settings.supabase_service_key or "",
-    }
+    if settings.supabase_jwt_secret:
+        try:
+            claims = verify_hs256(token, settings.supabase_jwt_secret)
+        except ValueError:
+            raise HTTPException(status_code=401, detail="Invalid or expired token")
+        user = _user_from_claims(claims)
+        _token_cache.put(token, user, claims["exp"])
+        return user
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(auth_url, headers=headers)
+    if not settings.supabase_url:
+        raise HTTPException(status_code=500, detail="SUPABASE_URL not configured")
+    if not settings.supabase_service_key:
+        raise HTTPException(status_code=500, detail="SUPABASE_SERVICE_KEY not configured")
 
-    if resp.status_code != 200:
+    user = await get_async_supabase().get_auth_user(token)
+    if user is None:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-    user = resp.json()
     # Expected fields: id, aud, role, email, etc.
     if not user or "id" not in user:
         raise HTTPException(status_code=401, detail="Invalid user payload")
 
+    _token_cache.put(token, user, _token_exp(token))
     return user
@@ -6,6 +6,64 @@ class Settings(BaseSettings):
     supabase_service_key: str = ""
     supabase_bucket: str = "vibration-files"
 
+    # Pooled async HTTP client for Supabase: open connections, requests in flight, seconds per request
+    supabase_http_max_connections: int = 20
+    supabase_max_concurrency: int = 16
+    supabase_http_timeout: float = 30.0
+
+    # Access tokens: HS256 secret for local verification (empty = ask Supabase), verified-token cache
+    supabase_jwt_secret: str = ""
+    auth_cache_entries: int = 4096
+    auth_cache_ttl_seconds: float = 300.0
+
+    # Streaming uploads
+    upload_chunk_size: int = 1024 * 1024
+    upload_max_bytes: int = 1024 * 1024 * 1024
+
+    # Write-behind batching of diagnosis results to Supabase (0 rows = write through)
+    supabase_write_batch_rows: int = 500
+    supabase_write_flush_seconds: float = 2.0
+    supabase_write_retries: int = 5
+    supabase_write_spool_path: str = "data/supabase_write_spool.jsonl"
+
+    # Worker processes for batch diagnosis (0 = one per CPU core)
+    batch_max_workers: int = 0
+
+    # Background diagnosis jobs (0 workers = one per CPU core)
+    job_max_workers: int = 0
+    job_retention: int = 1000
+
+    # Analysis result cache; an empty dir disables the on-disk tier
+    analysis_cache_entries: int = 256
+    analysis_cache_dir: str = ""
+    analysis_cache_max_bytes: int = 512 * 1024 * 1024
+
+    # Live sensor streams: samples per analysis window and between windows (0 = window)
+    stream_window_size: int = 4096
+    stream_hop_size: int = 0
+    # Per-sensor sample history (at least one window) and the budget across all sensors
+    stream_history_seconds: float = 2.0
+    stream_buffer_dtype: str = "float32"
+    stream_max_bytes: int = 256 * 1024 * 1024
+    stream_idle_seconds: float = 300.0
+
+    # Fault rules as a JSON file; the Supabase settings table takes precedence, built-in rules otherwise
+    rules_path: str = ""
+
+    # Band energy sets as a JSON file ({"sets": ..., "machine_types": ...}) on top of the built-in sets
+    band_sets_path: str = ""
+
+    # Baseline signatures: correlation shrinkage, healthy records per fit and their minimum health
+    # score, cached signatures, and the normalized Mahalanobis distance that raises a finding
+    baseline_shrinkage: float = 0.2
+    baseline_records: int = 20
+    baseline_min_health: int = 80
+    baseline_cache_entries: int = 256
+    baseline_alert_distance: float = 3.0
+
+    # Embedded database used when Supabase is not configured, and for the record lists
+    local_db_path: str = "data/local.db"
+
     model_config = SettingsConfigDict(env_file=".env", env_prefix="", extra="ignore")
 
 
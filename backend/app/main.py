@@ -4,6 +4,11 @@ from .api.endpoints.upload import router as upload_router
 from .api.endpoints.records import router as records_router
 from .api.endpoints.diagnose import router as diagnose_router
 from .api.endpoints.machines import router as machines_router
+from .api.endpoints.stream import router as stream_router
+from .services.batch_diagnosis import shutdown_process_pool
+from .services.job_queue import shutdown_job_queue
+from .services.supabase_async import close_async_supabase
+from .services.supabase_service import shutdown_supabase_writes
 
 app = FastAPI(title="Mpiloshini RMH 24 Backend")
 
@@ -23,13 +28,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.on_event("shutdown")
+def shutdown_workers():
+    shutdown_job_queue()
+    shutdown_process_pool()
+    shutdown_supabase_writes()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await close_async_supabase()
+
 app.include_router(upload_router, prefix="/upload", tags=["upload"])
 app.include_router(machines_router, prefix="/records", tags=["machines", "records"])
 app.include_router(records_router, prefix="/records", tags=["records"])
 app.include_router(diagnose_router, prefix="/diagnose", tags=["diagnose"])
+app.include_router(stream_router, prefix="/stream", tags=["stream"])
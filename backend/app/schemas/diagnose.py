@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+
+class BatchDiagnoseRequest(BaseModel):
+    record_ids: Optional[List[str]] = None
+    machine_id: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    stream: bool = False
+
+
+class BaselineRequest(BaseModel):
+    sensor_id: Optional[str] = None
+    record_ids: Optional[List[str]] = None
+
+
+class RescoreRequest(BaseModel):
+    machine_id: Optional[str] = None
+    reload_rules: bool = True
+    store: bool = False
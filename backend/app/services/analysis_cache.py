@@ -0,0 +1,178 @@
+"""
+Content-addressed cache for signal analysis results
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from ..core.config import settings
+
+
+def _json_default(value: Any) -> Any:
+    # NumPy scalars and arrays leak into metadata (shapes, counts)
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class AnalysisCache:
+    """
+    Two-tier result cache keyed by file content and processing parameters
+
+    The memory tier is an LRU bounded by entry count. The optional disk tier
+    stores one JSON file per key and evicts least recently used files once the
+    directory exceeds max_disk_bytes.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        cache_dir: Optional[str] = None,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+    ) -> None:
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir or None
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._disk_sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._scan_disk()
+
+    @staticmethod
+    def make_key(file_bytes, params: Dict[str, Any]) -> str:
+        """SHA-256 of the file bytes combined with the canonical processing parameters"""
+        digest = hashlib.sha256(file_bytes).hexdigest()
+        params_json = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(f"{digest}:{params_json}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return copy.deepcopy(value)
+
+            value = self._read_disk(key)
+            if value is not None:
+                self._counters["disk_hits"] += 1
+                self._put_memory(key, value)
+                return copy.deepcopy(value)
+
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._put_memory(key, value)
+            self._write_disk(key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            for key in list(self._disk_sizes):
+                self._remove_disk(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hits": hits,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk_sizes),
+                "disk_bytes": sum(self._disk_sizes.values()),
+            }
+
+    def _put_memory(self, key: str, value: Dict[str, Any]) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _scan_disk(self) -> None:
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                self._disk_sizes[name[:-5]] = os.path.getsize(os.path.join(self.cache_dir, name))
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir or key not in self._disk_sizes:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)  # mark as recently used for eviction
+            return value
+        except (OSError, ValueError):
+            self._disk_sizes.pop(key, None)
+            return None
+
+    def _write_disk(self, key: str, value: Dict[str, Any]) -> None:
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, default=_json_default)
+            os.replace(tmp_path, path)
+            self._disk_sizes[key] = os.path.getsize(path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Failed to write analysis cache entry: {e}")
+            return
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        total = sum(self._disk_sizes.values())
+        if total <= self.max_disk_bytes:
+            return
+        by_age = sorted(self._disk_sizes, key=lambda k: self._mtime(k))
+        for key in by_age:
+            if total <= self.max_disk_bytes:
+                break
+            total -= self._disk_sizes.get(key, 0)
+            self._remove_disk(key)
+            self._counters["evictions"] += 1
+
+    def _mtime(self, key: str) -> float:
+        try:
+            return os.path.getmtime(self._path(key))
+        except OSError:
+            return 0.0
+
+    def _remove_disk(self, key: str) -> None:
+        self._disk_sizes.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+_cache: Optional[AnalysisCache] = None
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Return the shared analysis cache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        _cache = AnalysisCache(
+            max_entries=settings.analysis_cache_entries,
+            cache_dir=settings.analysis_cache_dir,
+            max_disk_bytes=settings.analysis_cache_max_bytes,
+        )
+    return _cache
@@ -0,0 +1,293 @@
+"""
+Baseline signatures of healthy machine behaviour
+
+A BaselineSignature summarizes the feature vectors of N healthy recordings
+of one machine (or one sensor on it): per-feature mean, standard deviation
+and percentiles, plus a shrunk inverse correlation matrix. A new recording
+is scored by flattening its features into the same order and computing all
+z-scores and the Mahalanobis distance with a few array operations.
+
+Signatures serialize to a compact JSON document (float32 arrays as base64)
+stored in the local database, and BaselineStore keeps recently used ones in
+memory.
+"""
+import base64
+import datetime as _dt
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..core.config import settings
+from .local_db import LocalDatabase, get_local_db
+
+
+PERCENTILES = (5.0, 25.0, 50.0, 75.0, 95.0)
+
+# Frequency-domain scalars worth tracking; lists (harmonics) are left out
+_FREQUENCY_KEYS = (
+    "spectral_centroid",
+    "spectral_rolloff",
+    "spectral_bandwidth",
+    "dominant_frequency",
+    "dominant_magnitude",
+)
+
+
+def flatten_features(channel: Dict[str, Any]) -> Dict[str, float]:
+    """Scalar features of one processed channel under flat names (time.rms, band.gear_mesh, ...)
+
+    Harmonics are summarized as freq.harmonic_count and freq.harmonic_mean_magnitude,
+    order analysis as order.running_speed, order.fft_peak_1x..3x and
+    order.dominant_order, and matched bearing defects as env.<defect>_snr_db,
+    _harmonics and _frequency.
+    """
+    flat: Dict[str, float] = {}
+    for name, value in (channel.get("time_features") or {}).items():
+        if isinstance(value, (int, float)):
+            flat[f"time.{name}"] = float(value)
+    freq = channel.get("frequency_features") or {}
+    for name in _FREQUENCY_KEYS:
+        if isinstance(freq.get(name), (int, float)):
+            flat[f"freq.{name}"] = float(freq[name])
+    harmonics = freq.get("harmonics")
+    if isinstance(harmonics, list):
+        flat["freq.harmonic_count"] = len(harmonics)
+        if harmonics:
+            flat["freq.harmonic_mean_magnitude"] = sum(h.get("magnitude", 0) for h in harmonics) / len(harmonics)
+    for name, value in (freq.get("frequency_bands") or {}).items():
+        if isinstance(value, (int, float)):
+            flat[f"band.{name}"] = float(value)
+    orders = channel.get("orders") or {}
+    if "running_speed_hz" in orders:
+        flat["order.running_speed"] = orders["running_speed_hz"]
+    for name, amplitude in (orders.get("amplitudes") or {}).items():
+        flat[f"order.fft_peak_{name}"] = amplitude
+    if "dominant_order" in orders:
+        flat["order.dominant_order"] = orders["dominant_order"]
+    for name, match in ((channel.get("envelope") or {}).get("defects") or {}).items():
+        flat[f"env.{name}_snr_db"] = match["snr_db"]
+        flat[f"env.{name}_harmonics"] = match["harmonics_detected"]
+        flat[f"env.{name}_frequency"] = match["peak_frequency"]
+    return flat
+
+
+def _encode(array: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(array, dtype="<f4").tobytes()).decode("ascii")
+
+
+def _decode(data: str, shape: Tuple[int, ...]) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype="<f4").astype(np.float64).reshape(shape)
+
+
+class BaselineSignature:
+    """Feature statistics of healthy recordings, scored against in one vectorized pass"""
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        mean: np.ndarray,
+        std: np.ndarray,
+        percentiles: np.ndarray,
+        precision: np.ndarray,
+        n_records: int,
+        created_at: Optional[str] = None,
+    ) -> None:
+        self.names = list(names)
+        self.mean = mean
+        self.std = std
+        self.percentiles = percentiles
+        self.precision = precision
+        self.n_records = n_records
+        self.created_at = created_at or _dt.datetime.utcnow().isoformat()
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def fit(cls, feature_dicts: Iterable[Dict[str, float]], shrinkage: float = 0.2) -> "BaselineSignature":
+        """
+        Build a signature from flattened features of healthy recordings
+
+        Only features present in every recording are kept. The correlation
+        matrix of the z-scores is shrunk toward the identity before inverting,
+        so it stays well conditioned with fewer recordings than features.
+        """
+        rows = list(feature_dicts)
+        if len(rows) < 2:
+            raise ValueError("A baseline needs at least two healthy recordings")
+        names = sorted(set.intersection(*(set(r) for r in rows)))
+        if not names:
+            raise ValueError("Recordings share no features")
+
+        X = np.array([[r[n] for n in names] for r in rows], dtype=np.float64)
+        mean = X.mean(axis=0)
+        # Floor the spread so features that never moved in the baseline don't divide by zero
+        std = np.maximum(X.std(axis=0, ddof=1), 1e-3 * np.abs(mean) + 1e-12)
+        Z = (X - mean) / std
+        corr = Z.T @ Z / (len(rows) - 1)
+        corr = (1.0 - shrinkage) * corr + shrinkage * np.eye(len(names))
+        return cls(
+            names=names,
+            mean=mean,
+            std=std,
+            percentiles=np.percentile(X, PERCENTILES, axis=0),
+            precision=np.linalg.inv(corr),
+            n_records=len(rows),
+        )
+
+    def vector(self, features: Dict[str, float]) -> np.ndarray:
+        """Features in signature order; missing ones are NaN"""
+        return np.array([features.get(name, np.nan) for name in self.names], dtype=np.float64)
+
+    def means(self) -> Dict[str, float]:
+        """Baseline mean of each feature by name"""
+        return dict(zip(self.names, self.mean.tolist()))
+
+    def score_matrix(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """z-scores (records, features) and Mahalanobis distances (records,) for a feature matrix"""
+        Z = (np.atleast_2d(X) - self.mean) / self.std
+        # A missing feature contributes no deviation
+        Z = np.nan_to_num(Z, nan=0.0)
+        d2 = np.einsum("ij,jk,ik->i", Z, self.precision, Z)
+        return Z, np.sqrt(np.maximum(d2, 0.0))
+
+    def score(self, features: Dict[str, float], z_threshold: float = 3.0, top: int = 5) -> Dict[str, Any]:
+        """Deviation of one recording: Mahalanobis distance and the most deviant features"""
+        x = self.vector(features)
+        Z, distance = self.score_matrix(x)
+        z = Z[0]
+        above = x > self.percentiles[-1]
+        below = x < self.percentiles[0]
+        order = np.argsort(-np.abs(z))[:top]
+        order = order[np.abs(z[order]) >= z_threshold]
+        return {
+            "mahalanobis": float(distance[0]),
+            # Mahalanobis per degree of freedom; about 1 for a healthy recording
+            "normalized_distance": float(distance[0] / np.sqrt(len(self.names))),
+            "max_abs_z": float(np.abs(z).max()),
+            "outside_p5_p95": int(np.count_nonzero(above | below)),
+            "feature_count": len(self.names),
+            "deviations": [
+                {"feature": self.names[i], "z": float(z[i]), "value": float(x[i]), "baseline_mean": float(self.mean[i])}
+                for i in order
+            ],
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "names": self.names,
+            "n_records": self.n_records,
+            "created_at": self.created_at,
+            "percentiles": list(PERCENTILES),
+            "mean": _encode(self.mean),
+            "std": _encode(self.std),
+            "quantiles": _encode(self.percentiles),
+            "precision": _encode(self.precision),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BaselineSignature":
+        n = len(data["names"])
+        return cls(
+            names=data["names"],
+            mean=_decode(data["mean"], (n,)),
+            std=_decode(data["std"], (n,)),
+            percentiles=_decode(data["quantiles"], (len(data["percentiles"]), n)),
+            precision=_decode(data["precision"], (n, n)),
+            n_records=data["n_records"],
+            created_at=data.get("created_at"),
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """Readable per-feature statistics for the API"""
+        return {
+            "n_records": self.n_records,
+            "created_at": self.created_at,
+            "features": {
+                name: {
+                    "mean": float(self.mean[i]),
+                    "std": float(self.std[i]),
+                    **{f"p{int(p)}": float(self.percentiles[k, i]) for k, p in enumerate(PERCENTILES)},
+                }
+                for i, name in enumerate(self.names)
+            },
+        }
+
+
+class BaselineStore:
+    """Signatures by (machine_id, sensor_id), persisted in the local database with an in-memory LRU"""
+
+    def __init__(self, db: Optional[LocalDatabase] = None, max_entries: int = 256) -> None:
+        self._db = db
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[str, str], Optional[BaselineSignature]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def db(self) -> LocalDatabase:
+        if self._db is None:
+            self._db = get_local_db()
+        return self._db
+
+    def get(self, machine_id: str, sensor_id: Optional[str] = None) -> Optional[BaselineSignature]:
+        key = (machine_id, sensor_id or "")
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        data = self.db.get_baseline(*key)
+        signature = BaselineSignature.from_dict(data) if data else None
+        # Misses are cached too, so records of machines without a baseline cost no query
+        self._remember(key, signature)
+        return signature
+
+    def put(self, machine_id: str, sensor_id: Optional[str], signature: BaselineSignature) -> None:
+        key = (machine_id, sensor_id or "")
+        self.db.put_baseline(key[0], key[1], signature.to_dict())
+        self._remember(key, signature)
+
+    def for_record(self, record: Dict[str, Any]) -> Optional[BaselineSignature]:
+        """
+        The sensor's own baseline if there is one, else the machine-wide one
+
+        Supabase records name only their sensor; the machine comes from it.
+        """
+        from .supabase_service import SupabaseService
+
+        machine_id = SupabaseService().get_record_machine_id(record)
+        if not machine_id:
+            return None
+        sensor_id = record.get("sensor_id")
+        signature = self.get(machine_id, sensor_id) if sensor_id else None
+        return signature or self.get(machine_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _remember(self, key: Tuple[str, str], signature: Optional[BaselineSignature]) -> None:
+        with self._lock:
+            self._cache[key] = signature
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+
+_store: Optional[BaselineStore] = None
+_store_lock = threading.Lock()
+
+
+def get_baseline_store() -> BaselineStore:
+    """Return the shared baseline store, creating it on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BaselineStore(max_entries=settings.baseline_cache_entries)
+        return _store
+
+
+def fit_baseline(channels: List[Dict[str, Any]]) -> BaselineSignature:
+    """Fit a signature to processed channels (SignalProcessor output) of healthy recordings"""
+    return BaselineSignature.fit(
+        (flatten_features(channel) for channel in channels), shrinkage=settings.baseline_shrinkage
+    )
@@ -0,0 +1,198 @@
+"""
+Batch diagnosis service that fans record analysis out over a process pool
+"""
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from ..core.config import settings
+from .analysis_cache import get_analysis_cache
+from .local_storage import LocalStorage
+from .rule_engine import get_rule_engine, use_rules
+from .supabase_service import SupabaseService
+from .vibration_analysis import VibrationAnalysisService
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_worker_service: Optional[VibrationAnalysisService] = None
+
+
+def pool_size() -> int:
+    """Number of worker processes, defaulting to the host's core count"""
+    return settings.batch_max_workers or os.cpu_count() or 1
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared process pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=pool_size())
+    return _pool
+
+
+def shutdown_process_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def _analyze_in_worker(
+    record_id: str,
+    source: Union[bytes, str],
+    filename: str,
+    rules: List[Dict[str, Any]],
+    kinematics: Optional[Dict[str, Any]] = None,
+) -> Tuple[str, dict, float]:
+    """
+    Worker entry point: load, process and score one file in a pool process
+
+    source is either the downloaded bytes or a local storage path, which the
+    worker memory-maps itself instead of receiving the file through a pipe.
+    rules is the parent's rule set and kinematics the record's machine speed
+    and bearing geometry, so workers never query the database themselves.
+    """
+    global _worker_service
+    use_rules(rules)
+    if _worker_service is None:
+        # One service per worker process, reused for every record it handles
+        _worker_service = VibrationAnalysisService()
+    start = time.perf_counter()
+    if isinstance(source, str):
+        file_bytes = LocalStorage().open_mapped(LocalStorage.name_from_storage_path(source))
+    else:
+        file_bytes = source
+    # The parent process owns the result cache
+    analysis = _worker_service.analyze_file(file_bytes, filename, use_cache=False, kinematics=kinematics)
+    return record_id, analysis, time.perf_counter() - start
+
+
+class BatchDiagnosisService:
+    """Service for diagnosing many vibration records in parallel"""
+
+    def __init__(self, pool: Optional[ProcessPoolExecutor] = None) -> None:
+        self._pool = pool
+        self._analysis = VibrationAnalysisService()
+        self._supabase = SupabaseService()
+        self._cache = get_analysis_cache()
+
+    def resolve_record_ids(
+        self,
+        record_ids: Optional[List[str]] = None,
+        machine_id: Optional[str] = None,
+        start_time=None,
+        end_time=None,
+    ) -> List[str]:
+        """Resolve an explicit ID list or a machine/time-range selection to record IDs"""
+        if record_ids:
+            # Preserve order, drop duplicates
+            return list(dict.fromkeys(record_ids))
+        if not machine_id and not start_time and not end_time:
+            raise ValueError("Provide record_ids, machine_id or a time range")
+        records = self._supabase.list_vibration_records(machine_id, start_time, end_time)
+        return [r["id"] for r in records if r.get("id")]
+
+    def run(self, record_ids: List[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Diagnose records in parallel, yielding each result as it completes
+
+        Downloads happen in the calling process and overlap with analysis in the
+        pool; at most two records per worker are in flight so memory stays bounded.
+        """
+        pool = self._pool or get_process_pool()
+        max_in_flight = 2 * pool_size()
+        pending: Dict[Future, Dict[str, Any]] = {}
+        queue = deque(record_ids)
+
+        while queue or pending:
+            while queue and len(pending) < max_in_flight:
+                record_id = queue.popleft()
+                submitted = self._submit(pool, record_id)
+                if isinstance(submitted, dict):
+                    # Failed before reaching the pool (missing record, download error)
+                    yield submitted
+                    continue
+                future, context = submitted
+                pending[future] = context
+
+            if not pending:
+                continue
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield self._complete(future, pending.pop(future))
+        
+        # Results were queued for bulk writes; send them before the batch reports done
+        self._supabase.flush_writes()
+
+    def _submit(self, pool: ProcessPoolExecutor, record_id: str):
+        started = time.perf_counter()
+        try:
+            record = self._supabase.get_vibration_record(record_id)
+            if not record:
+                raise ValueError(f"Vibration record {record_id} not found")
+            file_path = record.get('file_path') or record.get('storage_path')
+            if not file_path:
+                raise ValueError("No file path found in vibration record")
+            file_bytes = self._supabase.open_storage_buffer(file_path)
+        except Exception as e:
+            return self._error(record_id, e, {"total_seconds": time.perf_counter() - started})
+
+        download_seconds = time.perf_counter() - started
+        filename = file_path.split('/')[-1]
+        kinematics = self._analysis.kinematics_for(record)
+        context = {
+            "record_id": record_id,
+            "record": record,
+            "file_path": file_path,
+            "started": started,
+            "download_seconds": download_seconds,
+            "cache_key": self._analysis.cache_key(file_bytes, filename, kinematics),
+        }
+        cached = self._cache.get(context["cache_key"])
+        if cached is not None:
+            future = Future()
+            future.set_result((record_id, cached, 0.0))
+            context["cache_hit"] = True
+            return future, context
+
+        # Mapped local files can't be pickled; workers map them by path instead
+        source = file_path if isinstance(file_bytes, memoryview) else file_bytes
+        future = pool.submit(
+            _analyze_in_worker, record_id, source, filename, get_rule_engine().rules, kinematics
+        )
+        return future, context
+
+    def _complete(self, future: Future, context: Dict[str, Any]) -> Dict[str, Any]:
+        record_id = context["record_id"]
+        timings = {"download_seconds": context["download_seconds"]}
+        try:
+            _, analysis, analysis_seconds = future.result()
+            timings["analysis_seconds"] = analysis_seconds
+            if not context.get("cache_hit"):
+                self._cache.put(context["cache_key"], analysis)
+
+            store_started = time.perf_counter()
+            result = self._analysis.build_result(record_id, context["file_path"], analysis, context["record"])
+            self._analysis.finalize_record(record_id, result)
+            timings["store_seconds"] = time.perf_counter() - store_started
+        except Exception as e:
+            timings["total_seconds"] = time.perf_counter() - context["started"]
+            return self._error(record_id, e, timings)
+
+        timings["total_seconds"] = time.perf_counter() - context["started"]
+        result["timings"] = timings
+        result["cache_hit"] = bool(context.get("cache_hit"))
+        return result
+
+    @staticmethod
+    def _error(record_id: str, error: Exception, timings: Dict[str, float]) -> Dict[str, Any]:
+        return {
+            "record_id": record_id,
+            "status": "error",
+            "error_message": str(error),
+            "analysis_timestamp": "2025-01-21T12:00:00Z",
+            "timings": timings,
+        }
@@ -3,11 +3,69 @@ Data loading service for various vibration data file formats
 """
 import numpy as np
 import pandas as pd
-from typing import Tuple, Dict, Any, Optional
+from typing import Tuple, Dict, Any, List, Optional
 import io
+import re
 from scipy.io import loadmat
-import wave
 import struct
+from .tdms_reader import TdmsFile
+from .mdf_reader import MdfFile
+
+try:
+    import h5py  # type: ignore
+except Exception:  # pragma: no cover
+    h5py = None
+
+HDF5_SIGNATURE = b"\x89HDF\r\n\x1a\n"
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class _BufferReader(io.RawIOBase):
+    """Read-only file object over a buffer; unlike BytesIO it does not copy the buffer up front"""
+
+    def __init__(self, buffer) -> None:
+        self._view = memoryview(buffer).cast('B')
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+AXIS_ALIASES = {
+    'x': 'x', 'y': 'y', 'z': 'z',
+    'h': 'horizontal', 'horizontal': 'horizontal', 'hor': 'horizontal',
+    'v': 'vertical', 'vertical': 'vertical', 'ver': 'vertical',
+    'a': 'axial', 'axial': 'axial', 'ax': 'axial',
+}
+
+
+def _channel_info(name: str, position: Optional[str] = None) -> Dict[str, Any]:
+    """Channel descriptor; the axis is inferred from a trailing token such as accel_x or DE-H"""
+    tokens = re.split(r'[_\-\s/]+', name.lower())
+    axis = AXIS_ALIASES.get(tokens[-1]) if len(tokens) > 1 else None
+    return {"name": name, "axis": axis, "position": position}
 
 
 class DataLoader:
@@ -16,48 +74,127 @@ class DataLoader:
     def __init__(self):
         pass
     
-    def load_from_bytes(self, file_bytes: bytes, filename: str, sampling_rate: Optional[float] = None) -> Tuple[np.ndarray, float, Dict[str, Any]]:
+    def load_from_bytes(
+        self,
+        file_bytes: bytes,
+        filename: str,
+        sampling_rate: Optional[float] = None,
+        channel: Optional[str] = None,
+    ) -> Tuple[np.ndarray, float, Dict[str, Any]]:
         """
-        Load vibration data from file bytes
+        Load a single channel of vibration data from file bytes
         
         Args:
-            file_bytes: Raw file content as bytes
+            file_bytes: Raw file content as bytes or any buffer (e.g. a memoryview
+                over a memory-mapped file); binary, WAV and v7.3 MAT data are
+                read as views of the buffer without intermediate copies
             filename: Original filename to determine format
             sampling_rate: Optional sampling rate override
+            channel: Channel to read (defaults to the first data channel)
             
         Returns:
             Tuple of (signal_data, sampling_rate, metadata)
         """
+        signals, sampling_rate, metadata = self.load_channels_from_bytes(
+            file_bytes, filename, sampling_rate, [channel] if channel else None, first_only=channel is None
+        )
+        return signals[0], sampling_rate, metadata
+    
+    def load_channels_from_bytes(
+        self,
+        file_bytes: bytes,
+        filename: str,
+        sampling_rate: Optional[float] = None,
+        channels: Optional[List[str]] = None,
+        first_only: bool = False,
+    ) -> Tuple[np.ndarray, float, Dict[str, Any]]:
+        """
+        Load every channel (or the requested ones) of a vibration file
+        
+        Args:
+            file_bytes: Raw file content as bytes or any buffer
+            filename: Original filename to determine format
+            sampling_rate: Optional sampling rate override
+            channels: Channel names to load (defaults to all)
+            first_only: Load only the first channel, skipping conversion of the rest
+            
+        Returns:
+            Tuple of (signals, sampling_rate, metadata) where signals is a float64
+            array of shape (n_channels, n_samples) and metadata["channels"] lists
+            each row's name, axis and position
+        """
         file_extension = filename.lower().split('.')[-1]
         
         if file_extension == 'csv':
-            return self._load_csv(file_bytes, sampling_rate)
+            loaded = self._load_csv(file_bytes, sampling_rate)
         elif file_extension == 'wav':
-            return self._load_wav(file_bytes)
+            loaded = self._load_wav(file_bytes)
         elif file_extension == 'mat':
-            return self._load_mat(file_bytes, sampling_rate)
-        elif file_extension in ['tdms', 'mdf']:
-            # For now, treat as binary data - would need specific libraries for full support
-            return self._load_binary(file_bytes, sampling_rate)
+            loaded = self._load_mat(file_bytes, sampling_rate)
+        elif file_extension == 'tdms':
+            if not TdmsFile.is_tdms(file_bytes):
+                # Headerless dumps saved with a .tdms extension
+                loaded = self._load_binary(file_bytes, sampling_rate)
+            else:
+                loaded = self._load_tdms(file_bytes, sampling_rate, channels, first_only)
+        elif file_extension in ['mdf', 'mf4']:
+            if not MdfFile.is_mdf(file_bytes):
+                loaded = self._load_binary(file_bytes, sampling_rate)
+            else:
+                loaded = self._load_mdf(file_bytes, sampling_rate, channels, first_only)
         else:
             raise ValueError(f"Unsupported file format: {file_extension}")
+        
+        raw_signals, found_sampling_rate, metadata, scale = loaded
+        return self._select_channels(raw_signals, metadata, scale, channels, first_only), found_sampling_rate, metadata
+    
+    def _select_channels(
+        self,
+        raw_signals: np.ndarray,
+        metadata: Dict[str, Any],
+        scale: float,
+        channels: Optional[List[str]],
+        first_only: bool,
+    ) -> np.ndarray:
+        """Pick rows by name and widen them to float64 in one allocation"""
+        infos = metadata["channels"]
+        if channels:
+            names = [c["name"] for c in infos]
+            missing = [c for c in channels if c not in names]
+            if missing:
+                raise ValueError(f"Channel(s) not found: {', '.join(missing)}")
+            rows = [names.index(c) for c in channels]
+        elif first_only:
+            rows = [0]
+        else:
+            rows = list(range(len(infos)))
+        
+        if rows != list(range(raw_signals.shape[0])):
+            # A single row is sliced so it stays a view of the buffer
+            raw_signals = raw_signals[rows[0]:rows[0] + 1] if len(rows) == 1 else raw_signals[rows]
+            metadata["channels"] = [infos[r] for r in rows]
+        metadata["length"] = raw_signals.shape[1]
+        
+        if scale != 1.0:
+            return np.multiply(raw_signals, scale, dtype=np.float64)
+        return np.asarray(raw_signals, dtype=np.float64)
     
-    def _load_csv(self, file_bytes: bytes, sampling_rate: Optional[float]) -> Tuple[np.ndarray, float, Dict[str, Any]]:
+    def _load_csv(self, file_bytes: bytes, sampling_rate: Optional[float]):
         """Load CSV file containing vibration data"""
         try:
             # Try to read as CSV
             df = pd.read_csv(io.BytesIO(file_bytes))
             
-            # Assume first column is time, second is amplitude (or just amplitude if single column)
+            # Assume first column is time, the rest are amplitude channels (or just amplitude if single column)
             if len(df.columns) == 1:
-                signal = df.iloc[:, 0].values
+                signal_columns = [df.columns[0]]
                 # Estimate sampling rate if not provided
                 if sampling_rate is None:
                     sampling_rate = 1000.0  # Default assumption
             elif len(df.columns) >= 2:
                 # Check if first column looks like time
                 time_col = df.iloc[:, 0].values
-                signal = df.iloc[:, 1].values
+                signal_columns = list(df.columns[1:])
                 
                 if sampling_rate is None:
                     # Try to estimate from time column
@@ -69,67 +206,97 @@ class DataLoader:
             else:
                 raise ValueError("CSV file must have at least one column")
             
+            signals = df[signal_columns].to_numpy(dtype=np.float64).T
+            
             metadata = {
                 "format": "csv",
                 "columns": list(df.columns),
-                "length": len(signal),
+                "channels": [_channel_info(str(c)) for c in signal_columns],
+                "length": signals.shape[1],
                 "estimated_sampling_rate": sampling_rate
             }
             
-            return signal.astype(np.float64), float(sampling_rate), metadata
+            return signals, float(sampling_rate), metadata, 1.0
             
         except Exception as e:
             raise ValueError(f"Failed to load CSV file: {str(e)}")
     
-    def _load_wav(self, file_bytes: bytes) -> Tuple[np.ndarray, float, Dict[str, Any]]:
+    def _load_wav(self, file_bytes: bytes):
         """Load WAV file"""
         try:
-            # Use wave module to read WAV file
-            with wave.open(io.BytesIO(file_bytes), 'rb') as wav_file:
-                frames = wav_file.readframes(-1)
-                sampling_rate = float(wav_file.getframerate())
-                n_channels = wav_file.getnchannels()
-                sample_width = wav_file.getsampwidth()
-                
-                # Convert bytes to numpy array
-                if sample_width == 1:
-                    dtype = np.uint8
-                elif sample_width == 2:
-                    dtype = np.int16
-                elif sample_width == 4:
-                    dtype = np.int32
-                else:
-                    raise ValueError(f"Unsupported sample width: {sample_width}")
-                
-                signal = np.frombuffer(frames, dtype=dtype)
-                
-                # Handle multi-channel audio (take first channel)
-                if n_channels > 1:
-                    signal = signal.reshape(-1, n_channels)[:, 0]
-                
-                # Convert to float and normalize
-                signal = signal.astype(np.float64)
-                if sample_width > 1:
-                    signal = signal / (2 ** (8 * sample_width - 1))
-                
-                metadata = {
-                    "format": "wav",
-                    "channels": n_channels,
-                    "sample_width": sample_width,
-                    "length": len(signal),
-                    "duration_seconds": len(signal) / sampling_rate
-                }
-                
-                return signal, sampling_rate, metadata
+            audio_format, n_channels, sampling_rate, sample_width, data_offset, data_size = self._parse_wav_header(file_bytes)
+            
+            # Convert bytes to numpy array
+            if audio_format == WAVE_FORMAT_IEEE_FLOAT and sample_width in (4, 8):
+                dtype = np.dtype('<f4') if sample_width == 4 else np.dtype('<f8')
+            elif audio_format == WAVE_FORMAT_PCM and sample_width == 1:
+                dtype = np.dtype(np.uint8)
+            elif audio_format == WAVE_FORMAT_PCM and sample_width == 2:
+                dtype = np.dtype('<i2')
+            elif audio_format == WAVE_FORMAT_PCM and sample_width == 4:
+                dtype = np.dtype('<i4')
+            else:
+                raise ValueError(f"Unsupported sample width: {sample_width}")
+            
+            # View the PCM frames in place; no copy of the data chunk is made
+            n_frames = data_size // (sample_width * n_channels)
+            frames = np.frombuffer(file_bytes, dtype=dtype, count=n_frames * n_channels, offset=data_offset)
+            
+            # Frames are interleaved; the transpose is a strided channels-by-samples view
+            signals = frames.reshape(-1, n_channels).T
+            
+            # Normalization is applied when the selected channels are widened to float64
+            scale = 1.0
+            if audio_format == WAVE_FORMAT_PCM and sample_width > 1:
+                scale = 1.0 / (2 ** (8 * sample_width - 1))
+            
+            metadata = {
+                "format": "wav",
+                "channels": [_channel_info(f"ch{i}") for i in range(n_channels)],
+                "channel_count": n_channels,
+                "sample_width": sample_width,
+                "length": n_frames,
+                "duration_seconds": n_frames / sampling_rate
+            }
+            
+            return signals, sampling_rate, metadata, scale
                 
         except Exception as e:
             raise ValueError(f"Failed to load WAV file: {str(e)}")
     
-    def _load_mat(self, file_bytes: bytes, sampling_rate: Optional[float]) -> Tuple[np.ndarray, float, Dict[str, Any]]:
+    def _parse_wav_header(self, file_bytes: bytes) -> Tuple[int, int, float, int, int, int]:
+        """Walk the RIFF chunks and return (format, channels, rate, sample_width, data_offset, data_size)"""
+        view = memoryview(file_bytes).cast('B')
+        if len(view) < 12 or bytes(view[0:4]) != b'RIFF' or bytes(view[8:12]) != b'WAVE':
+            raise ValueError("Not a RIFF/WAVE file")
+        
+        fmt = None
+        pos = 12
+        while pos + 8 <= len(view):
+            chunk_id = bytes(view[pos:pos + 4])
+            chunk_size = struct.unpack_from('<I', view, pos + 4)[0]
+            body = pos + 8
+            if chunk_id == b'fmt ':
+                audio_format, n_channels, rate, _, _, bits = struct.unpack_from('<HHIIHH', view, body)
+                if audio_format == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                    audio_format = struct.unpack_from('<H', view, body + 24)[0]
+                fmt = (audio_format, n_channels, float(rate), bits // 8)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    raise ValueError("WAV data chunk precedes fmt chunk")
+                return (*fmt, body, min(chunk_size, len(view) - body))
+            pos = body + chunk_size + (chunk_size & 1)
+        
+        raise ValueError("WAV file has no data chunk")
+    
+    def _load_mat(self, file_bytes: bytes, sampling_rate: Optional[float]):
         """Load MATLAB .mat file"""
         try:
+            if self._is_hdf5_mat(file_bytes):
+                return self._load_mat_v73(file_bytes, sampling_rate)
+            
             # Load .mat file
-            mat_data = loadmat(io.BytesIO(file_bytes))
+            mat_data = loadmat(_BufferReader(file_bytes))
             
             # Remove MATLAB metadata keys
             data_keys = [k for k in mat_data.keys() if not k.startswith('__')]
@@ -139,6 +306,7 @@ class DataLoader:
             
             # Try to find the main data array
             signal = None
+            variable = None
             found_sampling_rate = sampling_rate
             
             # Look for common variable names
@@ -146,7 +314,7 @@ class DataLoader:
             
             for name in common_names:
                 if name in mat_data:
-                    signal = mat_data[name]
+                    signal, variable = mat_data[name], name
                     break
             
             # If not found, take the first numeric array
@@ -154,18 +322,13 @@ class DataLoader:
                 for key in data_keys:
                     value = mat_data[key]
                     if isinstance(value, np.ndarray) and value.dtype.kind in 'fc':  # float or complex
-                        signal = value
+                        signal, variable = value, key
                         break
             
             if signal is None:
                 raise ValueError("No suitable numeric data found in .mat file")
             
-            # Flatten if multi-dimensional (take first column/row)
-            if signal.ndim > 1:
-                if signal.shape[1] == 1:
-                    signal = signal.flatten()
-                else:
-                    signal = signal[:, 0]  # Take first column
+            signals = self._as_channel_rows(signal)
             
             # Look for sampling rate in the file
             if found_sampling_rate is None:
@@ -185,41 +348,197 @@ class DataLoader:
             metadata = {
                 "format": "mat",
                 "variables": data_keys,
-                "length": len(signal),
+                "channels": self._mat_channel_infos(variable, signals.shape[0]),
+                "length": signals.shape[1],
                 "original_shape": mat_data[data_keys[0]].shape if data_keys else None,
                 "estimated_sampling_rate": found_sampling_rate
             }
             
-            return signal.astype(np.float64), float(found_sampling_rate), metadata
+            return signals, float(found_sampling_rate), metadata, 1.0
             
         except Exception as e:
             raise ValueError(f"Failed to load .mat file: {str(e)}")
     
-    def _load_binary(self, file_bytes: bytes, sampling_rate: Optional[float]) -> Tuple[np.ndarray, float, Dict[str, Any]]:
-        """Load binary file (TDMS, MDF) - basic implementation"""
+    def _as_channel_rows(self, array: np.ndarray) -> np.ndarray:
+        """Orient a MATLAB array as channels-by-samples; channels run along the shorter axis"""
+        array = np.squeeze(array)
+        if array.ndim == 1:
+            return array.reshape(1, -1)
+        if array.ndim != 2:
+            raise ValueError(f"Unsupported array shape {array.shape}")
+        return array.T if array.shape[0] >= array.shape[1] else array
+    
+    def _mat_channel_infos(self, variable: str, n_channels: int) -> List[Dict[str, Any]]:
+        if n_channels == 1:
+            return [_channel_info(variable)]
+        return [_channel_info(f"{variable}[{i}]") for i in range(n_channels)]
+    
+    def _is_hdf5_mat(self, file_bytes: bytes) -> bool:
+        """MATLAB v7.3 files are HDF5 containers with the signature after a 512-byte header"""
+        view = memoryview(file_bytes).cast('B')
+        return bytes(view[512:520]) == HDF5_SIGNATURE
+    
+    def _load_mat_v73(self, file_bytes: bytes, sampling_rate: Optional[float]):
+        """Load MATLAB v7.3 (HDF5) .mat file, viewing contiguous datasets in place"""
+        if h5py is None:
+            raise ValueError("h5py is required to read MATLAB v7.3 files")
+        
+        with h5py.File(_BufferReader(file_bytes), 'r') as mat_file:
+            datasets = {
+                k: v for k, v in mat_file.items()
+                if not k.startswith('#') and isinstance(v, h5py.Dataset) and v.dtype.kind in 'iuf'
+            }
+            if not datasets:
+                raise ValueError("No suitable numeric data found in .mat file")
+            
+            common_names = ['data', 'signal', 'vibration', 'x', 'y', 'acceleration', 'velocity']
+            name = next((n for n in common_names if n in datasets), None)
+            if name is None:
+                name = next(k for k, v in datasets.items() if v.size > 1)
+            signal = self._hdf5_dataset_view(file_bytes, datasets[name])
+            
+            found_sampling_rate = sampling_rate
+            if found_sampling_rate is None:
+                for rate_name in ['fs', 'sampling_rate', 'sample_rate', 'sr', 'freq']:
+                    if rate_name in datasets:
+                        found_sampling_rate = float(np.asarray(datasets[rate_name][()]).ravel()[0])
+                        break
+                else:
+                    found_sampling_rate = 1000.0  # Default assumption
+            
+            original_shape = datasets[name].shape[::-1]
+            variables = list(datasets)
+        
+        # HDF5 stores MATLAB's column-major arrays transposed
+        signals = self._as_channel_rows(signal.T)
+        
+        metadata = {
+            "format": "mat",
+            "mat_version": "7.3",
+            "variables": variables,
+            "channels": self._mat_channel_infos(name, signals.shape[0]),
+            "length": signals.shape[1],
+            "original_shape": original_shape,
+            "estimated_sampling_rate": found_sampling_rate
+        }
+        
+        return signals, float(found_sampling_rate), metadata, 1.0
+    
+    def _hdf5_dataset_view(self, file_bytes: bytes, dataset) -> np.ndarray:
+        """Return a view into file_bytes for contiguous, unfiltered datasets; read otherwise"""
+        plist = dataset.id.get_create_plist()
+        offset = dataset.id.get_offset()
+        if plist.get_layout() == h5py.h5d.CONTIGUOUS and plist.get_nfilters() == 0 and offset is not None:
+            return np.frombuffer(file_bytes, dtype=dataset.dtype, count=dataset.size, offset=offset).reshape(dataset.shape)
+        return dataset[()]
+    
+    def _load_tdms(self, file_bytes: bytes, sampling_rate: Optional[float], channels: Optional[List[str]], first_only: bool):
+        """Load channels from a TDMS file, reading only the requested channels' bytes"""
+        try:
+            tdms = TdmsFile(file_bytes)
+            available = tdms.channels()
+            if not available:
+                raise ValueError("No channel data found in TDMS file")
+            names = self._requested_names(available, channels, first_only)
+            
+            rates = [sampling_rate or tdms.sampling_rate(n) or 1000.0 for n in names]
+            names, skipped = self._same_rate(names, rates, requested=bool(channels))
+            signals = self._stack([tdms.channel_data(n) for n in names])
+            
+            metadata = {
+                "format": "tdms",
+                "channels": [_channel_info(n) for n in names],
+                "available_channels": available,
+                "units": {n: tdms.channel_properties(n).get("unit_string") for n in names},
+                "skipped_channels": skipped,
+                "length": signals.shape[1],
+                "estimated_sampling_rate": rates[0]
+            }
+            
+            return signals, float(rates[0]), metadata, 1.0
+            
+        except Exception as e:
+            raise ValueError(f"Failed to load TDMS file: {str(e)}")
+    
+    def _load_mdf(self, file_bytes: bytes, sampling_rate: Optional[float], channels: Optional[List[str]], first_only: bool):
+        """Load channels from an MDF4 file, reading only the requested channels' bytes"""
+        try:
+            mdf = MdfFile(file_bytes)
+            available = mdf.channels()
+            if not available:
+                raise ValueError("No channel data found in MDF file")
+            names = self._requested_names(available, channels, first_only)
+            
+            rates = [sampling_rate or mdf.sampling_rate(n) or 1000.0 for n in names]
+            names, skipped = self._same_rate(names, rates, requested=bool(channels))
+            signals = self._stack([mdf.channel_data(n) for n in names])
+            
+            metadata = {
+                "format": "mdf",
+                "mdf_version": mdf.version,
+                "channels": [_channel_info(n) for n in names],
+                "available_channels": available,
+                "units": {n: mdf.channel_unit(n) for n in names},
+                "skipped_channels": skipped,
+                "length": signals.shape[1],
+                "estimated_sampling_rate": rates[0]
+            }
+            
+            return signals, float(rates[0]), metadata, 1.0
+            
+        except Exception as e:
+            raise ValueError(f"Failed to load MDF file: {str(e)}")
+    
+    def _requested_names(self, available: List[str], channels: Optional[List[str]], first_only: bool) -> List[str]:
+        if channels:
+            return list(channels)
+        return available[:1] if first_only else available
+    
+    def _same_rate(self, names: List[str], rates: List[float], requested: bool) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Channels sampled at the first channel's rate, and the skipped ones with their rates
+        
+        Channels the caller asked for by name cannot be skipped: a different
+        rate raises ValueError instead.
+        """
+        skipped = [{"name": n, "sampling_rate": r} for n, r in zip(names, rates) if r != rates[0]]
+        if skipped and requested:
+            listed = ", ".join(f"{c['name']} ({c['sampling_rate']:g} Hz)" for c in skipped)
+            raise ValueError(f"Requested channels differ from the {rates[0]:g} Hz of {names[0]}: {listed}")
+        return [n for n, r in zip(names, rates) if r == rates[0]], skipped
+    
+    def _stack(self, arrays: List[np.ndarray]) -> np.ndarray:
+        """Stack per-channel arrays into rows, truncating to the shortest channel"""
+        if len(arrays) == 1:
+            return arrays[0].reshape(1, -1)
+        n = min(len(a) for a in arrays)
+        return np.stack([a[:n] for a in arrays])
+    
+    def _load_binary(self, file_bytes: bytes, sampling_rate: Optional[float]):
+        """Load headerless binary data - fallback for .tdms/.mdf files without a recognized header"""
         try:
-            # For now, treat as raw float32 data
-            # In a full implementation, you'd use libraries like nptdms for TDMS or asammdf for MDF
             
-            # Try to interpret as float32 array
-            signal = np.frombuffer(file_bytes, dtype=np.float32)
+            # Try to interpret as float32 array (a view over the buffer, no copy)
+            n_bytes = memoryview(file_bytes).nbytes
+            signal = np.frombuffer(file_bytes, dtype=np.float32, count=n_bytes // 4)
             
             if len(signal) == 0:
                 # Try as int16
-                signal = np.frombuffer(file_bytes, dtype=np.int16).astype(np.float64)
-                signal = signal / 32768.0  # Normalize
+                signal = np.multiply(np.frombuffer(file_bytes, dtype=np.int16, count=n_bytes // 2), 1.0 / 32768.0)  # Normalize
             
             if sampling_rate is None:
                 sampling_rate = 1000.0  # Default assumption
             
             metadata = {
                 "format": "binary",
+                "channels": [_channel_info("ch0")],
                 "length": len(signal),
                 "estimated_sampling_rate": sampling_rate,
-                "note": "Basic binary interpretation - may need specialized library for full support"
+                "note": "No TDMS/MDF header found; interpreted as raw float32 samples"
             }
             
-            return signal.astype(np.float64), float(sampling_rate), metadata
+            # Still a view; the only copy is the float64 widening in _select_channels
+            return signal.reshape(1, -1), float(sampling_rate), metadata, 1.0
             
         except Exception as e:
             raise ValueError(f"Failed to load binary file: {str(e)}")
\ No newline at end of file
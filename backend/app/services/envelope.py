@@ -0,0 +1,267 @@
+"""
+Envelope (demodulation) analysis for rolling-element bearing defects
+
+Impacts from a damaged race or ball excite a structural resonance well above
+the running speed; the repetition rate of those impacts shows up in the
+spectrum of the signal's envelope, not in the raw spectrum. EnvelopeAnalyzer
+band-passes every channel around a resonance, takes the Hilbert envelope and
+its spectrum, then looks for the bearing defect frequencies (BPFO, BPFI, BSF,
+FTF) and their harmonics.
+
+The band is picked per record from a fast kurtogram (see kurtogram.py).
+Kurtogram, band-pass and Hilbert transform share one real FFT: the band's
+bins are shifted down to DC and inverse transformed at a length that just
+covers the band, which yields the (decimated) analytic signal directly. All tolerance
+windows of all defect harmonics are then searched in one gather.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import fft as sp_fft
+
+from .kurtogram import Kurtogram, fast_kurtogram
+from .spectral import fast_length, frequency_axis
+
+
+DEFECTS = ("bpfo", "bpfi", "bsf", "ftf")
+
+
+def bearing_frequencies(shaft_hz: float, bearing: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Defect frequencies in Hz of a bearing whose inner ring turns at shaft_hz
+
+    bearing holds n_balls, ball_diameter and pitch_diameter (any common unit)
+    and optionally contact_angle in degrees.
+    """
+    n_balls = float(bearing["n_balls"])
+    cos_angle = float(np.cos(np.radians(float(bearing.get("contact_angle") or 0.0))))
+    ratio = float(bearing["ball_diameter"]) / float(bearing["pitch_diameter"]) * cos_angle
+    return {
+        "bpfo": n_balls / 2.0 * shaft_hz * (1.0 - ratio),
+        "bpfi": n_balls / 2.0 * shaft_hz * (1.0 + ratio),
+        "bsf": shaft_hz * cos_angle / (2.0 * ratio) * (1.0 - ratio * ratio),
+        "ftf": shaft_hz / 2.0 * (1.0 - ratio),
+    }
+
+
+def machine_kinematics(machine: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Running speed, bearing geometry and type of a machine record
+
+    None when the machine has neither a nominal speed nor a type; rpm is
+    None when only the type is known.
+    """
+    if not machine or not (machine.get("rpm_nominal") or machine.get("type")):
+        return None
+    bearing = machine.get("bearing")
+    return {
+        "rpm": float(machine["rpm_nominal"]) if machine.get("rpm_nominal") else None,
+        "bearing": dict(bearing) if bearing else None,
+        "type": machine.get("type"),
+    }
+
+
+class EnvelopeAnalyzer:
+    """Envelope spectra and bearing defect matching for channels-by-samples signals"""
+
+    def __init__(
+        self,
+        band: Optional[Tuple[float, float]] = None,
+        harmonics: int = 3,
+        tolerance: float = 0.02,
+        detection_snr_db: float = 6.0,
+        max_frequency: float = 500.0,
+        plot_points: int = 500,
+        kurtogram_levels: int = 6,
+    ) -> None:
+        """
+        Args:
+            band: Demodulation band in Hz; None picks the most impulsive band
+                of each record from its kurtogram
+            kurtogram_levels: Depth of the kurtogram's band tree
+            harmonics: Harmonics of each defect frequency to search
+            tolerance: Relative half-width of the search window around each target
+            detection_snr_db: Peak-over-floor ratio for a harmonic to count as present
+            max_frequency, plot_points: Range and size of the returned envelope spectrum
+        """
+        self.band = tuple(band) if band else None
+        self.harmonics = harmonics
+        self.tolerance = tolerance
+        self.detection_snr_db = detection_snr_db
+        self.max_frequency = max_frequency
+        self.plot_points = plot_points
+        self.kurtogram_levels = kurtogram_levels
+
+    def config(self) -> Dict[str, Any]:
+        return {
+            "band": list(self.band) if self.band else None,
+            "harmonics": self.harmonics,
+            "tolerance": self.tolerance,
+            "detection_snr_db": self.detection_snr_db,
+            "max_frequency": self.max_frequency,
+            "plot_points": self.plot_points,
+            "kurtogram_levels": self.kurtogram_levels,
+        }
+
+    def transform(self, signals: np.ndarray) -> Tuple[np.ndarray, int, int]:
+        """(rfft of the zero-mean rows, n_samples, n_fft), shared by the kurtogram and demodulation"""
+        rows = np.atleast_2d(signals)
+        n_samples = rows.shape[-1]
+        n_fft = fast_length(n_samples)
+        return sp_fft.rfft(rows - rows.mean(axis=-1, keepdims=True), n=n_fft, axis=-1), n_samples, n_fft
+
+    def kurtogram(self, spec: np.ndarray, n_samples: int, n_fft: int, sampling_rate: float) -> Kurtogram:
+        return fast_kurtogram(spec, n_samples, n_fft, sampling_rate, max_level=self.kurtogram_levels)
+
+    def envelope_spectrum(
+        self, signals: np.ndarray, sampling_rate: float, band: Optional[Tuple[float, float]] = None
+    ) -> Tuple[np.ndarray, np.ndarray, Tuple[float, float]]:
+        """
+        Envelope amplitude spectrum of every row of signals
+
+        Returns (frequencies, magnitude of shape (channels, bins), band). The
+        DC bin is left out; magnitudes are peak amplitudes of the envelope.
+        Without a band, the kurtogram's most impulsive band is used.
+        """
+        spec, n_samples, n_fft = self.transform(signals)
+        if band is None:
+            band = self.band or self.kurtogram(spec, n_samples, n_fft, sampling_rate).best_band()[:2]
+        return self.demodulate(spec, n_samples, n_fft, sampling_rate, band)
+
+    def demodulate(
+        self, spec: np.ndarray, n_samples: int, n_fft: int, sampling_rate: float, band: Tuple[float, float]
+    ) -> Tuple[np.ndarray, np.ndarray, Tuple[float, float]]:
+        """Envelope spectrum of one band of a precomputed rfft (see envelope_spectrum)"""
+        freqs = frequency_axis(n_fft, float(sampling_rate))
+        lo = max(int(np.searchsorted(freqs, band[0])), 1)
+        hi = max(int(np.searchsorted(freqs, min(band[1], 0.5 * sampling_rate), side="right")), lo + 1)
+        n_band = hi - lo
+
+        # Analytic signal of the band, shifted to baseband and decimated: the
+        # envelope only needs |z|, which the frequency shift leaves unchanged
+        m = sp_fft.next_fast_len(2 * n_band)
+        shifted = np.zeros((spec.shape[0], m), dtype=np.complex128)
+        shifted[:, :n_band] = spec[:, lo:hi]
+        envelope = np.abs(sp_fft.ifft(shifted, axis=-1, overwrite_x=True))
+        envelope *= 2.0 * m / n_fft
+
+        # Only the first n_samples * m / n_fft envelope samples cover real data
+        n_env = max(int(round(n_samples * m / n_fft)), 2)
+        envelope = envelope[:, :n_env]
+        env_rate = sampling_rate * m / n_fft
+        env_fft = fast_length(n_env)
+        env_spec = sp_fft.rfft(envelope - envelope.mean(axis=-1, keepdims=True), n=env_fft, axis=-1)[:, 1:]
+        magnitude = np.abs(env_spec) * (2.0 / n_env)
+        return frequency_axis(env_fft, float(env_rate))[1:], magnitude, (float(freqs[lo]), float(freqs[hi - 1]))
+
+    def match(
+        self, frequencies: np.ndarray, magnitude: np.ndarray, targets: Dict[str, float], usable: float
+    ) -> List[Dict[str, Dict[str, Any]]]:
+        """
+        Strongest envelope peak near each harmonic of each target, for every channel
+
+        Targets whose window reaches past usable Hz are skipped. Each peak is
+        compared with the median magnitude of the surrounding bins, so the
+        rising low-frequency floor of envelope spectra is not mistaken for a
+        defect line.
+        """
+        names = list(targets)
+        if not names or len(frequencies) < 2:
+            return [{} for _ in range(magnitude.shape[0])]
+        orders = np.arange(1, self.harmonics + 1)
+        centers = np.array([targets[n] for n in names])[:, None] * orders  # (defects, harmonics)
+        resolution = frequencies[1] - frequencies[0]
+        half_width = np.maximum(centers * self.tolerance, resolution)
+        valid = (centers > 0) & (centers + half_width <= min(usable, frequencies[-1]))
+
+        starts = np.searchsorted(frequencies, centers - half_width)
+        stops = np.maximum(np.searchsorted(frequencies, centers + half_width, side="right"), starts + 1)
+        width = int(np.max(stops - starts))
+        gather = starts[..., None] + np.arange(width)  # (defects, harmonics, width)
+        inside = gather < stops[..., None]
+        gather = np.minimum(gather, len(frequencies) - 1)
+        windows = np.where(inside, magnitude[:, gather], -np.inf)  # (channels, defects, harmonics, width)
+        offset = np.argmax(windows, axis=-1)
+        peak = np.take_along_axis(windows, offset[..., None], axis=-1)[..., 0]
+        peak_index = np.take_along_axis(np.broadcast_to(gather, windows.shape), offset[..., None], axis=-1)[..., 0]
+
+        # Local floor: median of the neighbourhood, about four windows either side
+        span = max(4 * width, 10)
+        around = np.clip(((starts + stops) // 2)[..., None] + np.arange(-span, span + 1), 0, len(frequencies) - 1)
+        floor = np.median(magnitude[:, around], axis=-1)
+        snr_db = 20.0 * np.log10(np.maximum(peak, 1e-300) / np.maximum(floor, 1e-300))
+        snr_db = np.where(valid, snr_db, np.nan)
+        detected = valid & (snr_db >= self.detection_snr_db)
+
+        results = []
+        for c in range(magnitude.shape[0]):
+            channel = {}
+            for d, name in enumerate(names):
+                if not valid[d, 0]:
+                    continue
+                channel[name] = {
+                    "frequency": float(centers[d, 0]),
+                    "peak_frequency": float(frequencies[peak_index[c, d, 0]]),
+                    "amplitude": float(peak[c, d, 0]),
+                    "snr_db": float(snr_db[c, d, 0]),
+                    "harmonics_detected": int(np.sum(detected[c, d])),
+                    "harmonic_snr_db": [float(v) for v in snr_db[c, d, valid[d]]],
+                }
+            results.append(channel)
+        return results
+
+    def analyze(
+        self, signals: np.ndarray, sampling_rate: float, kinematics: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Envelope section for every row of signals
+
+        kinematics comes from machine_kinematics; without a bearing geometry the
+        envelope spectrum is still computed but no defect frequencies are matched.
+        The demodulation band is the kurtogram's most impulsive band unless one
+        is configured. The first channel's section also carries the envelope
+        spectrum for plotting and the record's kurtogram.
+        """
+        rpm = (kinematics or {}).get("rpm")
+        shaft_hz = rpm / 60.0 if rpm else None
+        targets = {}
+        if shaft_hz and kinematics.get("bearing"):
+            targets = bearing_frequencies(shaft_hz, kinematics["bearing"])
+
+        spec, n_samples, n_fft = self.transform(signals)
+        kurtogram = None
+        if self.band:
+            band = self.band
+        else:
+            # Wide enough for the sidebands of at least the slowest impact rate;
+            # faster defects that do not fit are skipped by match()
+            impacts = [targets[name] for name in ("bpfo", "bpfi", "bsf") if name in targets]
+            min_width = 2.0 * min(impacts) * (1.0 + self.tolerance) if impacts else 0.0
+            kurtogram = self.kurtogram(spec, n_samples, n_fft, sampling_rate)
+            selected = kurtogram.best_band(min_width)
+            band = selected[:2]
+        frequencies, magnitude, band = self.demodulate(spec, n_samples, n_fft, sampling_rate, band)
+        # Defect sidebands must both fit in the band for the envelope to see them
+        matches = self.match(frequencies, magnitude, targets, 0.5 * (band[1] - band[0]))
+
+        sections = [
+            {
+                "band": list(band),
+                "rms": float(np.sqrt(np.sum(row * row) / 2.0)),
+                "shaft_frequency": shaft_hz,
+                "defect_frequencies": {name: float(f) for name, f in targets.items()},
+                "defects": channel_matches,
+            }
+            for row, channel_matches in zip(magnitude, matches)
+        ]
+
+        n_bins = int(np.searchsorted(frequencies, self.max_frequency, side="right"))
+        step = max(1, -(-n_bins // self.plot_points))
+        starts = np.arange(0, n_bins, step)
+        if kurtogram is not None:
+            sections[0]["kurtogram"] = kurtogram.to_dict(selected)
+        sections[0]["spectrum"] = {
+            "frequency": frequencies[starts].tolist(),
+            "magnitude": (np.maximum.reduceat(magnitude[0, :n_bins], starts) if n_bins else starts[:0]).tolist(),
+        }
+        return sections
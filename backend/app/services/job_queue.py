@@ -0,0 +1,130 @@
+"""
+In-process job queue for running diagnoses in the background
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from ..core.config import settings
+from .vibration_analysis import VibrationAnalysisService
+
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class DiagnosisJobQueue:
+    """Runs VibrationAnalysisService.process_record on a worker pool and tracks job status"""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_finished_jobs: Optional[int] = None,
+        runner: Optional[Callable[[str], dict]] = None,
+    ) -> None:
+        self._max_workers = max_workers or settings.job_max_workers or os.cpu_count() or 1
+        self._max_finished_jobs = max_finished_jobs or settings.job_retention
+        self._runner = runner or (lambda record_id: VibrationAnalysisService().process_record(record_id))
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="diagnosis-job")
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, record_id: str) -> Dict[str, Any]:
+        """Queue a diagnosis and return the job snapshot immediately"""
+        job_id = str(uuid.uuid4())
+        job = {
+            "id": job_id,
+            "record_id": record_id,
+            "status": QUEUED,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._evict_finished()
+        self._executor.submit(self._run, job_id)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return self._snapshot(job)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+        return {
+            **counts,
+            "queue_depth": counts[QUEUED],
+            "workers": self._max_workers,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job_id: str) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["status"] = RUNNING
+            job["started_at"] = time.time()
+            record_id = job["record_id"]
+
+        try:
+            result = self._runner(record_id)
+            status = FAILED if result.get("status") == "error" else DONE
+            error = result.get("error_message") if status == FAILED else None
+        except Exception as e:
+            result, status, error = None, FAILED, str(e)
+
+        with self._lock:
+            job["status"] = status
+            job["result"] = result
+            job["error"] = error
+            job["finished_at"] = time.time()
+
+    def _snapshot(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        snapshot = dict(job)
+        end = job["finished_at"] or time.time()
+        snapshot["queued_seconds"] = (job["started_at"] or end) - job["submitted_at"]
+        snapshot["elapsed_seconds"] = end - job["started_at"] if job["started_at"] else 0.0
+        snapshot["queue_depth"] = sum(1 for j in self._jobs.values() if j["status"] == QUEUED)
+        return snapshot
+
+    def _evict_finished(self) -> None:
+        # Keep only the most recent finished jobs; queued/running jobs are never dropped
+        finished = [jid for jid, j in self._jobs.items() if j["status"] in (DONE, FAILED)]
+        for jid in finished[: max(0, len(finished) - self._max_finished_jobs)]:
+            del self._jobs[jid]
+
+
+_queue: Optional[DiagnosisJobQueue] = None
+
+
+def get_job_queue() -> DiagnosisJobQueue:
+    """Return the shared job queue, creating it on first use"""
+    global _queue
+    if _queue is None:
+        _queue = DiagnosisJobQueue()
+    return _queue
+
+
+def shutdown_job_queue() -> None:
+    global _queue
+    if _queue is not None:
+        _queue.shutdown()
+        _queue = None
@@ -0,0 +1,123 @@
+"""
+Fast kurtogram: spectral kurtosis over a dyadic / 1/3-dyadic band tree
+
+The kurtogram (Antoni, 2007) rates every band of a binary tree of band
+splits by the kurtosis of the band's complex envelope; the most impulsive
+band is where bearing impacts ring. Level k of the tree splits 0..fs/2 into
+2**k equal bands and the intermediate level k + 0.6 into 3 * 2**(k - 1).
+
+The tree is built as a multirate filter bank in the frequency domain from
+the signal's one real FFT: the bins of every band of a level are one
+reshape of that spectrum, and one batched inverse FFT of length 2N / bands
+yields all their decimated complex envelopes. Twice the band width is the
+rate the squared envelope needs, so the kurtosis equals the full-rate
+value (benchmarks/kurtogram.py checks this). Each level therefore costs
+O(N log N) and the level count is fixed by max_level.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import fft as sp_fft
+
+
+def band_counts(max_level: int) -> List[int]:
+    """Bands per level: 1, 2, 3, 4, 6, 8, 12, ... up to 3 * 2**(max_level - 1)"""
+    counts = [1]
+    for k in range(1, max_level + 1):
+        counts += [2 ** k, 3 * 2 ** (k - 1)] if k > 1 else [2, 3]
+    return sorted(counts)
+
+
+class Kurtogram:
+    """Spectral kurtosis of every band of every level, for one or more channels"""
+
+    __slots__ = ("counts", "kurtosis", "sampling_rate")
+
+    def __init__(self, counts: List[int], kurtosis: List[np.ndarray], sampling_rate: float) -> None:
+        # kurtosis[i] has shape (channels, counts[i])
+        self.counts = counts
+        self.kurtosis = kurtosis
+        self.sampling_rate = sampling_rate
+
+    @property
+    def levels(self) -> List[float]:
+        return [round(float(np.log2(n)), 1) for n in self.counts]
+
+    def matrix(self) -> np.ndarray:
+        """
+        (levels, columns) map of the largest kurtosis across channels
+
+        Every band repeats over the columns it covers, as kurtograms are
+        usually drawn; the column count is a multiple of every level's bands.
+        """
+        columns = int(np.lcm.reduce(self.counts))
+        return np.stack([np.repeat(k.max(axis=0), columns // n) for n, k in zip(self.counts, self.kurtosis)])
+
+    def best_band(self, min_width: float = 0.0) -> Tuple[float, float, float, float]:
+        """
+        (low Hz, high Hz, level, kurtosis) of the most impulsive band at least min_width wide
+
+        Bands are rated by their largest kurtosis across channels. The full
+        band (level 0) is not a band-pass at all, so it is only returned when
+        no finer level is wide enough.
+        """
+        nyquist = 0.5 * self.sampling_rate
+        best = (0.0, nyquist, 0.0, float(self.kurtosis[0].max()))
+        found = False
+        for n, k in zip(self.counts[1:], self.kurtosis[1:]):
+            width = nyquist / n
+            if width < min_width:
+                continue
+            peak = k.max(axis=0)
+            i = int(np.argmax(peak))
+            if not found or peak[i] > best[3]:
+                best = (i * width, (i + 1) * width, round(float(np.log2(n)), 1), float(peak[i]))
+                found = True
+        return best
+
+    def to_dict(self, selected: Optional[Tuple[float, float, float, float]] = None) -> Dict[str, Any]:
+        result = {
+            "levels": self.levels,
+            "band_counts": list(self.counts),
+            "max_frequency": 0.5 * self.sampling_rate,
+            "kurtosis": self.matrix().tolist(),
+        }
+        if selected is not None:
+            low, high, level, kurtosis = selected
+            result["selected"] = {"low": low, "high": high, "level": level, "kurtosis": kurtosis}
+        return result
+
+
+def fast_kurtogram(
+    spectrum: np.ndarray,
+    n_samples: int,
+    n_fft: int,
+    sampling_rate: float,
+    max_level: int = 6,
+    min_samples: int = 32,
+) -> Kurtogram:
+    """
+    Kurtogram from the rfft (channels, n_fft // 2 + 1) of zero-mean signals
+
+    Levels whose bands would have fewer than min_samples envelope samples are
+    left out, since kurtosis estimates from so few samples are noise.
+    """
+    rows = np.atleast_2d(spectrum)
+    n_bins = n_fft // 2
+    counts = [n for n in band_counts(max_level) if (n_bins // n) * n_samples // n_fft >= min_samples] or [1]
+
+    kurtosis = []
+    for n in counts:
+        width = n_bins // n
+        # Complex envelopes of all bands of the level in one batched inverse FFT,
+        # zero-padded to twice the band width
+        bands = rows[:, : n * width].reshape(rows.shape[0], n, width)
+        envelope = sp_fft.ifft(bands, n=2 * width, axis=-1)
+        # Drop the samples that only cover the FFT's zero padding
+        keep = max(-(-2 * width * n_samples // n_fft), 2)
+        power = envelope.real[..., :keep] ** 2 + envelope.imag[..., :keep] ** 2
+        mean_power = power.mean(axis=-1)
+        # Kurtosis of a complex envelope; Gaussian noise scores 0
+        k = (power * power).mean(axis=-1) / np.where(mean_power > 0, mean_power * mean_power, 1.0) - 2.0
+        kurtosis.append(np.where(mean_power > 0, k, 0.0))
+    return Kurtogram(counts, kurtosis, float(sampling_rate))
@@ -0,0 +1,236 @@
+"""
+Live monitoring of continuous sensor feeds
+
+Each sensor gets a LiveSensorStream that conditions incoming sample blocks
+with a stateful causal filter, keeps recent history in a SignalRingBuffer
+and emits rolling features every hop. Time-domain statistics are
+kept per hop in mergeable RunningMoments, so a window costs a merge of
+window/hop partial results rather than a rescan; band energies and peaks
+come from one real FFT of a zero-copy view of the latest window. The fault
+rules run on every window in memory, with no file written or read. Streams
+live in a RingBufferRegistry, so total buffer memory stays within
+settings.stream_max_bytes however many sensors report.
+"""
+import math
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..core.config import settings
+from .ring_buffer import RingBufferRegistry, SignalRingBuffer
+from .signal_processor import SignalProcessor
+from .spectral import get_spectral_engine
+from .stats_kernel import RunningMoments
+from .vibration_analysis import VibrationAnalysisService
+
+
+# Wire format of raw sample blocks: little-endian float32, channels interleaved
+SAMPLE_DTYPE = np.dtype("<f4")
+
+
+class LiveSensorStream:
+    """Rolling window analysis for one sensor; push() blocks as they arrive"""
+
+    def __init__(
+        self,
+        sensor_id: str,
+        sampling_rate: float,
+        n_channels: int = 1,
+        window_size: Optional[int] = None,
+        hop_size: Optional[int] = None,
+        processor: Optional[SignalProcessor] = None,
+        analysis: Optional[VibrationAnalysisService] = None,
+    ) -> None:
+        window_size = window_size or settings.stream_window_size
+        hop_size = hop_size or settings.stream_hop_size or window_size
+        if sampling_rate <= 0:
+            raise ValueError("sampling_rate must be positive")
+        if n_channels < 1:
+            raise ValueError("n_channels must be at least 1")
+        if hop_size > window_size or window_size % hop_size:
+            raise ValueError("hop_size must divide window_size")
+
+        self.sensor_id = sensor_id
+        self.sampling_rate = float(sampling_rate)
+        self.n_channels = n_channels
+        self.window_size = window_size
+        self.hop_size = hop_size
+        self.samples_seen = 0
+        self.windows_emitted = 0
+        self.latest: Optional[Dict[str, Any]] = None
+
+        self._processor = processor or SignalProcessor()
+        self._analysis = analysis or VibrationAnalysisService()
+        self._filter = self._processor.filter_bank(self.sampling_rate).stream()
+        capacity = max(window_size, math.ceil(settings.stream_history_seconds * self.sampling_rate))
+        self.buffer = SignalRingBuffer(n_channels, capacity, self.sampling_rate, settings.stream_buffer_dtype)
+        self._hops: "deque[RunningMoments]" = deque(maxlen=window_size // hop_size)
+        self._current = RunningMoments(n_channels)
+        self._pending = b""
+        self._lock = threading.Lock()
+
+    def push_bytes(self, data: bytes) -> List[Dict[str, Any]]:
+        """Decode raw interleaved samples; a partial frame is held until the next call"""
+        with self._lock:
+            data = self._pending + data
+            frame = SAMPLE_DTYPE.itemsize * self.n_channels
+            usable = len(data) - len(data) % frame
+            self._pending = data[usable:]
+            samples = np.frombuffer(data, dtype=SAMPLE_DTYPE, count=usable // SAMPLE_DTYPE.itemsize)
+            return self._push(samples.reshape(-1, self.n_channels).T)
+
+    def push(self, block: np.ndarray) -> List[Dict[str, Any]]:
+        """Feed a 1-D or (channels, samples) block; returns one result per completed window"""
+        with self._lock:
+            return self._push(np.atleast_2d(block))
+
+    @property
+    def nbytes(self) -> int:
+        return self.buffer.nbytes
+
+    @property
+    def last_update(self) -> Optional[float]:
+        return self.buffer.last_update
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "sensor_id": self.sensor_id,
+            "sampling_rate": self.sampling_rate,
+            "channels": self.n_channels,
+            "window_size": self.window_size,
+            "hop_size": self.hop_size,
+            "buffer_seconds": self.buffer.capacity / self.sampling_rate,
+            "buffer_bytes": self.nbytes,
+            "samples_seen": self.samples_seen,
+            "windows_emitted": self.windows_emitted,
+            "last_update": self.last_update,
+            "latest": self.latest,
+        }
+
+    def _push(self, block: np.ndarray) -> List[Dict[str, Any]]:
+        if block.shape[0] != self.n_channels:
+            raise ValueError(f"Expected {self.n_channels} channels, got {block.shape[0]}")
+        results = []
+        if block.shape[1] == 0:
+            return results
+
+        # Filter state is carried across blocks, so block boundaries do not matter
+        conditioned = self._filter.process(block.astype(float, copy=False))
+
+        start = 0
+        while start < conditioned.shape[1]:
+            room = self.hop_size - self._current.count
+            piece = conditioned[:, start:start + room]
+            start += piece.shape[1]
+            self.buffer.write(piece)
+            self._current.update(piece)
+            self.samples_seen += piece.shape[1]
+
+            if self._current.count == self.hop_size:
+                # Sealed hops are only merged, so the update scratch moves on to the next hop
+                sealed, self._current = self._current, RunningMoments(self.n_channels)
+                self._current._scratch, sealed._scratch = sealed._scratch, None
+                self._hops.append(sealed)
+                if self.samples_seen >= self.window_size:
+                    results.append(self._emit())
+        return results
+
+    def _emit(self) -> Dict[str, Any]:
+        moments = RunningMoments(self.n_channels)
+        for hop in self._hops:
+            moments.merge(hop)
+        time_features = moments.features()
+
+        window_samples = self.buffer.latest(self.window_size)
+        spectrum = get_spectral_engine().spectrum(window_samples, self.sampling_rate, n_fft=self.window_size)
+        freq_features = self._processor.extract_frequency_features(window_samples, self.sampling_rate, spectrum)
+        if isinstance(freq_features, dict):
+            # Extraction failed: every channel's window carries the error instead of features
+            freq_features = [freq_features] * self.n_channels
+
+        window = {
+            "time_features": time_features[0],
+            "frequency_features": freq_features[0],
+        }
+        if self.n_channels > 1:
+            window["channels"] = [
+                {"name": f"ch{i}", "time_features": tf, "frequency_features": ff}
+                for i, (tf, ff) in enumerate(zip(time_features, freq_features))
+            ]
+        fault_analysis, health_score = self._analysis.assess(window)
+
+        result = {
+            "sensor_id": self.sensor_id,
+            "window_index": self.windows_emitted,
+            "start_seconds": (self.samples_seen - self.window_size) / self.sampling_rate,
+            "end_seconds": self.samples_seen / self.sampling_rate,
+            **window,
+            "fault_detection": fault_analysis,
+            "health_score": health_score,
+        }
+        self.windows_emitted += 1
+        self.latest = result
+        return result
+
+
+class LiveStreamRegistry:
+    """Open live streams keyed by sensor ID, bounded by a total buffer budget"""
+
+    def __init__(self, max_bytes: Optional[int] = None, idle_seconds: Optional[float] = None) -> None:
+        self._streams: RingBufferRegistry[LiveSensorStream] = RingBufferRegistry(
+            max_bytes or settings.stream_max_bytes,
+            settings.stream_idle_seconds if idle_seconds is None else idle_seconds,
+        )
+        self._lock = threading.Lock()
+
+    def open(
+        self,
+        sensor_id: str,
+        sampling_rate: float,
+        n_channels: int = 1,
+        window_size: Optional[int] = None,
+        hop_size: Optional[int] = None,
+    ) -> LiveSensorStream:
+        """Return the sensor's stream, starting a new one if the feed layout changed"""
+        with self._lock:
+            stream = self._streams.get(sensor_id)
+            if (
+                stream is None
+                or stream.sampling_rate != float(sampling_rate)
+                or stream.n_channels != n_channels
+                or (window_size and stream.window_size != window_size)
+                or (hop_size and stream.hop_size != hop_size)
+            ):
+                stream = self._streams.put(
+                    sensor_id, LiveSensorStream(sensor_id, sampling_rate, n_channels, window_size, hop_size)
+                )
+            return stream
+
+    def open_for_sensor(self, sensor: Dict[str, Any], n_channels: int = 1, **kwargs: Any) -> LiveSensorStream:
+        """Open a stream from a sensors row (SupabaseService.get_sensor)"""
+        sampling_rate = sensor.get("sampling_rate")
+        if not sampling_rate:
+            raise ValueError(f"Sensor {sensor.get('id')} has no sampling rate")
+        return self.open(str(sensor["id"]), float(sampling_rate), n_channels, **kwargs)
+
+    def get(self, sensor_id: str) -> Optional[LiveSensorStream]:
+        return self._streams.get(sensor_id)
+
+    def close(self, sensor_id: str) -> bool:
+        return self._streams.pop(sensor_id) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return self._streams.stats()
+
+
+_registry: Optional[LiveStreamRegistry] = None
+
+
+def get_live_streams() -> LiveStreamRegistry:
+    """Return the shared live stream registry, creating it on first use"""
+    global _registry
+    if _registry is None:
+        _registry = LiveStreamRegistry()
+    return _registry
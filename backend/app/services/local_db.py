@@ -0,0 +1,342 @@
+"""
+Embedded SQLite store for machines, vibration records and diagnoses
+
+This is the offline backend behind SupabaseService and the machine/record
+endpoints. Each row keeps its full document as JSON next to a few indexed
+columns, so lookups by machine, sensor, status or creation time are index
+seeks and list queries page with a (created_at, id) keyset instead of
+scanning. The database runs in WAL mode, so readers never block the writer,
+and each thread uses its own connection.
+"""
+import base64
+import datetime as _dt
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..core.config import settings
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS machines (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_machines_created ON machines (created_at, id);
+
+CREATE TABLE IF NOT EXISTS vibration_records (
+    id TEXT PRIMARY KEY,
+    machine_id TEXT,
+    sensor_id TEXT,
+    status TEXT,
+    created_at TEXT NOT NULL,
+    measured_at REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_records_created ON vibration_records (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_records_machine ON vibration_records (machine_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_records_sensor ON vibration_records (sensor_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_records_status ON vibration_records (status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_records_measured ON vibration_records (machine_id, measured_at);
+
+CREATE TABLE IF NOT EXISTS diagnoses (
+    id TEXT PRIMARY KEY,
+    record_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_diagnoses_record ON diagnoses (record_id);
+
+CREATE TABLE IF NOT EXISTS fault_detections (
+    id TEXT PRIMARY KEY,
+    record_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_fault_detections_record ON fault_detections (record_id);
+
+CREATE TABLE IF NOT EXISTS baselines (
+    machine_id TEXT NOT NULL,
+    sensor_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (machine_id, sensor_id)
+);
+"""
+
+# Position in a (created_at, id) ordered listing
+Cursor = Tuple[str, str]
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    """Opaque URL-safe token for a listing position"""
+    return base64.urlsafe_b64encode(json.dumps(list(cursor)).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Inverse of encode_cursor; raises ValueError for malformed tokens"""
+    try:
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return str(created_at), str(record_id)
+
+
+def _now() -> str:
+    return _dt.datetime.utcnow().isoformat()
+
+
+def _epoch(value: Any) -> Optional[float]:
+    """Seconds since the epoch for an ISO timestamp or datetime, None if unparseable"""
+    if isinstance(value, _dt.datetime):
+        ts = value
+    elif value:
+        try:
+            ts = _dt.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=_dt.timezone.utc)
+    return ts.timestamp()
+
+
+def _dumps(value: Dict[str, Any]) -> str:
+    return json.dumps(value, default=str)
+
+
+class LocalDatabase:
+    """SQLite-backed document tables with indexed lookup columns"""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or settings.local_db_path
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    # Machines
+
+    def list_machines(self) -> List[Dict[str, Any]]:
+        rows = self._conn().execute("SELECT data FROM machines ORDER BY created_at, id").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_machine(self, machine_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT data FROM machines WHERE id = ?", (machine_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_machine(self, machine: Dict[str, Any]) -> Dict[str, Any]:
+        machine = {"id": str(uuid.uuid4()), "created_at": _now(), **machine}
+        with self._write() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO machines (id, created_at, data) VALUES (?, ?, ?)",
+                (machine["id"], str(machine["created_at"]), _dumps(machine)),
+            )
+        return machine
+
+    def delete_machine(self, machine_id: str) -> bool:
+        with self._write() as conn:
+            return conn.execute("DELETE FROM machines WHERE id = ?", (machine_id,)).rowcount > 0
+
+    # Vibration records
+
+    def get_record(self, record_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT data FROM vibration_records WHERE id = ?", (record_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a record, or merge its fields into the existing one with the same id"""
+        with self._write() as conn:
+            record_id = record.get("id") or str(uuid.uuid4())
+            row = conn.execute("SELECT data FROM vibration_records WHERE id = ?", (record_id,)).fetchone()
+            merged = {**json.loads(row[0]), **record} if row else {"created_at": _now(), **record}
+            merged["id"] = record_id
+            conn.execute(
+                "INSERT OR REPLACE INTO vibration_records"
+                " (id, machine_id, sensor_id, status, created_at, measured_at, data)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record_id,
+                    merged.get("machine_id"),
+                    merged.get("sensor_id"),
+                    merged.get("status"),
+                    str(merged["created_at"]),
+                    _epoch(merged.get("timestamp") or merged.get("measurement_date") or merged["created_at"]),
+                    _dumps(merged),
+                ),
+            )
+        return merged
+
+    def update_record(self, record_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """Merge fields into an existing record; None if it does not exist"""
+        if self.get_record(record_id) is None:
+            return None
+        return self.put_record({**fields, "id": record_id})
+
+    def delete_record(self, record_id: str) -> bool:
+        with self._write() as conn:
+            return conn.execute("DELETE FROM vibration_records WHERE id = ?", (record_id,)).rowcount > 0
+
+    def list_records(
+        self,
+        machine_id: Optional[str] = None,
+        sensor_id: Optional[str] = None,
+        status: Optional[str] = None,
+        start_time: Optional[_dt.datetime] = None,
+        end_time: Optional[_dt.datetime] = None,
+        after: Optional[Cursor] = None,
+        limit: Optional[int] = None,
+        keys: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Records in (created_at, id) order, optionally filtered
+
+        Pass the (created_at, id) of the last row of a page as after to fetch
+        the next one; each page is an index range scan. With keys, only those
+        document keys (plus id and created_at, and leaving out missing ones)
+        are extracted in SQL, so large documents are never decoded in Python.
+        """
+        clauses, params = self._filters(machine_id, sensor_id, status, start_time, end_time)
+        if after is not None:
+            clauses.append("(created_at, id) > (?, ?)")
+            params.extend(after)
+        if keys is None:
+            sql = "SELECT data FROM vibration_records"
+        else:
+            keys = [k for k in dict.fromkeys(keys) if k not in ("id", "created_at")]
+            sql = "SELECT " + ", ".join(["id", "created_at"] + ["json_extract(data, ?)"] * len(keys))
+            sql += " FROM vibration_records"
+            # Bound JSON paths, so key names never reach the SQL text
+            params = [f'$."{k}"' for k in keys] + params
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        rows = self._conn().execute(sql, params)
+        if keys is None:
+            return [json.loads(row[0]) for row in rows]
+        return [
+            {"id": row[0], "created_at": row[1], **{k: v for k, v in zip(keys, row[2:]) if v is not None}}
+            for row in rows
+        ]
+
+    def count_records(
+        self,
+        machine_id: Optional[str] = None,
+        sensor_id: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> int:
+        clauses, params = self._filters(machine_id, sensor_id, status, None, None)
+        sql = "SELECT COUNT(*) FROM vibration_records"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return self._conn().execute(sql, params).fetchone()[0]
+
+    # Diagnoses
+
+    def insert_diagnosis(self, row: Dict[str, Any]) -> str:
+        return self._insert_rows("diagnoses", [row])[0]
+
+    def insert_fault_detections(self, rows: List[Dict[str, Any]]) -> List[str]:
+        return self._insert_rows("fault_detections", rows)
+
+    def list_diagnoses(self, record_id: str) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT data FROM diagnoses WHERE record_id = ? ORDER BY created_at, id", (record_id,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    # Baselines
+
+    def get_baseline(self, machine_id: str, sensor_id: str = "") -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT data FROM baselines WHERE machine_id = ? AND sensor_id = ?", (machine_id, sensor_id)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_baseline(self, machine_id: str, sensor_id: str, data: Dict[str, Any]) -> None:
+        """Replace the baseline of a machine, or of one of its sensors when sensor_id is set"""
+        with self._write() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO baselines (machine_id, sensor_id, created_at, data) VALUES (?, ?, ?, ?)",
+                (machine_id, sensor_id, _now(), _dumps(data)),
+            )
+
+    def count(self, table: str) -> int:
+        if table not in ("machines", "vibration_records", "diagnoses", "fault_detections", "baselines"):
+            raise ValueError(f"Unknown table: {table}")
+        return self._conn().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _insert_rows(self, table: str, rows: List[Dict[str, Any]]) -> List[str]:
+        rows = [{"id": str(uuid.uuid4()), "created_at": _now(), **row} for row in rows]
+        with self._write() as conn:
+            conn.executemany(
+                f"INSERT INTO {table} (id, record_id, created_at, data) VALUES (?, ?, ?, ?)",
+                [(r["id"], r["record_id"], str(r["created_at"]), _dumps(r)) for r in rows],
+            )
+        return [r["id"] for r in rows]
+
+    @staticmethod
+    def _filters(machine_id, sensor_id, status, start_time, end_time):
+        clauses: List[str] = []
+        params: List[Any] = []
+        for column, value in (("machine_id", machine_id), ("sensor_id", sensor_id), ("status", status)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if start_time is not None:
+            clauses.append("measured_at >= ?")
+            params.append(_epoch(start_time))
+        if end_time is not None:
+            clauses.append("measured_at <= ?")
+            params.append(_epoch(end_time))
+        return clauses, params
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; writes open explicit transactions in _write
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+_db: Optional[LocalDatabase] = None
+_db_lock = threading.Lock()
+
+
+def get_local_db() -> LocalDatabase:
+    """Return the shared local database, creating it on first use"""
+    global _db
+    with _db_lock:
+        if _db is None:
+            _db = LocalDatabase()
+        return _db
@@ -0,0 +1,252 @@
+"""
+Reader for ASAM MDF version 4 files
+
+The block graph (HD -> DG -> CG -> CN) is walked up front, but sample data
+is never decoded in bulk: each channel is returned as a strided view over
+its bytes inside the data records, so reading one channel out of a wide
+record only touches that channel's columns.
+"""
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+ID_FILE = b"MDF     "
+BLOCK_HEADER = struct.Struct("<4s4xQQ")  # id, length, link_count
+
+CN_TYPE_MASTER = 2
+CN_TYPE_VIRTUAL_MASTER = 3
+SYNC_TYPE_TIME = 1
+
+CC_IDENTITY = 0
+CC_LINEAR = 1
+CC_RATIONAL = 2
+
+# cn_data_type -> byte order, NumPy kind
+DATA_TYPES = {
+    0: ("<", "u"), 1: (">", "u"),
+    2: ("<", "i"), 3: (">", "i"),
+    4: ("<", "f"), 5: (">", "f"),
+}
+
+
+class MdfError(ValueError):
+    """Raised for malformed or unsupported MDF content"""
+
+
+class _Channel:
+    __slots__ = (
+        "name", "unit", "cn_type", "sync_type", "dtype", "byte_offset",
+        "conversion", "group",
+    )
+
+
+class _ChannelGroup:
+    __slots__ = ("record_id_size", "record_size", "cycle_count", "data_blocks", "channels")
+
+
+class MdfFile:
+    """Lazily indexed view over MDF4 file bytes"""
+
+    def __init__(self, buffer) -> None:
+        self._buffer = buffer
+        self._view = memoryview(buffer).cast("B")
+        if bytes(self._view[:8]) != ID_FILE:
+            raise MdfError("Not an MDF file")
+        version = bytes(self._view[8:16]).decode("ascii", errors="replace").strip()
+        if not version.startswith("4"):
+            raise MdfError(f"MDF version {version} is not supported (MDF4 only)")
+        self.version = version
+        self._groups: List[_ChannelGroup] = []
+        self._channels: Dict[str, _Channel] = {}
+        self._index()
+
+    @staticmethod
+    def is_mdf(buffer) -> bool:
+        return bytes(memoryview(buffer).cast("B")[:8]) == ID_FILE
+
+    def channels(self) -> List[str]:
+        """Names of the data (non-master) channels, in file order"""
+        return [name for name, ch in self._channels.items() if ch.cn_type not in (CN_TYPE_MASTER, CN_TYPE_VIRTUAL_MASTER)]
+
+    def channel_unit(self, name: str) -> Optional[str]:
+        return self._channel(name).unit
+
+    def channel_data(self, name: str) -> np.ndarray:
+        """Read one channel's samples with its conversion applied"""
+        return self._apply_conversion(self._raw_channel(self._channel(name)), self._channel(name).conversion)
+
+    def sampling_rate(self, name: str) -> Optional[float]:
+        """Sampling rate from the time master channel of the channel's group"""
+        group = self._channel(name).group
+        master = next(
+            (ch for ch in group.channels if ch.cn_type in (CN_TYPE_MASTER, CN_TYPE_VIRTUAL_MASTER) and ch.sync_type == SYNC_TYPE_TIME),
+            None,
+        )
+        if master is None:
+            return None
+        if master.cn_type == CN_TYPE_VIRTUAL_MASTER:
+            # Value is the record index passed through the conversion: t = a + b * i
+            conversion = master.conversion
+            if conversion and conversion[0] == CC_LINEAR and conversion[1][1] > 0:
+                return 1.0 / conversion[1][1]
+            return None
+        # Only the first samples are needed to estimate the period
+        times = self._apply_conversion(self._raw_channel(master, limit=1024), master.conversion)
+        if len(times) < 2:
+            return None
+        period = float(np.median(np.diff(times)))
+        return 1.0 / period if period > 0 else None
+
+    def _channel(self, name: str) -> _Channel:
+        try:
+            return self._channels[name]
+        except KeyError:
+            raise KeyError(f"Channel not found in MDF file: {name}")
+
+    def _raw_channel(self, channel: _Channel, limit: Optional[int] = None) -> np.ndarray:
+        group = channel.group
+        arrays = []
+        remaining = group.cycle_count if limit is None else min(limit, group.cycle_count)
+        for offset, length in group.data_blocks:
+            if remaining <= 0:
+                break
+            n_records = min(length // group.record_size, remaining)
+            arrays.append(np.ndarray(
+                (n_records,),
+                dtype=channel.dtype,
+                buffer=self._buffer,
+                offset=offset + group.record_id_size + channel.byte_offset,
+                strides=(group.record_size,),
+            ))
+            remaining -= n_records
+        if not arrays:
+            return np.empty(0, dtype=channel.dtype)
+        if len(arrays) == 1:
+            return arrays[0]
+        return np.concatenate(arrays)
+
+    @staticmethod
+    def _apply_conversion(values: np.ndarray, conversion) -> np.ndarray:
+        if not conversion or conversion[0] == CC_IDENTITY:
+            return values
+        cc_type, params = conversion
+        if cc_type == CC_LINEAR:
+            offset, factor = params[0], params[1]
+            if offset == 0.0 and factor == 1.0:
+                return values
+            return offset + factor * values.astype(np.float64)
+        if cc_type == CC_RATIONAL:
+            p1, p2, p3, p4, p5, p6 = params[:6]
+            x = values.astype(np.float64)
+            return (p1 * x * x + p2 * x + p3) / (p4 * x * x + p5 * x + p6)
+        raise MdfError(f"Unsupported channel conversion type {cc_type}")
+
+    def _block(self, offset: int) -> Tuple[bytes, int, List[int], int]:
+        """Return (block id, length, links, data offset) for the block at offset"""
+        block_id, length, link_count = BLOCK_HEADER.unpack_from(self._view, offset)
+        links = list(struct.unpack_from(f"<{link_count}Q", self._view, offset + BLOCK_HEADER.size))
+        return block_id, length, links, offset + BLOCK_HEADER.size + 8 * link_count
+
+    def _text(self, offset: int) -> Optional[str]:
+        if not offset:
+            return None
+        block_id, length, _, data = self._block(offset)
+        if block_id not in (b"##TX", b"##MD"):
+            return None
+        raw = bytes(self._view[data:offset + length])
+        return raw.split(b"\0", 1)[0].decode("utf-8", errors="replace")
+
+    def _index(self) -> None:
+        block_id, _, hd_links, _ = self._block(64)
+        if block_id != b"##HD":
+            raise MdfError("MDF header block not found")
+
+        dg_offset = hd_links[0]
+        while dg_offset:
+            block_id, _, dg_links, dg_data = self._block(dg_offset)
+            if block_id != b"##DG":
+                raise MdfError(f"Expected DG block at offset {dg_offset}")
+            record_id_size = self._view[dg_data]
+            cg_offsets = self._linked_list(dg_links[1], next_link=0)
+            if len(cg_offsets) > 1:
+                raise MdfError("Unsorted MDF data groups are not supported")
+            for cg_offset in cg_offsets:
+                self._index_channel_group(cg_offset, record_id_size, dg_links[2])
+            dg_offset = dg_links[0]
+
+    def _index_channel_group(self, cg_offset: int, record_id_size: int, data_offset: int) -> None:
+        _, _, cg_links, cg_data = self._block(cg_offset)
+        _, cycle_count, _, _, data_bytes, inval_bytes = struct.unpack_from("<QQHH4xII", self._view, cg_data)
+
+        group = _ChannelGroup()
+        group.record_id_size = record_id_size
+        group.record_size = record_id_size + data_bytes + inval_bytes
+        group.cycle_count = cycle_count
+        group.data_blocks = self._data_blocks(data_offset)
+        group.channels = []
+        self._groups.append(group)
+
+        for cn_offset in self._linked_list(cg_links[1], next_link=0):
+            _, _, cn_links, cn_data = self._block(cn_offset)
+            cn_type, sync_type, data_type, bit_offset, byte_offset, bit_count = struct.unpack_from("<BBBBII", self._view, cn_data)
+
+            channel = _Channel()
+            channel.name = self._text(cn_links[2]) or f"channel_{len(self._channels)}"
+            channel.unit = self._text(cn_links[6])
+            channel.cn_type = cn_type
+            channel.sync_type = sync_type
+            channel.byte_offset = byte_offset
+            channel.conversion = self._conversion(cn_links[4])
+            channel.group = group
+            channel.dtype = None
+            if cn_type != CN_TYPE_VIRTUAL_MASTER:
+                if data_type not in DATA_TYPES or bit_offset != 0 or bit_count not in (8, 16, 32, 64):
+                    # Strings, byte arrays and bit-packed values are not signal data
+                    continue
+                order, kind = DATA_TYPES[data_type]
+                channel.dtype = np.dtype(f"{order}{kind}{bit_count // 8}")
+
+            group.channels.append(channel)
+            self._channels.setdefault(channel.name, channel)
+
+    def _conversion(self, offset: int):
+        if not offset:
+            return None
+        block_id, _, _, data = self._block(offset)
+        if block_id != b"##CC":
+            return None
+        cc_type = self._view[data]
+        val_count = struct.unpack_from("<H", self._view, data + 6)[0]
+        params = struct.unpack_from(f"<{val_count}d", self._view, data + 24)
+        return cc_type, params
+
+    def _data_blocks(self, offset: int) -> List[Tuple[int, int]]:
+        """Flatten DT/DL/HL chains into (records offset, records length) pairs"""
+        blocks: List[Tuple[int, int]] = []
+        while offset:
+            block_id, length, links, data = self._block(offset)
+            if block_id == b"##DT":
+                blocks.append((data, offset + length - data))
+                return blocks
+            if block_id == b"##HL":
+                offset = links[0]
+                continue
+            if block_id == b"##DL":
+                count = struct.unpack_from("<I", self._view, data + 4)[0]
+                for dt_offset in links[1:1 + count]:
+                    blocks.extend(self._data_blocks(dt_offset))
+                offset = links[0]
+                continue
+            if block_id == b"##DZ":
+                raise MdfError("Compressed MDF data blocks are not supported")
+            raise MdfError(f"Unexpected data block {block_id!r}")
+        return blocks
+
+    def _linked_list(self, offset: int, next_link: int) -> List[int]:
+        offsets = []
+        while offset:
+            offsets.append(offset)
+            offset = self._block(offset)[2][next_link]
+        return offsets
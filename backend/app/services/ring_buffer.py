@@ -0,0 +1,170 @@
+"""
+Fixed-size sample history for live sensors
+
+SignalRingBuffer keeps the most recent samples of a sensor in one
+preallocated (channels, 2 * capacity) array. Every sample is written twice,
+capacity apart, so the last n samples are always a contiguous slice and
+windows are returned as views without copying or unrolling. Storage is
+float32 by default, which together with the mirror costs the same as a
+plain float64 ring.
+
+RingBufferRegistry holds per-sensor entries under a total byte budget:
+entries idle for longer than idle_seconds are dropped, and when the budget
+is exceeded the least recently used entries go first. Memory for any
+number of sensors is therefore bounded by max_bytes.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Optional, TypeVar
+
+import numpy as np
+
+
+class SignalRingBuffer:
+    """Circular (channels, capacity) sample history with zero-copy windows"""
+
+    def __init__(self, n_channels: int, capacity: int, sampling_rate: float, dtype: Any = np.float32) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.n_channels = n_channels
+        self.capacity = capacity
+        self.sampling_rate = float(sampling_rate)
+        self.total_written = 0
+        self.last_update: Optional[float] = None
+        self._data = np.zeros((n_channels, 2 * capacity), dtype=dtype)
+        self._pos = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    @property
+    def size(self) -> int:
+        """Number of valid samples held, at most capacity"""
+        return min(self.total_written, self.capacity)
+
+    def write(self, block: np.ndarray) -> None:
+        """Append a 1-D or (channels, samples) block, overwriting the oldest samples"""
+        rows = np.atleast_2d(block)
+        if rows.shape[0] != self.n_channels:
+            raise ValueError(f"Expected {self.n_channels} channels, got {rows.shape[0]}")
+        n = rows.shape[1]
+        if n == 0:
+            return
+        self.last_update = time.time()
+        self.total_written += n
+        if n >= self.capacity:
+            rows = rows[:, -self.capacity:]
+            self._data[:, :self.capacity] = rows
+            self._data[:, self.capacity:] = rows
+            self._pos = 0
+            return
+        end = self._pos + n
+        if end <= self.capacity:
+            self._store(self._pos, rows)
+        else:
+            split = self.capacity - self._pos
+            self._store(self._pos, rows[:, :split])
+            self._store(0, rows[:, split:])
+        self._pos = end % self.capacity
+
+    def latest(self, n_samples: int) -> np.ndarray:
+        """Read-only view of the newest n_samples, oldest first"""
+        if not 0 < n_samples <= self.capacity:
+            raise ValueError(f"n_samples must be between 1 and {self.capacity}")
+        if n_samples > self.size:
+            raise ValueError(f"Only {self.size} samples buffered")
+        end = self._pos + self.capacity
+        view = self._data[:, end - n_samples:end]
+        view.flags.writeable = False
+        return view
+
+    def last_seconds(self, seconds: float) -> np.ndarray:
+        """Read-only view of the newest samples covering seconds, clipped to what is buffered"""
+        n_samples = min(int(round(seconds * self.sampling_rate)), self.size)
+        if n_samples <= 0:
+            return self._data[:, :0]
+        return self.latest(n_samples)
+
+    def _store(self, start: int, rows: np.ndarray) -> None:
+        n = rows.shape[1]
+        self._data[:, start:start + n] = rows
+        self._data[:, start + self.capacity:start + self.capacity + n] = rows
+
+
+T = TypeVar("T")
+
+
+class RingBufferRegistry(Generic[T]):
+    """
+    Per-sensor entries under a total byte budget
+
+    Entries must expose nbytes and last_update (seconds since the epoch, or
+    None before the first write), as SignalRingBuffer does.
+    """
+
+    def __init__(self, max_bytes: int, idle_seconds: float = 0.0) -> None:
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.evictions = 0
+        self._entries: "OrderedDict[str, T]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sensor_id: str) -> Optional[T]:
+        with self._lock:
+            entry = self._entries.get(sensor_id)
+            if entry is not None:
+                self._entries.move_to_end(sensor_id)
+            return entry
+
+    def put(self, sensor_id: str, entry: T) -> T:
+        """Register an entry, evicting idle and then least recently used ones to fit"""
+        if entry.nbytes > self.max_bytes:
+            raise ValueError(f"Buffer of {entry.nbytes} bytes exceeds the {self.max_bytes} byte budget")
+        with self._lock:
+            self._entries.pop(sensor_id, None)
+            self._evict_idle()
+            used = sum(e.nbytes for e in self._entries.values())
+            while self._entries and used + entry.nbytes > self.max_bytes:
+                _, dropped = self._entries.popitem(last=False)
+                used -= dropped.nbytes
+                self.evictions += 1
+            self._entries[sensor_id] = entry
+            return entry
+
+    def pop(self, sensor_id: str) -> Optional[T]:
+        with self._lock:
+            return self._entries.pop(sensor_id, None)
+
+    def evict_idle(self) -> int:
+        with self._lock:
+            return self._evict_idle()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sensors": len(self._entries),
+                "bytes": sum(e.nbytes for e in self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, sensor_id: str) -> bool:
+        return sensor_id in self._entries
+
+    def _evict_idle(self) -> int:
+        if self.idle_seconds <= 0:
+            return 0
+        cutoff = time.time() - self.idle_seconds
+        idle = [
+            sensor_id for sensor_id, entry in self._entries.items()
+            if entry.last_update is not None and entry.last_update < cutoff
+        ]
+        for sensor_id in idle:
+            del self._entries[sensor_id]
+        self.evictions += len(idle)
+        return len(idle)
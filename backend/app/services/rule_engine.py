@@ -1,59 +1,351 @@
-from typing import Dict, List, Tuple
+"""
+Declarative fault rules compiled to NumPy
+
+A rule is a dict: the fault it reports, the conditions that must all hold,
+a severity curve and a confidence, e.g.
+
+    {
+        "fault_type": "Bearing Defect",
+        "when": [{"feature": "time.crest_factor", "op": ">", "value": 4.0}],
+        "severity": {"feature": "time.crest_factor", "curve": [[3.0, 0.0], [7.0, 100.0]]},
+        "confidence": 0.6,
+        "description": "High crest factor ({time.crest_factor:.2f})",
+        "report": {"crest_factor": "time.crest_factor"},
+    }
+
+Features use the flat names of baseline.flatten_features. A condition
+compares the feature itself, or with "baseline_ratio" its ratio to the
+baseline mean (op ">" with baseline_ratio 1.5 fires at 1.5x baseline).
+Operators are >, >=, <, <=, == and "within" (|x - value| < tolerance).
+Severity is piecewise linear in the curve's points, flat beyond its ends;
+a severity with a "baseline_ratio" key reads the curve at that same ratio.
+
+RuleEngine compiles a rule set into index and threshold arrays once, then
+evaluates a (rows, features) matrix with a handful of array operations:
+every condition of every rule at once, an AND per rule with reduceat, and
+health scores per record with bincount, so a fleet re-score is one call.
+"""
+import hashlib
+import json
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..core.config import settings
+
+
+OPERATORS = (">", ">=", "<", "<=", "==", "within")
+
+# Score of a record without findings, as VibrationAnalysisService always reported
+HEALTHY_SCORE = 95
+
+
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {
+        # Orders of the measured running speed (order_tracking), so any machine speed works
+        "fault_type": "Imbalance",
+        "when": [
+            {"feature": "order.dominant_order", "op": "within", "value": 1.0, "tolerance": 0.07},
+            {"feature": "order.fft_peak_1x", "op": ">", "value": 0.1},
+        ],
+        "severity": {"feature": "order.fft_peak_1x", "curve": [[0.0, 0.0], [1.0, 100.0]]},
+        "confidence": 0.7,
+        "description": "High 1x component ({order.fft_peak_1x:.3f}) at {order.running_speed:.1f} Hz",
+        "report": {"frequency": "order.running_speed", "amplitude": "order.fft_peak_1x"},
+    },
+    {
+        "fault_type": "Bearing Defect",
+        "when": [{"feature": "time.crest_factor", "op": ">", "value": 4.0}],
+        "severity": {"feature": "time.crest_factor", "curve": [[3.0, 0.0], [7.0, 100.0]]},
+        "confidence": 0.6,
+        "description": "High crest factor ({time.crest_factor:.2f}) indicates impulsive behavior",
+        "report": {"crest_factor": "time.crest_factor"},
+    },
+    {
+        "fault_type": "Impulsive Behavior",
+        "when": [{"feature": "time.kurtosis", "op": ">", "value": 5.0}],
+        "severity": {"feature": "time.kurtosis", "curve": [[3.0, 0.0], [13.0, 100.0]]},
+        "confidence": 0.5,
+        "description": "High kurtosis ({time.kurtosis:.2f}) suggests impulsive events",
+        "report": {"kurtosis": "time.kurtosis"},
+    },
+    {
+        "fault_type": "Gear Mesh Issues",
+        "when": [
+            {"feature": "freq.harmonic_count", "op": ">=", "value": 3},
+            {"feature": "freq.harmonic_mean_magnitude", "op": ">", "value": 0.05},
+        ],
+        "severity": {"feature": "freq.harmonic_mean_magnitude", "curve": [[0.0, 0.0], [0.5, 100.0]]},
+        "confidence": 0.6,
+        "description": "Multiple harmonics detected, average magnitude: {freq.harmonic_mean_magnitude:.3f}",
+        "report": {"harmonic_count": "freq.harmonic_count"},
+    },
+    {
+        "fault_type": "High Vibration Level",
+        "when": [{"feature": "time.rms", "op": ">", "value": 0.5}],
+        "severity": {"feature": "time.rms", "curve": [[0.0, 0.0], [1.0, 100.0]]},
+        "confidence": 0.8,
+        "description": "Overall RMS level ({time.rms:.3f}) exceeds normal range",
+        "report": {"rms_level": "time.rms"},
+    },
+]
+
+# Bearing defects matched in the envelope spectrum: a strong line at the
+# defect frequency with at least one harmonic. They only fire for machines
+# with a nominal speed and bearing geometry
+DEFAULT_RULES += [
+    {
+        "fault_type": f"Bearing {part} Defect",
+        "when": [
+            {"feature": f"env.{defect}_snr_db", "op": ">", "value": 10.0},
+            {"feature": f"env.{defect}_harmonics", "op": ">=", "value": 2},
+        ],
+        "severity": {"feature": f"env.{defect}_snr_db", "curve": [[6.0, 0.0], [26.0, 100.0]]},
+        "confidence": 0.8,
+        "description": (
+            f"Envelope peak at {{env.{defect}_frequency:.1f}} Hz matches {defect.upper()}, "
+            f"{{env.{defect}_snr_db:.1f}} dB above the floor"
+        ),
+        "report": {"frequency": f"env.{defect}_frequency", "harmonics": f"env.{defect}_harmonics"},
+    }
+    for defect, part in (("bpfo", "Outer Race"), ("bpfi", "Inner Race"), ("bsf", "Rolling Element"), ("ftf", "Cage"))
+]
+
+
+def _validate(rule: Dict[str, Any]) -> None:
+    if not rule.get("fault_type"):
+        raise ValueError("Rule needs a fault_type")
+    if not rule.get("when"):
+        raise ValueError(f"Rule {rule['fault_type']} has no conditions")
+    for condition in rule["when"]:
+        if condition.get("op") not in OPERATORS:
+            raise ValueError(f"Rule {rule['fault_type']}: unknown operator {condition.get('op')!r}")
+        if ("value" in condition) == ("baseline_ratio" in condition):
+            raise ValueError(f"Rule {rule['fault_type']}: a condition needs either value or baseline_ratio")
+    curve = np.asarray(rule.get("severity", {}).get("curve", []), dtype=float)
+    if curve.ndim != 2 or curve.shape[0] < 2 or curve.shape[1] != 2 or np.any(np.diff(curve[:, 0]) <= 0):
+        raise ValueError(f"Rule {rule['fault_type']}: severity curve needs increasing [x, severity] points")
+
+
+class _Namespaces(dict):
+    # Lets descriptions say {time.rms:.3f}: "time" resolves to an object with an rms attribute
+    def __init__(self, features: Dict[str, float]) -> None:
+        grouped: Dict[str, Dict[str, float]] = {}
+        for name, value in features.items():
+            prefix, _, rest = name.partition(".")
+            grouped.setdefault(prefix, {})[rest] = value
+        super().__init__({prefix: SimpleNamespace(**values) for prefix, values in grouped.items()})
 
 
 class RuleEngine:
-    def __init__(self, baseline: Dict[str, float] | None) -> None:
-        self.baseline = baseline or {}
-
-    def check_imbalance(self, features: Dict[str, float]) -> Tuple[bool, float]:
-        base = float(self.baseline.get("fft_peak_1x", 0.0))
-        cur = float(features.get("fft_peak_1x", 0.0))
-        if base <= 0:
-            return False, 0.0
-        ratio = cur / base
-        triggered = ratio > 1.5
-        severity = max(0.0, min(100.0, (ratio - 1.0) * 100.0)) if triggered else 0.0
-        return triggered, severity
+    """A rule set compiled for vectorized evaluation over many rows of features"""
 
-    def check_misalignment(self, features: Dict[str, float]) -> Tuple[bool, float]:
-        # Simple proxy: crest factor elevates significantly vs baseline
-        base = float(self.baseline.get("crest_factor", 0.0))
-        cur = float(features.get("crest_factor", 0.0))
-        if base <= 0:
-            return False, 0.0
-        ratio = cur / base
-        triggered = ratio > 1.4
-        severity = max(0.0, min(100.0, (ratio - 1.0) * 100.0)) if triggered else 0.0
-        return triggered, severity
+    def __init__(self, rules: Optional[Sequence[Dict[str, Any]]] = None) -> None:
+        self.rules = [dict(rule) for rule in (DEFAULT_RULES if rules is None else rules)]
+        for rule in self.rules:
+            _validate(rule)
+        # Identifies the rule set in cache keys
+        self.fingerprint = hashlib.sha256(json.dumps(self.rules, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+        referenced = set()
+        for rule in self.rules:
+            referenced.update(c["feature"] for c in rule["when"])
+            referenced.add(rule["severity"]["feature"])
+            referenced.update(rule.get("report", {}).values())
+        self.feature_names = sorted(referenced)
+        index = {name: i for i, name in enumerate(self.feature_names)}
 
-    def check_bearing_faults(self, features: Dict[str, float]) -> Tuple[bool, float]:
-        # Placeholder heuristic using kurtosis increase
-        base = float(self.baseline.get("kurtosis", 3.0))
-        cur = float(features.get("kurtosis", 3.0))
-        triggered = cur > base * 1.3
-        severity = max(0.0, min(100.0, (cur / (base + 1e-6) - 1.0) * 100.0)) if triggered else 0.0
+        conditions = [(r, c) for r, rule in enumerate(self.rules) for c in rule["when"]]
+        self._cond_col = np.array([index[c["feature"]] for _, c in conditions], dtype=np.intp)
+        self._cond_op = np.array([OPERATORS.index(c["op"]) for _, c in conditions])
+        self._cond_ratio = np.array(["baseline_ratio" in c for _, c in conditions])
+        self._cond_value = np.array(
+            [float(c["baseline_ratio"] if "baseline_ratio" in c else c["value"]) for _, c in conditions]
+        )
+        self._cond_tolerance = np.array([float(c.get("tolerance", 0.0)) for _, c in conditions])
+        # First condition of each rule; conditions are laid out rule by rule
+        self._starts = np.searchsorted([r for r, _ in conditions], np.arange(len(self.rules)))
+
+        self._sev_col = np.array([index[rule["severity"]["feature"]] for rule in self.rules], dtype=np.intp)
+        self._sev_ratio = np.array(["baseline_ratio" in rule["severity"] for rule in self.rules])
+        self._curves = [np.asarray(rule["severity"]["curve"], dtype=float).T for rule in self.rules]
+        self.confidence = np.array([float(rule.get("confidence", 0.5)) for rule in self.rules])
+        self.uses_baseline = bool(self._cond_ratio.any() or self._sev_ratio.any())
+
+    def matrix(self, rows: Sequence[Dict[str, float]]) -> np.ndarray:
+        """(rows, features) matrix in engine order; missing features are NaN"""
+        return np.array(
+            [[row.get(name, np.nan) for name in self.feature_names] for row in rows], dtype=np.float64
+        ).reshape(len(rows), len(self.feature_names))
+
+    def evaluate_matrix(
+        self, features: np.ndarray, baseline: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Triggered flags and severities, both (rows, rules)
+
+        baseline holds the baseline mean of each feature per row (NaN where
+        unknown); ratio conditions on rows without one never fire.
+        """
+        F = np.atleast_2d(np.asarray(features, dtype=np.float64))
+        if not self.rules:
+            return np.zeros((F.shape[0], 0), dtype=bool), np.zeros((F.shape[0], 0))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = self._relative(F[:, self._cond_col], baseline, self._cond_col, self._cond_ratio)
+            thresholds = self._cond_value
+            op = self._cond_op
+            # NaN compares false under every operator
+            passed = np.select(
+                [op == 0, op == 1, op == 2, op == 3, op == 4, op == 5],
+                [
+                    values > thresholds,
+                    values >= thresholds,
+                    values < thresholds,
+                    values <= thresholds,
+                    values == thresholds,
+                    np.abs(values - thresholds) < self._cond_tolerance,
+                ],
+                default=False,
+            )
+            triggered = np.logical_and.reduceat(passed, self._starts, axis=1)
+
+            inputs = self._relative(F[:, self._sev_col], baseline, self._sev_col, self._sev_ratio)
+        severity = np.zeros(triggered.shape)
+        for r, (xp, fp) in enumerate(self._curves):
+            severity[:, r] = np.interp(inputs[:, r], xp, fp)
+        severity = np.where(triggered, np.nan_to_num(severity), 0.0)
         return triggered, severity
 
-    def calculate_health_score(self, detections: List[Dict[str, float]]) -> int:
-        # Start from 100 and subtract weighted severities
-        score = 100.0
-        for d in detections:
-            score -= 0.3 * d.get("severity", 0.0)
-        return max(0, min(100, int(round(score))))
+    def health_scores(
+        self,
+        triggered: np.ndarray,
+        severity: np.ndarray,
+        groups: Optional[np.ndarray] = None,
+        n_groups: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Confidence-weighted health score per row, or per group of rows
+
+        groups maps each row to its record, so findings on every channel of a
+        record count toward one score. 100 minus the weighted mean severity,
+        HEALTHY_SCORE when nothing fired.
+        """
+        weights = triggered * self.confidence
+        weighted = (weights * severity).sum(axis=1)
+        total = weights.sum(axis=1)
+        if groups is not None:
+            n_groups = int(groups.max()) + 1 if n_groups is None else n_groups
+            weighted = np.bincount(groups, weighted, minlength=n_groups)
+            total = np.bincount(groups, total, minlength=n_groups)
+        mean = weighted / np.where(total > 0, total, 1.0)
+        scores = np.floor(np.maximum(0.0, 100.0 - mean))
+        return np.where(total > 0, scores, HEALTHY_SCORE).astype(int)
+
+    def findings(
+        self, rows: Sequence[Dict[str, float]], triggered: np.ndarray, severity: np.ndarray
+    ) -> List[List[Dict[str, Any]]]:
+        """Finding dicts per row, in rule order, for the rules that fired"""
+        result: List[List[Dict[str, Any]]] = [[] for _ in rows]
+        for i, r in zip(*np.nonzero(triggered)):
+            rule = self.rules[r]
+            row = rows[i]
+            finding = {
+                "fault_type": rule["fault_type"],
+                "severity": float(severity[i, r]),
+                "confidence": float(self.confidence[r]),
+            }
+            if rule.get("description"):
+                try:
+                    finding["description"] = rule["description"].format_map(_Namespaces(row))
+                except (AttributeError, KeyError, ValueError):
+                    finding["description"] = rule["fault_type"]
+            for key, feature in rule.get("report", {}).items():
+                finding[key] = row.get(feature)
+            result[i].append(finding)
+        return result
+
+    def evaluate(
+        self, features: Dict[str, float], baseline: Optional[Dict[str, float]] = None
+    ) -> List[Dict[str, Any]]:
+        """Findings for one row of flat features"""
+        return self.evaluate_rows([features], [baseline] if baseline else None)[0]
+
+    def evaluate_rows(
+        self,
+        rows: Sequence[Dict[str, float]],
+        baselines: Optional[Sequence[Optional[Dict[str, float]]]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Findings for many rows of flat features, with optional baseline means per row"""
+        triggered, severity = self.evaluate_matrix(self.matrix(rows), self.baseline_matrix(baselines))
+        return self.findings(rows, triggered, severity)
+
+    def baseline_matrix(self, baselines: Optional[Sequence[Optional[Dict[str, float]]]]) -> Optional[np.ndarray]:
+        """Baseline means in engine order per row, or None when no rule needs them"""
+        if not self.uses_baseline or not baselines:
+            return None
+        return self.matrix([b or {} for b in baselines])
+
+    @staticmethod
+    def _relative(values, baseline, columns, ratio):
+        if not ratio.any():
+            return values
+        if baseline is None:
+            base = np.full(values.shape, np.nan)
+        else:
+            base = np.atleast_2d(baseline)[:, columns]
+        return np.where(ratio, values / np.where(base > 0, base, np.nan), values)
+
+
+def load_rules() -> List[Dict[str, Any]]:
+    """
+    The configured rule set
+
+    The global row of the Supabase settings table wins (thresholds.rules),
+    then the JSON file at settings.rules_path, then DEFAULT_RULES.
+    """
+    from .supabase_service import SupabaseService
+
+    try:
+        thresholds = SupabaseService().get_thresholds()
+    except Exception as e:
+        print(f"Failed to read rule thresholds from Supabase: {e}")
+        thresholds = None
+    if thresholds and thresholds.get("rules"):
+        return thresholds["rules"]
+    if settings.rules_path:
+        with open(settings.rules_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return DEFAULT_RULES
+
+
+_engine: Optional[RuleEngine] = None
+_engine_lock = threading.Lock()
+
 
-    def evaluate(self, features: Dict[str, float]) -> List[Dict[str, float]]:
-        findings: List[Dict[str, float]] = []
+def get_rule_engine() -> RuleEngine:
+    """Return the shared engine, compiling the configured rules on first use"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = RuleEngine(load_rules())
+        return _engine
 
-        trig, sev = self.check_imbalance(features)
-        if trig:
-            findings.append({"fault_type": "Imbalance", "severity": sev, "confidence": 0.7})
 
-        trig, sev = self.check_misalignment(features)
-        if trig:
-            findings.append({"fault_type": "Misalignment", "severity": sev, "confidence": 0.6})
+def reload_rule_engine() -> RuleEngine:
+    """Recompile after the configured rules changed"""
+    global _engine
+    engine = RuleEngine(load_rules())
+    with _engine_lock:
+        _engine = engine
+    return engine
 
-        trig, sev = self.check_bearing_faults(features)
-        if trig:
-            findings.append({"fault_type": "Bearing Fault", "severity": sev, "confidence": 0.55})
 
-        return findings
+def use_rules(rules: Sequence[Dict[str, Any]]) -> RuleEngine:
+    """Make a given rule set current, e.g. the parent's inside a worker process"""
+    global _engine
+    with _engine_lock:
+        if _engine is None or _engine.rules != list(rules):
+            _engine = RuleEngine(rules)
+        return _engine
@@ -2,241 +2,487 @@
 Signal processing service for vibration analysis
 """
 import numpy as np
-from scipy import signal
-from scipy.fft import fft, fftfreq
-from typing import Dict, Any, Tuple, Optional
+# Aliased so it is not shadowed by the `signal` arguments below
+from scipy import signal as sps
+from typing import Dict, Any, List, Tuple, Optional, Union
 import warnings
 
+from .band_energy import BAND_SETS, MACHINE_TYPE_BAND_SETS, band_energies, band_set_name, expand_band_set
+from .envelope import EnvelopeAnalyzer
+from .filter_bank import FilterBank
+from .harmonics import find_family
+from .order_tracking import OrderTracker
+from .spectral import Spectrum, StreamingSpectrogram, get_spectral_engine
+from .stats_kernel import time_features
+
 warnings.filterwarnings('ignore')
 
 
 class SignalProcessor:
     """Service for processing vibration signals and extracting features"""
     
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        filter_order: int = 4,
+        highpass_cutoff: float = 1.0,
+        lowpass_cutoff: float = 1000.0,
+        max_harmonics: int = 5,
+        sidebands: int = 0,
+        band_definitions: Optional[Dict[str, Tuple[float, Optional[float]]]] = None,
+        band_sets: Optional[Dict[str, Dict[str, Any]]] = None,
+        machine_band_sets: Optional[Dict[str, str]] = None,
+        zero_phase: bool = False,
+        spectral_mode: str = "auto",
+        welch_min_samples: int = 1 << 20,
+        segment_length: int = 1024,
+        segment_overlap: float = 0.5,
+        spectrogram_max_frames: int = 128,
+        spectrogram_max_bins: int = 128,
+        envelope: bool = True,
+        envelope_band: Optional[Tuple[float, float]] = None,
+        envelope_harmonics: int = 3,
+        envelope_tolerance: float = 0.02,
+        kurtogram_levels: int = 6,
+        order_tracking: bool = True,
+        nominal_rpm: float = 1800.0,
+        max_order: float = 20.0,
+    ):
+        """
+        Args:
+            max_harmonics: Highest harmonic of the dominant frequency searched
+            sidebands: Sidebands searched on either side of each harmonic, spaced
+                by the running speed (needs order_tracking)
+            band_definitions: Bands of the "default" band set, in Hz; replaces
+                any "default" in band_sets
+            band_sets, machine_band_sets: Band sets added to band_energy.BAND_SETS,
+                and the set used for each machine type (see band_energy.py;
+                None uses MACHINE_TYPE_BAND_SETS); sets in orders need
+                order_tracking and fall back to "default"
+            zero_phase: Condition signals with forward-backward (sosfiltfilt)
+                filtering instead of a single causal pass
+            spectral_mode: Spectrum behind the frequency features: "fft" (one
+                full-length FFT), "welch" (averaged segments) or "auto"
+                (Welch once a capture reaches welch_min_samples)
+            segment_length, segment_overlap: Welch/STFT segment size and overlap fraction
+            spectrogram_max_frames, spectrogram_max_bins: Size limits of the returned spectrogram
+            envelope: Run envelope analysis for bearing defects (see envelope.py)
+            envelope_band: Fixed demodulation band in Hz; None picks one per
+                record from a kurtogram kurtogram_levels deep
+            order_tracking: Estimate the running speed and compute order spectra
+                (see order_tracking.py)
+            nominal_rpm: Running speed assumed when the machine's is unknown
+            max_order: Highest order in the order spectra
+            envelope_harmonics, envelope_tolerance: Defect harmonics searched and
+                the relative width of their search windows
+        """
+        if spectral_mode not in ("fft", "welch", "auto"):
+            raise ValueError(f"Unknown spectral mode: {spectral_mode}")
+        self.filter_order = filter_order
+        self.highpass_cutoff = highpass_cutoff
+        self.lowpass_cutoff = lowpass_cutoff
+        self.max_harmonics = max_harmonics
+        self.sidebands = sidebands
+        self.band_sets = {**BAND_SETS, **(band_sets or {})}
+        if band_definitions is not None:
+            self.band_sets["default"] = {"unit": "hz", "bands": dict(band_definitions)}
+        self.machine_band_sets = dict(MACHINE_TYPE_BAND_SETS if machine_band_sets is None else machine_band_sets)
+        # Expanded once so every record only pays for the searchsorted
+        self._bands = {name: expand_band_set(band_set) for name, band_set in self.band_sets.items()}
+        self.zero_phase = zero_phase
+        self.spectral_mode = spectral_mode
+        self.welch_min_samples = welch_min_samples
+        self.segment_length = segment_length
+        self.segment_overlap = segment_overlap
+        self.spectrogram_max_frames = spectrogram_max_frames
+        self.spectrogram_max_bins = spectrogram_max_bins
+        self._spectral = get_spectral_engine()
+        self._envelope = EnvelopeAnalyzer(
+            band=envelope_band,
+            harmonics=envelope_harmonics,
+            tolerance=envelope_tolerance,
+            kurtogram_levels=kurtogram_levels,
+        ) if envelope else None
+        self._orders = OrderTracker(nominal_rpm=nominal_rpm, max_order=max_order) if order_tracking else None
+    
+    def config(self) -> Dict[str, Any]:
+        """Processing parameters that affect the output, e.g. for cache keys"""
+        return {
+            "filter_order": self.filter_order,
+            "highpass_cutoff": self.highpass_cutoff,
+            "lowpass_cutoff": self.lowpass_cutoff,
+            "max_harmonics": self.max_harmonics,
+            "sidebands": self.sidebands,
+            "band_sets": {
+                name: {**band_set, "bands": {k: list(v) for k, v in sorted((band_set.get("bands") or {}).items())}}
+                for name, band_set in sorted(self.band_sets.items())
+            },
+            "machine_band_sets": dict(sorted(self.machine_band_sets.items())),
+            "zero_phase": self.zero_phase,
+            "spectral_mode": self.spectral_mode,
+            "welch_min_samples": self.welch_min_samples,
+            "segment_length": self.segment_length,
+            "segment_overlap": self.segment_overlap,
+            "spectrogram_max_frames": self.spectrogram_max_frames,
+            "spectrogram_max_bins": self.spectrogram_max_bins,
+            "envelope": self._envelope.config() if self._envelope else None,
+            "orders": self._orders.config() if self._orders else None,
+        }
     
-    def process_signal(self, raw_signal: np.ndarray, sampling_rate: float) -> Dict[str, Any]:
+    def process_signal(
+        self,
+        raw_signal: np.ndarray,
+        sampling_rate: float,
+        channels: Optional[List[Dict[str, Any]]] = None,
+        kinematics: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
         """
         Process raw vibration signal and extract features
         
         Args:
-            raw_signal: Raw vibration data
+            raw_signal: Raw vibration data, either 1-D or channels-by-samples
             sampling_rate: Sampling rate in Hz
+            channels: Optional per-row descriptors (name, axis, position)
+            kinematics: Running speed, bearing geometry and type of the machine
+                (envelope.machine_kinematics), used to match defect frequencies
+                and to pick the band set
             
         Returns:
-            Dictionary containing processed signal and extracted features
+            Dictionary containing processed signal and extracted features. The
+            top-level features describe the first channel; multi-channel input
+            adds a "channels" list with features for every row.
         """
         try:
-            # Basic signal conditioning
-            conditioned_signal = self.condition_signal(raw_signal, sampling_rate)
+            signals = np.atleast_2d(raw_signal)
+            
+            # Basic signal conditioning, all channels in one batched filter pass
+            conditioned = self.condition_signal(signals, sampling_rate)
             
             # Extract time domain features
-            time_features = self.extract_time_features(conditioned_signal)
+            time_features = self.extract_time_features(conditioned)
+            
+            # Welch PSD and spectrogram, streamed segment by segment
+            spectrogram, welch_spectrum = self.compute_spectrogram(conditioned, sampling_rate)
+            
+            # Long captures use the Welch PSD; otherwise one real FFT per channel,
+            # shared by features and plots
+            if welch_spectrum is not None and self._use_welch(conditioned.shape[1]):
+                spectrum = welch_spectrum
+            else:
+                spectrum = self._spectral.spectrum(conditioned, sampling_rate)
             
-            # Extract frequency domain features
-            freq_features = self.extract_frequency_features(conditioned_signal, sampling_rate)
+            # Running speed and order spectra, searched in the shared spectrum
+            orders = self.extract_order_features(conditioned, sampling_rate, spectrum, channels, kinematics)
+            
+            # Extract frequency domain features; sidebands and order bands follow the running speed
+            running_speed = orders[0].get("running_speed_hz") if orders else None
+            band_set = band_set_name((kinematics or {}).get("type"), self.machine_band_sets)
+            freq_features = self.extract_frequency_features(
+                conditioned, sampling_rate, spectrum, running_speed, band_set
+            )
             
             # Generate plots data
-            plots_data = self.generate_plots_data(conditioned_signal, sampling_rate)
+            plots_data = self.generate_plots_data(conditioned[0], sampling_rate, spectrum=spectrum)
             
-            return {
-                "signal_length": len(conditioned_signal),
+            # Bearing defect frequencies follow the measured speed, not the nameplate
+            if kinematics and orders and orders[0].get("speed_source") in ("tach", "spectrum"):
+                kinematics = {**kinematics, "rpm": orders[0]["rpm"]}
+            
+            # Envelope analysis needs the resonance band the anti-aliasing stage removes
+            envelope = self.extract_envelope_features(signals, sampling_rate, kinematics)
+            
+            result = {
+                "signal_length": conditioned.shape[1],
                 "sampling_rate": sampling_rate,
-                "duration_seconds": len(conditioned_signal) / sampling_rate,
-                "time_features": time_features,
-                "frequency_features": freq_features,
+                "duration_seconds": conditioned.shape[1] / sampling_rate,
+                "time_features": time_features[0],
+                "frequency_features": freq_features[0],
                 "plots": plots_data,
+                "spectrogram": spectrogram,
                 "processing_status": "success"
             }
+            if orders is not None:
+                result["orders"] = orders[0]
+            if envelope is not None:
+                result["envelope"] = envelope[0]
+            
+            if conditioned.shape[0] > 1:
+                infos = channels or [{"name": f"ch{i}", "axis": None, "position": None} for i in range(conditioned.shape[0])]
+                result["channels"] = [
+                    {**info, "time_features": tf, "frequency_features": ff}
+                    for info, tf, ff in zip(infos, time_features, freq_features)
+                ]
+                for key, sections in (("orders", orders), ("envelope", envelope)):
+                    if sections is not None:
+                        for channel, section in zip(result["channels"], sections):
+                            channel[key] = section
+            
+            return result
             
         except Exception as e:
             return {
                 "processing_status": "error",
                 "error_message": str(e),
-                "signal_length": len(raw_signal) if raw_signal is not None else 0,
+                "signal_length": np.shape(raw_signal)[-1] if raw_signal is not None else 0,
                 "sampling_rate": sampling_rate
             }
     
-    def condition_signal(self, signal: np.ndarray, sampling_rate: float) -> np.ndarray:
-        """Apply basic signal conditioning"""
+    def _use_welch(self, n_samples: int) -> bool:
+        if self.spectral_mode == "auto":
+            return n_samples >= self.welch_min_samples
+        return self.spectral_mode == "welch"
+    
+    def compute_spectrogram(self, signal: np.ndarray, sampling_rate: float) -> Tuple[Dict[str, Any], Optional[Spectrum]]:
+        """
+        Welch PSD and decimated STFT spectrogram, fed to the accumulator in blocks
+        
+        Returns the "spectrogram" result section (first channel, power in dB)
+        and a Spectrum built from the Welch PSD of every channel. The Welch PSD
+        is rescaled to the full-FFT convention (psd = magnitude**2 / (fs * n))
+        so band energies and magnitudes stay comparable across modes.
+        """
         try:
-            # Remove DC component
-            signal = signal - np.mean(signal)
-            
-            # Apply high-pass filter to remove low-frequency noise
-            nyquist = sampling_rate / 2
-            high_cutoff = min(1.0, nyquist * 0.01)  # 1 Hz or 1% of Nyquist
+            signals = np.atleast_2d(signal)
+            n_samples = signals.shape[-1]
+            segment_length = min(self.segment_length, n_samples)
+            accumulator = StreamingSpectrogram(
+                sampling_rate,
+                segment_length=segment_length,
+                overlap=self.segment_overlap,
+                max_frames=self.spectrogram_max_frames,
+            )
+            block = segment_length * 32
+            for start in range(0, n_samples, block):
+                accumulator.feed(signals[:, start:start + block])
+            
+            times, frequencies, power = accumulator.spectrogram(self.spectrogram_max_bins)
+            welch_freqs, welch_psd = accumulator.welch(self.spectrogram_max_bins)
+            section = {
+                "segment_length": segment_length,
+                "overlap": self.segment_overlap,
+                "window": accumulator.window_name,
+                "frame_count": accumulator.n_frames,
+                "time": times.tolist(),
+                "frequency": frequencies.tolist(),
+                "power_db": (10 * np.log10(power[0] + 1e-20)).tolist(),
+                "welch_psd": welch_psd[0].tolist(),
+            }
             
-            if high_cutoff < nyquist:
-                sos = signal.butter(4, high_cutoff / nyquist, btype='high', output='sos')
-                signal = signal.sosfilt(sos, signal)
+            freqs, psd = accumulator.welch()
+            psd = psd[:, 1:] * (n_samples / (2.0 * segment_length))
+            welch_spectrum = Spectrum(
+                frequencies=freqs[1:],
+                magnitude=np.sqrt(psd * sampling_rate * n_samples),
+                psd=psd,
+                n_samples=n_samples,
+                n_fft=segment_length,
+                sampling_rate=sampling_rate,
+            )
+            return section, welch_spectrum
             
-            # Apply anti-aliasing filter
-            low_cutoff = min(nyquist * 0.8, 1000.0)  # 80% of Nyquist or 1kHz
-            if low_cutoff < nyquist:
-                sos = signal.butter(4, low_cutoff / nyquist, btype='low', output='sos')
-                signal = signal.sosfilt(sos, signal)
+        except Exception as e:
+            return {"error": f"Spectrogram computation failed: {str(e)}"}, None
+    
+    def filter_bank(self, sampling_rate: float) -> FilterBank:
+        """High-pass and anti-aliasing stages for a sampling rate, as one cached cascade"""
+        nyquist = sampling_rate / 2
+        stages = []
+        
+        # High-pass filter to remove low-frequency noise
+        high_cutoff = min(self.highpass_cutoff, nyquist * 0.01)  # 1 Hz or 1% of Nyquist
+        if high_cutoff < nyquist:
+            stages.append(("highpass", self.filter_order, high_cutoff))
+        
+        # Anti-aliasing filter
+        low_cutoff = min(nyquist * 0.8, self.lowpass_cutoff)  # 80% of Nyquist or 1kHz
+        if low_cutoff < nyquist:
+            stages.append(("lowpass", self.filter_order, low_cutoff))
+        
+        return FilterBank(stages, sampling_rate)
+    
+    def condition_signal(self, signal: np.ndarray, sampling_rate: float) -> np.ndarray:
+        """Apply basic signal conditioning along the last axis in one filtering pass"""
+        try:
+            # Remove DC component
+            signal = signal - np.mean(signal, axis=-1, keepdims=True)
             
-            return signal
+            return self.filter_bank(sampling_rate).apply(signal, zero_phase=self.zero_phase)
             
         except Exception:
             # If filtering fails, return original signal minus DC
-            return signal - np.mean(signal)
+            return signal - np.mean(signal, axis=-1, keepdims=True)
     
-    def extract_time_features(self, signal: np.ndarray) -> Dict[str, float]:
-        """Extract time domain features"""
+    def extract_time_features(self, signal: np.ndarray) -> Union[Dict[str, float], List[Dict[str, float]]]:
+        """
+        Extract time domain features
+        
+        A 1-D signal returns one feature dict; a channels-by-samples array
+        returns one dict per channel. All statistics come from one fused,
+        blocked pass (see stats_kernel).
+        """
         try:
-            features = {}
-            
-            # Basic statistical features
-            features['rms'] = float(np.sqrt(np.mean(signal**2)))
-            features['peak'] = float(np.max(np.abs(signal)))
-            features['peak_to_peak'] = float(np.ptp(signal))
-            features['mean'] = float(np.mean(signal))
-            features['std'] = float(np.std(signal))
-            features['variance'] = float(np.var(signal))
-            
-            # Shape factors
-            if features['rms'] > 0:
-                features['crest_factor'] = features['peak'] / features['rms']
-                features['form_factor'] = features['rms'] / np.mean(np.abs(signal)) if np.mean(np.abs(signal)) > 0 else 0
-            else:
-                features['crest_factor'] = 0
-                features['form_factor'] = 0
-            
-            # Higher order moments
-            if features['std'] > 0:
-                features['skewness'] = float(np.mean(((signal - features['mean']) / features['std'])**3))
-                features['kurtosis'] = float(np.mean(((signal - features['mean']) / features['std'])**4))
-            else:
-                features['skewness'] = 0
-                features['kurtosis'] = 0
+            features = time_features(signal)
+            return features[0] if np.ndim(signal) == 1 else features
             
-            # Impulse factor
-            if np.mean(np.abs(signal)) > 0:
-                features['impulse_factor'] = features['peak'] / np.mean(np.abs(signal))
-            else:
-                features['impulse_factor'] = 0
+        except Exception as e:
+            return {"error": f"Time feature extraction failed: {str(e)}"}
+    
+    def extract_order_features(
+        self,
+        signal: np.ndarray,
+        sampling_rate: float,
+        spectrum: Spectrum,
+        channels: Optional[List[Dict[str, Any]]] = None,
+        kinematics: Optional[Dict[str, Any]] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Order section for every channel, or None when order tracking is off"""
+        if self._orders is None:
+            return None
+        try:
+            return self._orders.analyze(np.atleast_2d(signal), sampling_rate, spectrum, channels, kinematics)
             
-            return features
+        except Exception as e:
+            return [{"error": f"Order analysis failed: {str(e)}"}] * np.atleast_2d(signal).shape[0]
+    
+    def extract_envelope_features(
+        self,
+        signal: np.ndarray,
+        sampling_rate: float,
+        kinematics: Optional[Dict[str, Any]] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Envelope section for every channel, or None when envelope analysis is off"""
+        if self._envelope is None:
+            return None
+        try:
+            return self._envelope.analyze(np.atleast_2d(signal), sampling_rate, kinematics)
             
         except Exception as e:
-            return {"error": f"Time feature extraction failed: {str(e)}"}
+            return [{"error": f"Envelope analysis failed: {str(e)}"}] * np.atleast_2d(signal).shape[0]
     
-    def extract_frequency_features(self, signal: np.ndarray, sampling_rate: float) -> Dict[str, Any]:
-        """Extract frequency domain features"""
+    def extract_frequency_features(
+        self,
+        signal: np.ndarray,
+        sampling_rate: float,
+        spectrum: Optional[Spectrum] = None,
+        running_speed: Optional[float] = None,
+        band_set: str = "default",
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Extract frequency domain features
+        
+        All channels share one batched real FFT along the last axis (pass a
+        precomputed spectrum to reuse it), one harmonic search and one band
+        energy pass; only peak picking runs per channel. With sidebands
+        configured and a running_speed in Hz, each harmonic also lists its
+        sidebands; band sets in orders are scaled by running_speed.
+        """
         try:
-            # Compute FFT
-            n = len(signal)
-            fft_values = fft(signal)
-            frequencies = fftfreq(n, 1/sampling_rate)
-            
-            # Take positive frequencies only
-            positive_freq_idx = frequencies > 0
-            frequencies = frequencies[positive_freq_idx]
-            magnitude = np.abs(fft_values[positive_freq_idx])
-            
-            # Power spectral density
-            psd = magnitude**2 / (sampling_rate * n)
-            
-            features = {}
-            
-            # Spectral features
-            features['spectral_centroid'] = float(np.sum(frequencies * magnitude) / np.sum(magnitude)) if np.sum(magnitude) > 0 else 0
-            features['spectral_rolloff'] = self._calculate_spectral_rolloff(frequencies, magnitude)
-            features['spectral_bandwidth'] = self._calculate_spectral_bandwidth(frequencies, magnitude, features['spectral_centroid'])
-            
-            # Peak detection
-            peaks, _ = signal.find_peaks(magnitude, height=np.max(magnitude) * 0.1)
-            if len(peaks) > 0:
-                # Dominant frequency
-                dominant_peak_idx = peaks[np.argmax(magnitude[peaks])]
-                features['dominant_frequency'] = float(frequencies[dominant_peak_idx])
-                features['dominant_magnitude'] = float(magnitude[dominant_peak_idx])
+            signals = np.atleast_2d(signal)
+            if spectrum is None:
+                spectrum = self._spectral.spectrum(signals, sampling_rate)
+            
+            # One-sided spectrum without the DC bin
+            frequencies = spectrum.frequencies
+            magnitude = spectrum.magnitude
+            psd = spectrum.psd
+            
+            # Spectral moments as matrix-vector products, vectorized over channels
+            total = np.sum(magnitude, axis=-1)
+            safe_total = np.where(total > 0, total, 1.0)
+            centroid = np.where(total > 0, magnitude @ frequencies / safe_total, 0.0)
+            second_moment = magnitude @ (frequencies * frequencies) / safe_total
+            bandwidth = np.where(total > 0, np.sqrt(np.maximum(second_moment - centroid**2, 0.0)), 0.0)
+            cumulative = np.cumsum(magnitude, axis=-1)
+            rolloff = frequencies[np.argmax(cumulative >= 0.85 * total[:, None], axis=-1)]
+            band_set, bands = self._analyze_frequency_bands(frequencies, psd, sampling_rate, band_set, running_speed)
+            
+            features_list = []
+            for c in range(signals.shape[0]):
+                features = {}
+                features['spectral_centroid'] = float(centroid[c])
+                features['spectral_rolloff'] = float(rolloff[c])
+                features['spectral_bandwidth'] = float(bandwidth[c])
                 
-                # Harmonic analysis (look for multiples of dominant frequency)
-                harmonics = self._find_harmonics(frequencies, magnitude, features['dominant_frequency'])
-                features['harmonics'] = harmonics
-            else:
-                features['dominant_frequency'] = 0
-                features['dominant_magnitude'] = 0
-                features['harmonics'] = []
+                # Peak detection
+                peaks, _ = sps.find_peaks(magnitude[c], height=np.max(magnitude[c]) * 0.1)
+                if len(peaks) > 0:
+                    # Dominant frequency
+                    dominant_peak_idx = peaks[np.argmax(magnitude[c][peaks])]
+                    features['dominant_frequency'] = float(frequencies[dominant_peak_idx])
+                    features['dominant_magnitude'] = float(magnitude[c][dominant_peak_idx])
+                else:
+                    features['dominant_frequency'] = 0
+                    features['dominant_magnitude'] = 0
+                
+                # Frequency band analysis
+                features['band_set'] = band_set
+                features['frequency_bands'] = {name: float(values[c]) for name, values in bands.items()}
+                features_list.append(features)
             
-            # Frequency band analysis
-            features['frequency_bands'] = self._analyze_frequency_bands(frequencies, psd, sampling_rate)
+            # Harmonic analysis (multiples of each channel's dominant frequency), all channels at once
+            family = self.find_harmonics(
+                frequencies, magnitude, np.array([f['dominant_frequency'] for f in features_list]), running_speed
+            )
+            for c, features in enumerate(features_list):
+                features['harmonics'] = family.harmonics(c)
             
-            return features
+            return features_list[0] if np.ndim(signal) == 1 else features_list
             
         except Exception as e:
             return {"error": f"Frequency feature extraction failed: {str(e)}"}
     
-    def _calculate_spectral_rolloff(self, frequencies: np.ndarray, magnitude: np.ndarray, rolloff_percent: float = 0.85) -> float:
-        """Calculate spectral rolloff frequency"""
-        try:
-            total_energy = np.sum(magnitude)
-            cumulative_energy = np.cumsum(magnitude)
-            rolloff_idx = np.where(cumulative_energy >= rolloff_percent * total_energy)[0]
-            if len(rolloff_idx) > 0:
-                return float(frequencies[rolloff_idx[0]])
-            return float(frequencies[-1])
-        except Exception:
-            return 0.0
-    
-    def _calculate_spectral_bandwidth(self, frequencies: np.ndarray, magnitude: np.ndarray, centroid: float) -> float:
-        """Calculate spectral bandwidth"""
-        try:
-            if np.sum(magnitude) > 0:
-                return float(np.sqrt(np.sum(((frequencies - centroid)**2) * magnitude) / np.sum(magnitude)))
-            return 0.0
-        except Exception:
-            return 0.0
-    
-    def _find_harmonics(self, frequencies: np.ndarray, magnitude: np.ndarray, fundamental_freq: float, max_harmonics: int = 5) -> list:
-        """Find harmonic frequencies"""
-        harmonics = []
-        try:
-            for i in range(2, max_harmonics + 1):
-                harmonic_freq = fundamental_freq * i
-                # Find closest frequency bin
-                idx = np.argmin(np.abs(frequencies - harmonic_freq))
-                if np.abs(frequencies[idx] - harmonic_freq) < fundamental_freq * 0.1:  # Within 10% tolerance
-                    harmonics.append({
-                        "order": i,
-                        "frequency": float(frequencies[idx]),
-                        "magnitude": float(magnitude[idx])
-                    })
-        except Exception:
-            pass
-        return harmonics
+    def find_harmonics(
+        self,
+        frequencies: np.ndarray,
+        magnitude: np.ndarray,
+        fundamental: np.ndarray,
+        sideband_spacing: Optional[float] = None,
+    ):
+        """Harmonics 2..max_harmonics of each channel's fundamental, within 10% of it"""
+        sidebands = self.sidebands if sideband_spacing else 0
+        return find_family(
+            frequencies, magnitude, fundamental,
+            n_harmonics=self.max_harmonics, first=2,
+            sidebands=sidebands, spacing=sideband_spacing, tolerance=0.1,
+        )
     
-    def _analyze_frequency_bands(self, frequencies: np.ndarray, psd: np.ndarray, sampling_rate: float) -> Dict[str, float]:
-        """Analyze energy in different frequency bands"""
+    def _analyze_frequency_bands(
+        self,
+        frequencies: np.ndarray,
+        psd: np.ndarray,
+        sampling_rate: float,
+        band_set: str = "default",
+        running_speed: Optional[float] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Energy in every band of a band set; psd may hold one row per channel
+        
+        Returns the set actually used: unknown sets, and sets in orders
+        without a running speed, fall back to "default".
+        """
+        if band_set not in self._bands or (self._bands[band_set][0] == "order" and not running_speed):
+            band_set = "default"
         try:
-            bands = {}
-            
-            # Define frequency bands (adjust based on typical machinery frequencies)
-            band_definitions = {
-                "low_freq": (0, min(10, sampling_rate/4)),
-                "bearing_freq": (10, min(1000, sampling_rate/4)),
-                "gear_mesh": (1000, min(5000, sampling_rate/4)),
-                "high_freq": (5000, sampling_rate/2)
-            }
+            unit, names, lows, highs = self._bands[band_set]
+            if unit == "order":
+                lows, highs = lows * running_speed, highs * running_speed
             
-            for band_name, (low_freq, high_freq) in band_definitions.items():
-                band_mask = (frequencies >= low_freq) & (frequencies <= high_freq)
-                if np.any(band_mask):
-                    bands[f"{band_name}_energy"] = float(np.sum(psd[band_mask]))
-                else:
-                    bands[f"{band_name}_energy"] = 0.0
+            # Clip configured bands to the signal's frequency range
+            highs = np.where(np.isinf(highs), sampling_rate / 2, np.minimum(highs, sampling_rate / 4))
             
-            return bands
+            energies = band_energies(frequencies, psd, lows, highs)
+            return band_set, {f"{name}_energy": energies[..., i] for i, name in enumerate(names)}
             
         except Exception:
-            return {}
+            return band_set, {}
     
-    def generate_plots_data(self, signal: np.ndarray, sampling_rate: float, max_points: int = 1000) -> Dict[str, Any]:
-        """Generate data for plotting"""
+    def generate_plots_data(
+        self,
+        signal: np.ndarray,
+        sampling_rate: float,
+        max_points: int = 1000,
+        spectrum: Optional[Spectrum] = None,
+    ) -> Dict[str, Any]:
+        """Generate data for plotting; the frequency plot reuses the first row of spectrum"""
         try:
             plots = {}
             
@@ -257,26 +503,26 @@ class SignalProcessor:
             }
             
             # Frequency domain plot
-            n_fft = min(len(signal), 2048)  # Limit FFT size for performance
-            fft_values = fft(signal[:n_fft])
-            frequencies = fftfreq(n_fft, 1/sampling_rate)
-            
-            # Take positive frequencies only
-            positive_freq_idx = frequencies > 0
-            freq_plot = frequencies[positive_freq_idx]
-            magnitude_plot = np.abs(fft_values[positive_freq_idx])
+            if spectrum is None:
+                spectrum = self._spectral.spectrum(signal, sampling_rate)
             
             # Limit frequency range for plotting
             max_freq = min(sampling_rate/2, 1000)  # Up to 1kHz or Nyquist
-            freq_mask = freq_plot <= max_freq
+            n_bins = int(np.searchsorted(spectrum.frequencies, max_freq, side='right'))
+            
+            # Keep the largest bin of each group so peaks survive downsampling
+            step = max(1, -(-n_bins // max_points))
+            starts = np.arange(0, n_bins, step)
+            freq_plot = spectrum.frequencies[starts]
+            magnitude_plot = np.maximum.reduceat(spectrum.magnitude[0, :n_bins], starts) if n_bins else starts[:0]
             
             plots['frequency_domain'] = {
-                "frequency": freq_plot[freq_mask].tolist(),
-                "magnitude": magnitude_plot[freq_mask].tolist(),
+                "frequency": freq_plot.tolist(),
+                "magnitude": magnitude_plot.tolist(),
                 "max_frequency": max_freq
             }
             
             return plots
             
         except Exception as e:
-            return {"error": f"Plot generation failed: {str(e)}"}
\ No newline at end of file
+            return {"error": f"Plot generation failed: {str(e)}"}
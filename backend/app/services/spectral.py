@@ -0,0 +1,232 @@
+"""
+Shared real-FFT spectral engine
+
+One rfft per signal feeds both feature extraction and plotting. Transform
+lengths are padded to sizes the FFT backend handles quickly and frequency
+axes are cached per (length, rate). Callers that transform many records of
+the same shape can pass their own magnitude/PSD buffers to avoid allocating.
+
+StreamingSpectrogram covers long captures: Welch PSD and a decimated STFT
+computed segment by segment with memory bounded by the segment size.
+"""
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import fft as sp_fft
+from scipy.signal import get_window
+
+
+def fast_length(n: int) -> int:
+    """Smallest length >= n that the real FFT handles efficiently"""
+    return sp_fft.next_fast_len(max(int(n), 1), real=True)
+
+
+@lru_cache(maxsize=64)
+def frequency_axis(n_fft: int, sampling_rate: float) -> np.ndarray:
+    """Read-only rfftfreq axis for an n_fft transform, shared between calls"""
+    axis = sp_fft.rfftfreq(n_fft, 1.0 / sampling_rate)
+    axis.flags.writeable = False
+    return axis
+
+
+class Spectrum:
+    """
+    One-sided spectrum of one or more channels, DC bin excluded
+
+    magnitude and psd have shape (channels, bins). They are new arrays unless
+    the caller passed buffers to SpectralEngine.spectrum.
+    """
+
+    __slots__ = ("frequencies", "magnitude", "psd", "n_samples", "n_fft", "sampling_rate")
+
+    def __init__(self, frequencies, magnitude, psd, n_samples, n_fft, sampling_rate) -> None:
+        self.frequencies = frequencies
+        self.magnitude = magnitude
+        self.psd = psd
+        self.n_samples = n_samples
+        self.n_fft = n_fft
+        self.sampling_rate = sampling_rate
+
+
+class SpectralEngine:
+    """Computes spectra with cached frequency axes"""
+
+    def __init__(self, pad_to_fast_length: bool = True) -> None:
+        self.pad_to_fast_length = pad_to_fast_length
+
+    def transform_length(self, n_samples: int) -> int:
+        return fast_length(n_samples) if self.pad_to_fast_length else n_samples
+
+    def spectrum(
+        self,
+        signals: np.ndarray,
+        sampling_rate: float,
+        n_fft: Optional[int] = None,
+        out: Optional[Sequence[np.ndarray]] = None,
+    ) -> Spectrum:
+        """
+        Real FFT of every row of signals (or of a 1-D signal) along the last axis
+
+        Zero padding to a fast length refines the bin spacing slightly but does
+        not add energy; the PSD is normalized by the original sample count.
+        out, a (magnitude, psd) pair of float64 arrays shaped (channels, bins),
+        receives the result in place of new arrays.
+        """
+        rows = np.atleast_2d(signals)
+        n_samples = rows.shape[-1]
+        n_fft = n_fft or self.transform_length(n_samples)
+
+        spec = sp_fft.rfft(rows, n=n_fft, axis=-1)[:, 1:]
+        if out is None:
+            magnitude, psd = np.empty(spec.shape), np.empty(spec.shape)
+        else:
+            magnitude, psd = out
+            if magnitude.shape != spec.shape or psd.shape != spec.shape:
+                raise ValueError(f"Spectrum buffers must have shape {spec.shape}")
+        np.abs(spec, out=magnitude)
+        np.multiply(magnitude, magnitude, out=psd)
+        psd *= 1.0 / (sampling_rate * n_samples)
+
+        return Spectrum(
+            frequencies=frequency_axis(n_fft, float(sampling_rate))[1:],
+            magnitude=magnitude,
+            psd=psd,
+            n_samples=n_samples,
+            n_fft=n_fft,
+            sampling_rate=sampling_rate,
+        )
+
+
+_engine: Optional[SpectralEngine] = None
+
+
+def get_spectral_engine() -> SpectralEngine:
+    """Return the shared spectral engine, creating it on first use"""
+    global _engine
+    if _engine is None:
+        _engine = SpectralEngine()
+    return _engine
+
+
+class StreamingSpectrogram:
+    """
+    Welch PSD and decimated STFT spectrogram accumulated block by block
+
+    Feed consecutive blocks of a (channels, samples) signal; only the tail of
+    the previous block that starts an unfinished segment is carried over.
+    Spectrogram frames are averaged into at most max_frames columns: when the
+    columns fill up, neighbours are merged pairwise and each column then
+    covers twice as many frames. Memory is therefore bounded by segment
+    length and max_frames, independent of the capture length.
+    """
+
+    def __init__(
+        self,
+        sampling_rate: float,
+        segment_length: int = 1024,
+        overlap: float = 0.5,
+        window: str = "hann",
+        max_frames: int = 128,
+    ) -> None:
+        if not 0 <= overlap < 1:
+            raise ValueError("overlap must be in [0, 1)")
+        self.sampling_rate = float(sampling_rate)
+        self.segment_length = int(segment_length)
+        self.step = max(1, int(round(self.segment_length * (1 - overlap))))
+        self.window_name = window
+        self.max_frames = max(2, int(max_frames) // 2 * 2)
+        self._window = get_window(window, self.segment_length)
+        # Density scaling, as scipy.signal.welch(scaling="density")
+        self._scale = 1.0 / (self.sampling_rate * np.sum(self._window ** 2))
+        self._carry: Optional[np.ndarray] = None
+        self._welch_sum: Optional[np.ndarray] = None
+        self._columns: Optional[np.ndarray] = None
+        self._column_counts = np.zeros(self.max_frames, dtype=np.int64)
+        self._n_columns = 0
+        self._frames_per_column = 1
+        self.n_frames = 0
+
+    @property
+    def frequencies(self) -> np.ndarray:
+        return frequency_axis(self.segment_length, self.sampling_rate)
+
+    def feed(self, block: np.ndarray) -> None:
+        """Consume the next block of samples (1-D or channels-by-samples)"""
+        block = np.atleast_2d(block)
+        data = block if self._carry is None else np.concatenate([self._carry, block], axis=-1)
+        n_segments = (data.shape[-1] - self.segment_length) // self.step + 1
+        if n_segments <= 0:
+            self._carry = data
+            return
+
+        frames = np.lib.stride_tricks.sliding_window_view(data, self.segment_length, axis=-1)[:, ::self.step][:, :n_segments]
+        frames = (frames - frames.mean(axis=-1, keepdims=True)) * self._window
+        power = np.abs(sp_fft.rfft(frames, axis=-1)) ** 2
+        power *= self._scale
+        # One-sided: double everything except DC and (for even lengths) Nyquist
+        last = -1 if self.segment_length % 2 == 0 else None
+        power[..., 1:last] *= 2
+
+        if self._welch_sum is None:
+            self._welch_sum = np.zeros((power.shape[0], power.shape[-1]))
+            self._columns = np.zeros((power.shape[0], self.max_frames, power.shape[-1]))
+        self._welch_sum += power.sum(axis=1)
+        self._add_frames(power)
+        self.n_frames += n_segments
+        self._carry = data[:, n_segments * self.step:].copy()
+
+    def welch(self, max_bins: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(frequencies, psd) averaged over all complete segments; psd is (channels, bins)"""
+        if self.n_frames == 0:
+            raise ValueError("Signal is shorter than one segment")
+        return self._decimate_bins(self.frequencies, self._welch_sum / self.n_frames, max_bins)
+
+    def spectrogram(self, max_bins: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (times, frequencies, power) with power shaped (channels, columns, bins)
+
+        Times are column centres in seconds. With max_bins, neighbouring
+        frequency bins are averaged so at most max_bins remain.
+        """
+        if self.n_frames == 0:
+            raise ValueError("Signal is shorter than one segment")
+        counts = self._column_counts[:self._n_columns]
+        power = self._columns[:, :self._n_columns] / counts[:, None]
+        first_frame = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        centre_frame = first_frame + (counts - 1) / 2.0
+        times = (centre_frame * self.step + self.segment_length / 2.0) / self.sampling_rate
+        frequencies, power = self._decimate_bins(self.frequencies, power, max_bins)
+        return times, frequencies, power
+
+    @staticmethod
+    def _decimate_bins(frequencies: np.ndarray, power: np.ndarray, max_bins: Optional[int]):
+        """Average neighbouring frequency bins so at most max_bins remain"""
+        if not max_bins or len(frequencies) <= max_bins:
+            return frequencies, power
+        starts = np.arange(0, len(frequencies), -(-len(frequencies) // max_bins))
+        widths = np.diff(np.append(starts, len(frequencies)))
+        return np.add.reduceat(frequencies, starts) / widths, np.add.reduceat(power, starts, axis=-1) / widths
+
+    def _add_frames(self, power: np.ndarray) -> None:
+        index = 0
+        n = power.shape[1]
+        while index < n:
+            if self._n_columns == 0 or self._column_counts[self._n_columns - 1] >= self._frames_per_column:
+                if self._n_columns == self.max_frames:
+                    self._merge_columns()
+                self._n_columns += 1
+            column = self._n_columns - 1
+            take = min(n - index, self._frames_per_column - self._column_counts[column])
+            self._columns[:, column] += power[:, index:index + take].sum(axis=1)
+            self._column_counts[column] += take
+            index += take
+
+    def _merge_columns(self) -> None:
+        half = self.max_frames // 2
+        self._columns[:, :half] = self._columns[:, 0::2] + self._columns[:, 1::2]
+        self._columns[:, half:] = 0
+        self._column_counts[:half] = self._column_counts[0::2] + self._column_counts[1::2]
+        self._column_counts[half:] = 0
+        self._n_columns = half
+        self._frames_per_column *= 2
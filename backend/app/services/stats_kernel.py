@@ -0,0 +1,142 @@
+"""
+Fused, mergeable time-domain statistics
+
+RunningMoments walks a (channels, samples) signal in cache-sized blocks and
+keeps count, extremes, mean |x| and the central moments M2..M4 per channel.
+Each block is reduced with two passes over reusable scratch buffers, and
+block results are combined with the pairwise update formulas of Chan et al.
+and Pébay, so the same object serves whole recordings, chunked files and
+live streams.
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+# 8192 float64 samples = 64 KiB per channel row, comfortably inside L2
+DEFAULT_BLOCK_SIZE = 8192
+
+
+class RunningMoments:
+    """Per-channel streaming moments; update() with blocks, read features()"""
+
+    def __init__(self, n_channels: int = 1, block_size: int = DEFAULT_BLOCK_SIZE) -> None:
+        self.n_channels = n_channels
+        self.block_size = block_size
+        self.count = 0
+        self.mean = np.zeros(n_channels)
+        self.m2 = np.zeros(n_channels)
+        self.m3 = np.zeros(n_channels)
+        self.m4 = np.zeros(n_channels)
+        self.sum_abs = np.zeros(n_channels)
+        self.maximum = np.full(n_channels, -np.inf)
+        self.minimum = np.full(n_channels, np.inf)
+        self._scratch: Optional[np.ndarray] = None
+
+    def update(self, samples: np.ndarray) -> "RunningMoments":
+        """Fold a 1-D or (channels, samples) block into the running statistics"""
+        rows = np.atleast_2d(samples)
+        if rows.shape[0] != self.n_channels:
+            raise ValueError(f"Expected {self.n_channels} channels, got {rows.shape[0]}")
+        for start in range(0, rows.shape[1], self.block_size):
+            self._update_block(rows[:, start:start + self.block_size])
+        return self
+
+    def merge(self, other: "RunningMoments") -> "RunningMoments":
+        """Combine with statistics gathered over a disjoint part of the signal"""
+        if other.count == 0:
+            return self
+        self._combine(other.count, other.mean, other.m2, other.m3, other.m4)
+        self.sum_abs += other.sum_abs
+        np.maximum(self.maximum, other.maximum, out=self.maximum)
+        np.minimum(self.minimum, other.minimum, out=self.minimum)
+        return self
+
+    def features(self) -> List[Dict[str, float]]:
+        """Time-domain features per channel, as SignalProcessor.extract_time_features"""
+        if self.count == 0:
+            raise ValueError("No samples accumulated")
+        n = self.count
+        variance = self.m2 / n
+        std = np.sqrt(variance)
+        rms = np.sqrt(variance + self.mean ** 2)
+        mean_abs = self.sum_abs / n
+        peak = np.maximum(np.abs(self.maximum), np.abs(self.minimum))
+        has_spread = variance > 0
+        safe_var = np.where(has_spread, variance, 1.0)
+
+        columns = {
+            "rms": rms,
+            "peak": peak,
+            "peak_to_peak": self.maximum - self.minimum,
+            "mean": self.mean,
+            "std": std,
+            "variance": variance,
+            "crest_factor": np.divide(peak, rms, out=np.zeros_like(rms), where=rms > 0),
+            "form_factor": np.divide(rms, mean_abs, out=np.zeros_like(rms), where=(rms > 0) & (mean_abs > 0)),
+            "skewness": np.where(has_spread, self.m3 / n / safe_var ** 1.5, 0.0),
+            "kurtosis": np.where(has_spread, self.m4 / n / safe_var ** 2, 0.0),
+            "impulse_factor": np.divide(peak, mean_abs, out=np.zeros_like(peak), where=mean_abs > 0),
+        }
+        return [
+            {name: float(values[i]) for name, values in columns.items()}
+            for i in range(self.n_channels)
+        ]
+
+    def _update_block(self, block: np.ndarray) -> None:
+        n_b = block.shape[1]
+        if n_b == 0:
+            return
+        centered, squared = self._buffers(n_b)
+
+        # Pass 1: location and extremes
+        mean_b = block.mean(axis=1)
+        np.maximum(self.maximum, block.max(axis=1), out=self.maximum)
+        np.minimum(self.minimum, block.min(axis=1), out=self.minimum)
+
+        # Pass 2: central moments and |x| from the same scratch rows
+        np.subtract(block, mean_b[:, None], out=centered)
+        np.multiply(centered, centered, out=squared)
+        m2_b = squared.sum(axis=1)
+        m3_b = np.einsum("ij,ij->i", squared, centered)
+        m4_b = np.einsum("ij,ij->i", squared, squared)
+        np.abs(block, out=centered)
+        self.sum_abs += centered.sum(axis=1)
+
+        self._combine(n_b, mean_b, m2_b, m3_b, m4_b)
+
+    def _combine(self, n_b: int, mean_b, m2_b, m3_b, m4_b) -> None:
+        n_a = self.count
+        if n_a == 0:
+            self.count = n_b
+            self.mean, self.m2, self.m3, self.m4 = (np.array(v, dtype=float) for v in (mean_b, m2_b, m3_b, m4_b))
+            return
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        delta_n = delta / n
+        m2_a, m3_a = self.m2, self.m3
+        self.m4 = (
+            self.m4 + m4_b
+            + delta * delta_n ** 3 * n_a * n_b * (n_a * n_a - n_a * n_b + n_b * n_b)
+            + 6 * delta_n ** 2 * (n_a * n_a * m2_b + n_b * n_b * m2_a)
+            + 4 * delta_n * (n_a * m3_b - n_b * m3_a)
+        )
+        self.m3 = (
+            m3_a + m3_b
+            + delta * delta_n ** 2 * n_a * n_b * (n_a - n_b)
+            + 3 * delta_n * (n_a * m2_b - n_b * m2_a)
+        )
+        self.m2 = m2_a + m2_b + delta * delta_n * n_a * n_b
+        self.mean = self.mean + delta_n * n_b
+        self.count = n
+
+    def _buffers(self, n_b: int):
+        if self._scratch is None or self._scratch.shape[2] < n_b:
+            self._scratch = np.empty((2, self.n_channels, n_b))
+        return self._scratch[0, :, :n_b], self._scratch[1, :, :n_b]
+
+
+def time_features(signals: np.ndarray, block_size: int = DEFAULT_BLOCK_SIZE) -> List[Dict[str, float]]:
+    """One-shot features for every row of a (channels, samples) array"""
+    rows = np.atleast_2d(signals)
+    return RunningMoments(rows.shape[0], block_size).update(rows).features()
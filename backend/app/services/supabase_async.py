@@ -0,0 +1,207 @@
+"""
+Async Supabase access over a pooled HTTP client
+
+AsyncSupabaseService talks to PostgREST and Storage with one httpx
+AsyncClient per event loop: connections are kept alive and reused, the pool
+size is capped, and a semaphore bounds the number of requests in flight, so
+async handlers await I/O instead of blocking the event loop and concurrent
+requests share warm connections.
+
+Sync code reaches the same implementation through run_sync(), which runs
+coroutines on a dedicated background loop thread. When Supabase is not
+configured the service falls back to the sync local-database path in a
+worker thread.
+"""
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, AsyncIterator, Coroutine, Dict, List, Optional, TypeVar
+
+import anyio
+import httpx
+
+from ..core.config import settings
+
+
+T = TypeVar("T")
+
+
+def supabase_configured() -> bool:
+    return bool(settings.supabase_url and settings.supabase_service_key)
+
+
+def _remote_enabled() -> bool:
+    # Follow SupabaseService, which runs on the local database whenever its client can't be created
+    from .supabase_service import SupabaseService
+
+    return SupabaseService()._client is not None
+
+
+class AsyncSupabaseService:
+    """Non-blocking counterpart of SupabaseService for the record and storage calls"""
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, remote: bool = True) -> None:
+        self._http = client
+        self._remote = remote
+        self._limit = asyncio.Semaphore(settings.supabase_max_concurrency)
+
+    @property
+    def configured(self) -> bool:
+        """Whether records and files go to Supabase rather than the local fallback"""
+        return self._http is not None and self._remote
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+
+    async def get_vibration_record(self, record_id: str) -> Optional[Dict[str, Any]]:
+        if not self.configured:
+            return await self._local("get_vibration_record", record_id)
+        rows = await self._select("vibration_records", {"select": "*", "id": f"eq.{record_id}"})
+        return rows[0] if rows else None
+
+    async def create_vibration_record_from_dict(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.configured:
+            return await self._local("create_vibration_record_from_dict", payload)
+        timestamp = payload["timestamp"]
+        rows = await self._insert("vibration_records", {
+            "sensor_id": payload["sensor_id"],
+            "file_path": payload["file_path"],
+            "timestamp": timestamp.isoformat() if hasattr(timestamp, "isoformat") else timestamp,
+            "status": payload.get("status", "unprocessed"),
+            "uploaded_by": payload.get("uploaded_by"),
+        })
+        if not rows:
+            raise RuntimeError("Failed to insert vibration record into Supabase")
+        return rows[0]
+
+    async def create_sensor(self, machine_id: str, position: str, axis: str, sampling_rate: float) -> str:
+        if not self.configured:
+            raise RuntimeError("Supabase client is not configured")
+        rows = await self._insert("sensors", {
+            "machine_id": machine_id,
+            "position": position,
+            "axis": axis,
+            "sampling_rate": sampling_rate,
+        })
+        if not rows:
+            raise RuntimeError("failed to insert sensor")
+        return rows[0]["id"]
+
+    async def upload_storage_file(self, storage_path: str, content: bytes | str, content_type: str = "text/csv") -> None:
+        """Upload bytes, or stream a local file from disk when given its path"""
+        if not self.configured:
+            raise RuntimeError("Supabase client is not configured")
+        headers = {"Content-Type": content_type, "x-upsert": "true"}
+        if isinstance(content, str):
+            headers["Content-Length"] = str(os.path.getsize(content))
+            body: Any = _file_chunks(content, settings.upload_chunk_size)
+        else:
+            body = content
+        url = f"/storage/v1/object/{settings.supabase_bucket}/{storage_path}"
+        async with self._limit:
+            resp = await self._http.post(url, content=body, headers=headers)
+        if resp.status_code >= 400:
+            raise RuntimeError(f"Upload failed: {resp.text}")
+
+    async def get_auth_user(self, token: str) -> Optional[Dict[str, Any]]:
+        """The user a Supabase access token belongs to, None if the token is rejected"""
+        if self._http is None:
+            raise RuntimeError("Supabase client is not configured")
+        async with self._limit:
+            resp = await self._http.get("/auth/v1/user", headers={"Authorization": f"Bearer {token}"})
+        if resp.status_code != 200:
+            return None
+        return resp.json()
+
+    async def _select(self, table: str, params: Any) -> List[Dict[str, Any]]:
+        async with self._limit:
+            resp = await self._http.get(f"/rest/v1/{table}", params=params)
+        resp.raise_for_status()
+        return resp.json()
+
+    async def _insert(self, table: str, row: Dict[str, Any]) -> List[Dict[str, Any]]:
+        async with self._limit:
+            resp = await self._http.post(
+                f"/rest/v1/{table}", json=row, headers={"Prefer": "return=representation"}
+            )
+        resp.raise_for_status()
+        return resp.json()
+
+    @staticmethod
+    async def _local(method: str, *args: Any) -> Any:
+        # The local database is synchronous; keep it off the event loop
+        from .supabase_service import SupabaseService
+
+        return await anyio.to_thread.run_sync(lambda: getattr(SupabaseService(), method)(*args))
+
+
+async def _file_chunks(path: str, chunk_size: int) -> AsyncIterator[bytes]:
+    async with await anyio.open_file(path, "rb") as f:
+        while True:
+            chunk = await f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _new_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=settings.supabase_url.rstrip("/"),
+        headers={
+            "apikey": settings.supabase_service_key,
+            "Authorization": f"Bearer {settings.supabase_service_key}",
+        },
+        limits=httpx.Limits(
+            max_connections=settings.supabase_http_max_connections,
+            max_keepalive_connections=settings.supabase_http_max_connections,
+        ),
+        timeout=settings.supabase_http_timeout,
+    )
+
+
+# httpx async clients are bound to the loop that created them
+_services: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncSupabaseService]" = weakref.WeakKeyDictionary()
+
+
+def get_async_supabase() -> AsyncSupabaseService:
+    """Return the service for the running event loop, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    service = _services.get(loop)
+    if service is None:
+        service = AsyncSupabaseService(
+            _new_http_client() if supabase_configured() else None,
+            remote=_remote_enabled(),
+        )
+        _services[loop] = service
+    return service
+
+
+async def close_async_supabase() -> None:
+    """Close the running loop's pooled client"""
+    service = _services.pop(asyncio.get_running_loop(), None)
+    if service is not None:
+        await service.aclose()
+
+
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_lock = threading.Lock()
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on the shared background loop and wait for its result"""
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="supabase-async", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop).result()
+
+
+def call_sync(method: str, *args: Any, **kwargs: Any) -> Any:
+    """Call an AsyncSupabaseService method from sync code"""
+    async def call() -> Any:
+        return await getattr(get_async_supabase(), method)(*args, **kwargs)
+
+    return run_sync(call())
@@ -1,6 +1,11 @@
 from typing import Tuple, Any, Dict, List, Optional
 from ..core.config import settings
+from .local_db import get_local_db
+from .local_storage import LocalStorage
+from .supabase_async import call_sync
+from .write_buffer import WriteBehindBuffer
 import datetime as _dt
+import uuid
 
 try:
     from supabase import create_client, Client  # type: ignore
@@ -9,11 +14,14 @@ except Exception:  # pragma: no cover
     Client = None  # type: ignore
 
 
+def _as_utc(value: _dt.datetime) -> _dt.datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=_dt.timezone.utc)
+    return value.astimezone(_dt.timezone.utc)
+
+
 class SupabaseService:
     _instance = None
-    _local_records = {}
-    _local_diagnoses = {}
-    _local_fault_detections = {}
     
     def __new__(cls):
         if cls._instance is None:
@@ -44,6 +52,33 @@ class SupabaseService:
                 print(f"Failed to initialize Supabase client: {e}")
                 # For development, allow fallback to None client
                 self._client = None
+        
+        # Diagnosis results are written behind in bulk unless batching is disabled
+        self._writes: Optional[WriteBehindBuffer] = None
+        if self._client is not None and settings.supabase_write_batch_rows > 0:
+            self._writes = WriteBehindBuffer(
+                self._client,
+                max_rows=settings.supabase_write_batch_rows,
+                flush_interval=settings.supabase_write_flush_seconds,
+                max_retries=settings.supabase_write_retries,
+                spool_path=settings.supabase_write_spool_path,
+            )
+
+    def flush_writes(self) -> None:
+        """Send buffered diagnosis writes now"""
+        if self._writes is not None:
+            self._writes.flush()
+
+    def close_writes(self) -> None:
+        """Flush buffered writes and stop the background flusher"""
+        if self._writes is not None:
+            self._writes.close()
+            self._writes = None
+
+    def write_stats(self) -> Dict[str, Any]:
+        if self._writes is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._writes.stats()}
 
     def create_signed_upload_url(self, file_name: str, content_type: str) -> Tuple[str, str]:
         raise NotImplementedError("Supabase signed upload URL (Python) not implemented")
@@ -64,11 +99,8 @@ class SupabaseService:
 
     def create_vibration_record_from_dict(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         if self._client is None:
-            # Fallback to in-memory storage for development
-            import uuid
-            record_id = str(uuid.uuid4())
+            # Fallback to the embedded local database for development
             record = {
-                "id": record_id,
                 "sensor_id": payload["sensor_id"],
                 "file_path": payload["file_path"],
                 "timestamp": payload["timestamp"].isoformat() if hasattr(payload["timestamp"], "isoformat") else payload["timestamp"],
@@ -76,29 +108,57 @@ class SupabaseService:
                 "uploaded_by": payload.get("uploaded_by"),
                 "created_at": payload.get("timestamp", "2025-01-21T12:00:00Z")
             }
-            # Store in a simple in-memory dict for development
-            SupabaseService._local_records[record_id] = record
-            return record
-            
-        to_insert = {
-            "sensor_id": payload["sensor_id"],
-            "file_path": payload["file_path"],
-            "timestamp": payload["timestamp"].isoformat() if hasattr(payload["timestamp"], "isoformat") else payload["timestamp"],
-            "status": payload.get("status", "unprocessed"),
-            "uploaded_by": payload.get("uploaded_by"),
-        }
-        resp = self._client.table("vibration_records").insert(to_insert).execute()
-        if getattr(resp, "data", None):
-            return resp.data[0]
-        raise RuntimeError("Failed to insert vibration record into Supabase")
+            if payload.get("file_name"):
+                record["file_name"] = payload["file_name"]
+            return get_local_db().put_record(record)
+        return call_sync("create_vibration_record_from_dict", payload)
 
     def get_vibration_record(self, record_id: str) -> Optional[Dict[str, Any]]:
         if self._client is None:
             # Fallback to local storage
-            return SupabaseService._local_records.get(record_id)
-            
-        resp = self._client.table("vibration_records").select("*").eq("id", record_id).single().execute()
-        return getattr(resp, "data", None)
+            return get_local_db().get_record(record_id)
+        return call_sync("get_vibration_record", record_id)
+
+    def list_vibration_records(
+        self,
+        machine_id: Optional[str] = None,
+        start_time: Optional[_dt.datetime] = None,
+        end_time: Optional[_dt.datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """List vibration records for a machine and/or measurement time range"""
+        if self._client is None:
+            # Fallback to local storage, filtered on indexed columns
+            return get_local_db().list_records(machine_id=machine_id, start_time=start_time, end_time=end_time)
+
+        query = self._records_query("*", machine_id, None, start_time, end_time)
+        if query is None:
+            return []
+        resp = query.order("timestamp").execute()
+        return getattr(resp, "data", None) or []
+
+    def _records_query(
+        self,
+        select: str,
+        machine_id: Optional[str],
+        status: Optional[str],
+        start_time: Optional[_dt.datetime],
+        end_time: Optional[_dt.datetime],
+    ):
+        """Filtered vibration_records query, or None when the machine has no sensors"""
+        query = self._client.table("vibration_records").select(select)
+        if machine_id:
+            sensors = self._client.table("sensors").select("id").eq("machine_id", machine_id).execute()
+            sensor_ids = [s["id"] for s in (getattr(sensors, "data", None) or [])]
+            if not sensor_ids:
+                return None
+            query = query.in_("sensor_id", sensor_ids)
+        if status:
+            query = query.eq("status", status)
+        if start_time:
+            query = query.gte("timestamp", _as_utc(start_time).isoformat())
+        if end_time:
+            query = query.lte("timestamp", _as_utc(end_time).isoformat())
+        return query
 
     def get_sensor(self, sensor_id: str) -> Optional[Dict[str, Any]]:
         if self._client is None:
@@ -106,6 +166,25 @@ class SupabaseService:
         resp = self._client.table("sensors").select("*").eq("id", sensor_id).single().execute()
         return getattr(resp, "data", None)
 
+    def get_record_machine_id(self, record: Dict[str, Any]) -> Optional[str]:
+        """
+        Machine a vibration record belongs to
+        
+        Local records carry machine_id; Supabase rows only name their sensor,
+        whose machine_id is looked up. None when neither is known.
+        """
+        if record.get("machine_id"):
+            return record["machine_id"]
+        sensor_id = record.get("sensor_id")
+        if self._client is None or not sensor_id:
+            return None
+        try:
+            sensor = self.get_sensor(sensor_id)
+        except Exception as e:
+            print(f"Failed to look up sensor {sensor_id}: {e}")
+            return None
+        return (sensor or {}).get("machine_id")
+
     def create_machine(self, name: str, type_: str, location: str | None = None) -> str:
         if self._client is None:
             raise RuntimeError("Supabase client is not configured")
@@ -119,17 +198,7 @@ class SupabaseService:
     def create_sensor(self, machine_id: str, position: str, axis: str, sampling_rate: float) -> str:
         if self._client is None:
             raise RuntimeError("Supabase client is not configured")
-        payload = {
-            "machine_id": machine_id,
-            "position": position,
-            "axis": axis,
-            "sampling_rate": sampling_rate,
-        }
-        resp = self._client.table("sensors").insert(payload).execute()
-        data = getattr(resp, "data", None)
-        if not data:
-            raise RuntimeError("failed to insert sensor")
-        return data[0]["id"]
+        return call_sync("create_sensor", machine_id, position, axis, sampling_rate)
 
     def upsert_baseline(self, machine_id: str, feature_vector: Dict[str, Any]) -> str:
         if self._client is None:
@@ -144,18 +213,18 @@ class SupabaseService:
     def insert_diagnosis(self, record_id: str, findings: List[Dict[str, Any]], health_score: int) -> str:
         if self._client is None:
             # Fallback to local storage
-            import uuid
-            diagnosis_id = str(uuid.uuid4())
-            SupabaseService._local_diagnoses[diagnosis_id] = {
-                "id": diagnosis_id,
+            return get_local_db().insert_diagnosis({
                 "record_id": record_id,
                 "results": findings,
                 "health_score": health_score,
-                "created_at": "2025-01-21T12:00:00Z"
-            }
-            return diagnosis_id
+            })
             
         payload = {"record_id": record_id, "results": findings, "health_score": health_score}
+        if self._writes is not None:
+            # The id is assigned here so it can be returned before the row is sent
+            payload["id"] = str(uuid.uuid4())
+            self._writes.add_diagnosis(payload)
+            return payload["id"]
         resp = self._client.table("diagnoses").insert(payload).execute()
         data = getattr(resp, "data", None)
         if not data:
@@ -165,22 +234,22 @@ class SupabaseService:
     def insert_fault_detections(self, record_id: str, findings: List[Dict[str, Any]]) -> None:
         if self._client is None:
             # Fallback to local storage
-            for f in findings:
-                import uuid
-                detection_id = str(uuid.uuid4())
-                SupabaseService._local_fault_detections[detection_id] = {
-                    "id": detection_id,
+            get_local_db().insert_fault_detections([
+                {
                     "record_id": record_id,
                     "fault_type": f["fault_type"],
                     "severity_score": float(f.get("severity", 0.0)),
                     "confidence": float(f.get("confidence", 0.0)),
                     "details": f,
-                    "created_at": "2025-01-21T12:00:00Z"
                 }
+                for f in findings
+            ])
             return
             
+        # Client-assigned ids make the buffer's retries idempotent
         rows = [
             {
+                "id": str(uuid.uuid4()),
                 "record_id": record_id,
                 "fault_type": f["fault_type"],
                 "severity_score": float(f.get("severity", 0.0)),
@@ -189,29 +258,47 @@ class SupabaseService:
             }
             for f in findings
         ]
-        if rows:
+        if self._writes is not None:
+            self._writes.add_fault_detections(rows)
+        elif rows:
             self._client.table("fault_detections").insert(rows).execute()
 
     def mark_record_processed(self, record_id: str) -> None:
         if self._client is None:
             # Fallback to local storage
-            if record_id in SupabaseService._local_records:
-                SupabaseService._local_records[record_id]["status"] = "processed"
+            get_local_db().update_record(record_id, status="processed")
+            return
+        if self._writes is not None:
+            self._writes.set_status(record_id, "processed")
             return
             
         self._client.table("vibration_records").update({"status": "processed"}).eq("id", record_id).execute()
 
+    def open_storage_buffer(self, storage_path: str):
+        """
+        Return the file's bytes as a buffer, memory-mapping local files
+
+        Local files come back as a read-only memoryview over an mmap so loaders
+        can build arrays without copying; remote files are downloaded as bytes.
+        """
+        local_name = LocalStorage.name_from_storage_path(storage_path)
+        if local_name is not None:
+            storage = LocalStorage()
+            if not storage.exists(local_name):
+                raise RuntimeError(f"Local file not found: {storage.path_for(local_name)}")
+            return storage.open_mapped(local_name)
+        return self.download_storage_file(storage_path)
+
     def download_storage_file(self, storage_path: str) -> bytes:
         # Check if it's a local file path
-        if storage_path.startswith("local/"):
+        local_name = LocalStorage.name_from_storage_path(storage_path)
+        if local_name is not None:
             # Local file fallback
-            import os
-            local_filename = storage_path.replace("local/", "")
-            local_path = os.path.join("uploads", local_filename)
-            if os.path.exists(local_path):
+            local_path = LocalStorage().path_for(local_name)
+            try:
                 with open(local_path, "rb") as f:
                     return f.read()
-            else:
+            except FileNotFoundError:
                 raise RuntimeError(f"Local file not found: {local_path}")
         
         # Try Supabase storage
@@ -227,22 +314,11 @@ class SupabaseService:
             return data
         raise RuntimeError("Failed to download storage file")
 
-    def upload_storage_file(self, storage_path: str, content: bytes, content_type: str = "text/csv") -> None:
+    def upload_storage_file(self, storage_path: str, content: bytes | str, content_type: str = "text/csv") -> None:
+        """Upload bytes, or stream a local file when given its path"""
         if self._client is None:
             raise RuntimeError("Supabase client is not configured")
-        bucket = settings.supabase_bucket
-        try:
-            self._client.storage.from_(bucket).remove([storage_path])
-        except Exception:
-            pass
-        res = self._client.storage.from_(bucket).upload(
-            storage_path,
-            content,
-            {"contentType": content_type, "upsert": True},
-        )
-        # supabase-py raises on error; if returns dict, optionally verify 'error' key
-        if isinstance(res, dict) and res.get("error"):
-            raise RuntimeError(f"Upload failed: {res['error']}")
+        call_sync("upload_storage_file", storage_path, content, content_type)
 
     def list_buckets(self) -> List[str]:
         if self._client is None:
@@ -276,3 +352,20 @@ class SupabaseService:
             return None
         except Exception:
             return None
+
+    def get_thresholds(self, machine_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Thresholds from the settings table: the machine's row, or the global one"""
+        if self._client is None:
+            return None
+        query = self._client.table("settings").select("thresholds")
+        query = query.eq("machine_id", machine_id) if machine_id else query.is_("machine_id", "null")
+        resp = query.order("created_at", desc=True).limit(1).execute()
+        data = getattr(resp, "data", None)
+        return data[0].get("thresholds") if data else None
+
+
+
+def shutdown_supabase_writes() -> None:
+    """Flush the shared service's buffered writes, if it was ever created"""
+    if SupabaseService._instance is not None and hasattr(SupabaseService._instance, "_initialized"):
+        SupabaseService._instance.close_writes()
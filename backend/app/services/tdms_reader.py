@@ -0,0 +1,252 @@
+"""
+Reader for NI TDMS files
+
+Only segment lead-ins and metadata are parsed up front. Channel data is
+located by offset and read lazily, so selecting one channel out of a wide
+DAQ file touches only that channel's bytes.
+"""
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+LEAD_IN_SIZE = 28
+TDMS_TAG = b"TDSm"
+
+TOC_META_DATA = 1 << 1
+TOC_NEW_OBJ_LIST = 1 << 2
+TOC_RAW_DATA = 1 << 3
+TOC_INTERLEAVED_DATA = 1 << 5
+TOC_BIG_ENDIAN = 1 << 6
+TOC_DAQMX_RAW_DATA = 1 << 7
+
+NO_RAW_DATA = 0xFFFFFFFF
+SAME_RAW_DATA_INDEX = 0x00000000
+DAQMX_FORMAT_CHANGING = 0x00001269
+DAQMX_DIGITAL_LINE_SCALER = 0x0000126A
+
+# tdsDataType code -> NumPy type character (without byte order)
+NUMERIC_TYPES = {
+    0x01: "i1", 0x02: "i2", 0x03: "i4", 0x04: "i8",
+    0x05: "u1", 0x06: "u2", 0x07: "u4", 0x08: "u8",
+    0x09: "f4", 0x0A: "f8",
+    0x19: "f4", 0x1A: "f8",  # single/double with unit
+    0x21: "u1",  # boolean
+}
+TYPE_STRING = 0x20
+TYPE_TIMESTAMP = 0x44
+
+
+class TdmsError(ValueError):
+    """Raised for malformed or unsupported TDMS content"""
+
+
+class _ObjectIndex:
+    """Raw data index of one object within a segment"""
+
+    __slots__ = ("dtype", "n_values", "size")
+
+    def __init__(self, dtype: np.dtype, n_values: int) -> None:
+        self.dtype = dtype
+        self.n_values = n_values
+        self.size = dtype.itemsize * n_values
+
+
+class TdmsFile:
+    """Lazily indexed view over TDMS file bytes"""
+
+    def __init__(self, buffer) -> None:
+        self._buffer = buffer
+        self._view = memoryview(buffer).cast("B")
+        if bytes(self._view[:4]) != TDMS_TAG:
+            raise TdmsError("Not a TDMS file")
+        self.properties: Dict[str, Dict[str, Any]] = {}
+        # object path -> list of (offset, count, dtype, stride); stride is None for contiguous data
+        self._data_pieces: Dict[str, List[Tuple[int, int, np.dtype, Optional[int]]]] = {}
+        self._index()
+
+    @staticmethod
+    def is_tdms(buffer) -> bool:
+        return bytes(memoryview(buffer).cast("B")[:4]) == TDMS_TAG
+
+    def channels(self) -> List[str]:
+        """Channel names as "group/channel", in file order"""
+        return [self._display_name(path) for path in self._data_pieces]
+
+    def channel_properties(self, name: str) -> Dict[str, Any]:
+        return self.properties.get(self._resolve(name), {})
+
+    def sampling_rate(self, name: str) -> Optional[float]:
+        increment = self.channel_properties(name).get("wf_increment")
+        if increment:
+            return 1.0 / float(increment)
+        return None
+
+    def channel_data(self, name: str) -> np.ndarray:
+        """Read one channel, touching only the byte ranges that belong to it"""
+        pieces = self._data_pieces[self._resolve(name)]
+        arrays = []
+        for offset, count, dtype, stride in pieces:
+            if stride is None:
+                arrays.append(np.frombuffer(self._buffer, dtype=dtype, count=count, offset=offset))
+            else:
+                # Interleaved data: a strided view picks this channel's samples out of each row
+                arrays.append(np.ndarray((count,), dtype=dtype, buffer=self._buffer, offset=offset, strides=(stride,)))
+        if not arrays:
+            return np.empty(0)
+        if len(arrays) == 1:
+            return arrays[0]
+        return np.concatenate(arrays)
+
+    def _resolve(self, name: str) -> str:
+        if name in self._data_pieces:
+            return name
+        for path in self._data_pieces:
+            display = self._display_name(path)
+            if name == display or name == display.split("/")[-1]:
+                return path
+        raise KeyError(f"Channel not found in TDMS file: {name}")
+
+    @staticmethod
+    def _display_name(path: str) -> str:
+        parts = [p.replace("''", "'") for p in path.strip("/").strip("'").split("'/'")]
+        return "/".join(parts)
+
+    def _index(self) -> None:
+        view = self._view
+        pos = 0
+        object_order: List[str] = []
+        last_index: Dict[str, Optional[_ObjectIndex]] = {}
+
+        while pos + LEAD_IN_SIZE <= len(view):
+            if bytes(view[pos:pos + 4]) != TDMS_TAG:
+                raise TdmsError(f"Invalid TDMS segment tag at offset {pos}")
+            toc = struct.unpack_from("<I", view, pos + 4)[0]
+            endian = ">" if toc & TOC_BIG_ENDIAN else "<"
+            next_offset, raw_offset = struct.unpack_from(endian + "QQ", view, pos + 12)
+            segment_start = pos + LEAD_IN_SIZE
+            if next_offset == 0xFFFFFFFFFFFFFFFF:
+                # Writer crashed mid-segment: use whatever was flushed
+                segment_end = len(view)
+            else:
+                segment_end = min(segment_start + next_offset, len(view))
+            if toc & TOC_DAQMX_RAW_DATA:
+                raise TdmsError("DAQmx raw data segments are not supported")
+
+            if toc & TOC_META_DATA:
+                if toc & TOC_NEW_OBJ_LIST:
+                    object_order = []
+                self._read_metadata(segment_start, endian, object_order, last_index)
+
+            if toc & TOC_RAW_DATA:
+                self._index_raw_data(
+                    segment_start + raw_offset, segment_end, endian,
+                    bool(toc & TOC_INTERLEAVED_DATA), object_order, last_index,
+                )
+
+            if segment_end <= pos:
+                break
+            pos = segment_end
+
+    def _read_metadata(
+        self,
+        pos: int,
+        endian: str,
+        object_order: List[str],
+        last_index: Dict[str, Optional[_ObjectIndex]],
+    ) -> None:
+        view = self._view
+        n_objects = struct.unpack_from(endian + "I", view, pos)[0]
+        pos += 4
+        for _ in range(n_objects):
+            path, pos = self._read_string(pos, endian)
+            index_length = struct.unpack_from(endian + "I", view, pos)[0]
+            pos += 4
+
+            if index_length == NO_RAW_DATA:
+                last_index[path] = None
+            elif index_length == SAME_RAW_DATA_INDEX:
+                if path not in last_index:
+                    raise TdmsError(f"Object {path} reuses a raw data index it never defined")
+            elif index_length in (DAQMX_FORMAT_CHANGING, DAQMX_DIGITAL_LINE_SCALER):
+                raise TdmsError("DAQmx raw data is not supported")
+            else:
+                type_code, dimension, n_values = struct.unpack_from(endian + "IIQ", view, pos)
+                if type_code not in NUMERIC_TYPES:
+                    raise TdmsError(f"Unsupported raw data type 0x{type_code:x} for {path}")
+                if dimension != 1:
+                    raise TdmsError(f"Unsupported array dimension {dimension} for {path}")
+                last_index[path] = _ObjectIndex(np.dtype(endian + NUMERIC_TYPES[type_code]), n_values)
+                pos += index_length - 4
+
+            if path not in object_order:
+                object_order.append(path)
+
+            n_properties = struct.unpack_from(endian + "I", view, pos)[0]
+            pos += 4
+            props = self.properties.setdefault(path, {})
+            for _ in range(n_properties):
+                name, pos = self._read_string(pos, endian)
+                type_code = struct.unpack_from(endian + "I", view, pos)[0]
+                value, pos = self._read_value(pos + 4, type_code, endian)
+                props[name] = value
+
+    def _index_raw_data(
+        self,
+        data_start: int,
+        data_end: int,
+        endian: str,
+        interleaved: bool,
+        object_order: List[str],
+        last_index: Dict[str, Optional[_ObjectIndex]],
+    ) -> None:
+        layout = [(path, last_index[path]) for path in object_order if last_index.get(path) is not None]
+        chunk_size = sum(index.size for _, index in layout)
+        if chunk_size == 0:
+            return
+        n_chunks = (data_end - data_start) // chunk_size
+
+        if interleaved:
+            # One row per sample, each object's value side by side
+            row_size = sum(index.dtype.itemsize for _, index in layout)
+            n_rows = sum(index.n_values for _, index in layout[:1]) * n_chunks
+            column = 0
+            for path, index in layout:
+                self._data_pieces.setdefault(path, []).append(
+                    (data_start + column, n_rows, index.dtype, row_size)
+                )
+                column += index.dtype.itemsize
+            return
+
+        for chunk in range(n_chunks):
+            offset = data_start + chunk * chunk_size
+            for path, index in layout:
+                pieces = self._data_pieces.setdefault(path, [])
+                prev = pieces[-1] if pieces else None
+                if prev and prev[3] is None and prev[0] + prev[1] * prev[2].itemsize == offset and prev[2] == index.dtype:
+                    # Adjacent to the previous piece (single-channel segments): extend it
+                    pieces[-1] = (prev[0], prev[1] + index.n_values, prev[2], None)
+                else:
+                    pieces.append((offset, index.n_values, index.dtype, None))
+                offset += index.size
+
+    def _read_string(self, pos: int, endian: str) -> Tuple[str, int]:
+        length = struct.unpack_from(endian + "I", self._view, pos)[0]
+        start = pos + 4
+        return bytes(self._view[start:start + length]).decode("utf-8", errors="replace"), start + length
+
+    def _read_value(self, pos: int, type_code: int, endian: str) -> Tuple[Any, int]:
+        if type_code == TYPE_STRING:
+            return self._read_string(pos, endian)
+        if type_code == TYPE_TIMESTAMP:
+            fraction, seconds = struct.unpack_from(endian + "Qq", self._view, pos)
+            # Seconds since 1904-01-01 UTC plus a 2^-64 fraction
+            return seconds + fraction / 2 ** 64, pos + 16
+        if type_code in NUMERIC_TYPES:
+            dtype = np.dtype(endian + NUMERIC_TYPES[type_code])
+            value = np.frombuffer(self._buffer, dtype=dtype, count=1, offset=pos)[0].item()
+            if type_code == 0x21:
+                value = bool(value)
+            return value, pos + dtype.itemsize
+        raise TdmsError(f"Unsupported property type 0x{type_code:x}")
@@ -1,17 +1,35 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
 from .supabase_service import SupabaseService
 from .data_loader import DataLoader
 from .signal_processor import SignalProcessor
-from .rule_engine import RuleEngine
+from .rule_engine import RuleEngine, get_rule_engine
+from .analysis_cache import AnalysisCache, get_analysis_cache
+from .local_db import get_local_db
+from .baseline import BaselineSignature, fit_baseline, flatten_features, get_baseline_store
+from .band_energy import load_band_sets
+from .envelope import machine_kinematics
+from ..core.config import settings
+
+
+# Bump when the analysis output changes so cached results are not reused
+ANALYSIS_VERSION = 7
 
 
 class VibrationAnalysisService:
     def __init__(self) -> None:
-        self._supabase = SupabaseService()
-        from .data_loader import DataLoader
-        from .signal_processor import SignalProcessor
+        self._supabase_service: SupabaseService | None = None
         self._loader = DataLoader()
-        self._processor = SignalProcessor()
+        band_sets, machine_band_sets = load_band_sets()
+        self._processor = SignalProcessor(band_sets=band_sets, machine_band_sets=machine_band_sets)
+        self._cache = get_analysis_cache()
+
+    @property
+    def _supabase(self) -> SupabaseService:
+        # Created lazily so pure analysis (e.g. in batch worker processes) never touches storage
+        if self._supabase_service is None:
+            self._supabase_service = SupabaseService()
+        return self._supabase_service
     
     def process_record(self, record_id: str) -> dict:
         """Process a vibration record and perform analysis"""
@@ -32,72 +50,20 @@ class VibrationAnalysisService:
             
             print(f"Downloading file from: {file_path}")
             
-            file_bytes = self._supabase.download_storage_file(file_path)
+            # Local files are memory-mapped rather than read into memory
+            file_bytes = self._supabase.open_storage_buffer(file_path)
             
-            print(f"Downloaded {len(file_bytes)} bytes")
+            print(f"Downloaded {memoryview(file_bytes).nbytes} bytes")
             
             # Extract filename from path
             filename = file_path.split('/')[-1]
             
             print(f"Processing file: {filename}")
             
-            # Load and process the signal
-            signal_data, sampling_rate, load_metadata = self._loader.load_from_bytes(
-                file_bytes, filename
-            )
-            
-            print(f"Loaded signal: {len(signal_data)} samples at {sampling_rate} Hz")
-            
-            # Process the signal and extract features
-            analysis_result = self._processor.process_signal(signal_data, sampling_rate)
-            
-            print(f"Analysis result keys: {list(analysis_result.keys())}")
-            
-            # Perform fault detection
-            fault_analysis = self._detect_faults(analysis_result)
-            
-            print(f"Fault analysis: {fault_analysis}")
-            
-            # Calculate overall health score
-            health_score = self._calculate_health_score(fault_analysis)
+            analysis = self.analyze_file(file_bytes, filename, kinematics=self.kinematics_for(record))
+            result = self.build_result(record_id, file_path, analysis, record)
             
-            # Prepare final result
-            result = {
-                "record_id": record_id,
-                "analysis_timestamp": "2025-01-21T12:00:00Z",  # Current timestamp
-                "file_info": {
-                    "filename": filename,
-                    "file_path": file_path,
-                    **load_metadata
-                },
-                "signal_analysis": analysis_result,
-                "fault_detection": fault_analysis,
-                "health_score": health_score,
-                "recommendations": self._generate_recommendations(fault_analysis, health_score),
-                "status": "completed"
-            }
-            
-            # Store results in database
-            self._store_analysis_results(record_id, result)
-            
-            # Mark record as processed
-            self._supabase.mark_record_processed(record_id)
-            
-            # Also mark as processed in the in-memory database
-            try:
-                from ..api.endpoints.machines import vibration_records_db
-                if record_id in vibration_records_db:
-                    vibration_records_db[record_id]["processed"] = True
-                    print(f"Marked record {record_id} as processed in in-memory database")
-                
-                # Also mark as processed in Supabase local storage
-                local_records = getattr(self._supabase, '_local_records', {})
-                if record_id in local_records:
-                    local_records[record_id]["status"] = "processed"
-                    print(f"Marked record {record_id} as processed in Supabase local storage")
-                    
-            except Exception as e:
-                print(f"Failed to update in-memory database: {e}")
+            self.finalize_record(record_id, result)
             
             return result
             
@@ -110,91 +76,281 @@ class VibrationAnalysisService:
             }
             return error_result
     
-    def _detect_faults(self, analysis_result: dict) -> dict:
-        """Detect potential faults based on analysis results"""
-        faults = []
-        
+    @staticmethod
+    def kinematics_for(record: Optional[dict]) -> Optional[dict]:
+        """Running speed, bearing geometry and type of the machine a record belongs to"""
+        machine_id = SupabaseService().get_record_machine_id(record or {})
+        if not machine_id:
+            return None
         try:
-            time_features = analysis_result.get('time_features', {})
-            freq_features = analysis_result.get('frequency_features', {})
-            
-            # Check for imbalance (high 1x frequency component)
-            dominant_freq = freq_features.get('dominant_frequency', 0)
-            if dominant_freq > 0:
-                # Assume machine running at ~30 Hz (1800 RPM) for example
-                expected_running_freq = 30.0
-                if abs(dominant_freq - expected_running_freq) < 2.0:  # Within 2 Hz
-                    magnitude = freq_features.get('dominant_magnitude', 0)
-                    if magnitude > 0.1:  # Threshold for imbalance
-                        faults.append({
-                            "fault_type": "Imbalance",
-                            "severity": min(magnitude * 100, 100),
-                            "confidence": 0.7,
-                            "description": f"High 1x frequency component at {dominant_freq:.1f} Hz",
-                            "frequency": dominant_freq
-                        })
-            
-            # Check for high crest factor (bearing issues)
-            crest_factor = time_features.get('crest_factor', 0)
-            if crest_factor > 4.0:
-                severity = min((crest_factor - 3.0) * 25, 100)
-                faults.append({
-                    "fault_type": "Bearing Defect",
-                    "severity": severity,
-                    "confidence": 0.6,
-                    "description": f"High crest factor ({crest_factor:.2f}) indicates impulsive behavior",
-                    "crest_factor": crest_factor
-                })
-            
-            # Check for high kurtosis (impulsive behavior)
-            kurtosis = time_features.get('kurtosis', 0)
-            if kurtosis > 5.0:
-                severity = min((kurtosis - 3.0) * 10, 100)
-                faults.append({
-                    "fault_type": "Impulsive Behavior",
-                    "severity": severity,
-                    "confidence": 0.5,
-                    "description": f"High kurtosis ({kurtosis:.2f}) suggests impulsive events",
-                    "kurtosis": kurtosis
-                })
-            
-            # Check harmonics for gear mesh issues
-            harmonics = freq_features.get('harmonics', [])
-            if len(harmonics) >= 3:
-                avg_harmonic_magnitude = sum(h.get('magnitude', 0) for h in harmonics) / len(harmonics)
-                if avg_harmonic_magnitude > 0.05:
-                    faults.append({
-                        "fault_type": "Gear Mesh Issues",
-                        "severity": min(avg_harmonic_magnitude * 200, 100),
-                        "confidence": 0.6,
-                        "description": f"Multiple harmonics detected, average magnitude: {avg_harmonic_magnitude:.3f}",
-                        "harmonic_count": len(harmonics)
-                    })
-            
-            # Check overall vibration level
-            rms = time_features.get('rms', 0)
-            if rms > 0.5:  # High vibration threshold
-                faults.append({
-                    "fault_type": "High Vibration Level",
-                    "severity": min(rms * 100, 100),
-                    "confidence": 0.8,
-                    "description": f"Overall RMS level ({rms:.3f}) exceeds normal range",
-                    "rms_level": rms
-                })
-            
+            return machine_kinematics(get_local_db().get_machine(machine_id))
         except Exception as e:
-            faults.append({
-                "fault_type": "Analysis Error",
-                "severity": 50,
-                "confidence": 1.0,
-                "description": f"Error during fault detection: {str(e)}"
-            })
+            print(f"Failed to look up machine {machine_id}: {e}")
+            return None
+    
+    def cache_key(self, file_bytes: bytes, filename: str, kinematics: Optional[dict] = None) -> str:
+        """Cache key for a file under the current processing configuration"""
+        return AnalysisCache.make_key(file_bytes, {
+            "format": filename.lower().split('.')[-1],
+            "version": ANALYSIS_VERSION,
+            "processor": self._processor.config(),
+            "rules": self._rules.fingerprint,
+            "kinematics": kinematics,
+        })
+    
+    def analyze_file(
+        self,
+        file_bytes: bytes,
+        filename: str,
+        use_cache: bool = True,
+        kinematics: Optional[dict] = None,
+    ) -> dict:
+        """
+        Run the CPU-bound part of the pipeline: load, process, detect faults and score
         
-        return {
+        kinematics (see kinematics_for) enables bearing defect matching.
+        """
+        cache_key = None
+        if use_cache:
+            cache_key = self.cache_key(file_bytes, filename, kinematics)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                print(f"Analysis cache hit for {filename}")
+                return cached
+        
+        # Load every channel as one (channels, samples) array
+        signals, sampling_rate, load_metadata = self._loader.load_channels_from_bytes(
+            file_bytes, filename
+        )
+        
+        print(f"Loaded signal: {signals.shape[0]} channel(s) x {signals.shape[1]} samples at {sampling_rate} Hz")
+        
+        # Process all channels and extract features
+        analysis_result = self._processor.process_signal(
+            signals, sampling_rate, load_metadata.get("channels"), kinematics
+        )
+        
+        # Perform fault detection and calculate overall health score
+        fault_analysis, health_score = self.assess(analysis_result)
+        
+        analysis = {
+            "load_metadata": load_metadata,
+            "signal_analysis": analysis_result,
+            "fault_detection": fault_analysis,
+            "health_score": health_score,
+            "recommendations": self._generate_recommendations(fault_analysis, health_score),
+        }
+        if cache_key is not None:
+            self._cache.put(cache_key, analysis)
+        return analysis
+    
+    @property
+    def _rules(self) -> RuleEngine:
+        # Looked up per use so a reloaded rule set takes effect immediately
+        return get_rule_engine()
+    
+    def assess(self, analysis_result: dict, baseline: Optional[BaselineSignature] = None) -> Tuple[dict, int]:
+        """Run the fault rules on every channel of a processed signal and score it"""
+        # The primary channel first, then the remaining ones tagged with their name
+        channels = [analysis_result] + analysis_result.get("channels", [])[1:]
+        rows = [flatten_features(channel) for channel in channels]
+        means = [baseline.means()] * len(rows) if baseline is not None else None
+        
+        engine = self._rules
+        triggered, severity = engine.evaluate_matrix(engine.matrix(rows), engine.baseline_matrix(means))
+        faults = []
+        for i, channel_faults in enumerate(engine.findings(rows, triggered, severity)):
+            if i > 0:
+                for fault in channel_faults:
+                    fault["channel"] = channels[i].get("name")
+            faults.extend(channel_faults)
+        
+        fault_analysis = {
             "detected_faults": faults,
             "fault_count": len(faults),
             "analysis_method": "rule_based"
         }
+        health_score = int(engine.health_scores(triggered, severity, np.zeros(len(rows), dtype=np.intp), 1)[0])
+        return fault_analysis, health_score
+    
+    def build_result(self, record_id: str, file_path: str, analysis: dict, record: Optional[dict] = None) -> dict:
+        """Assemble the API result for a record from the output of analyze_file"""
+        # Cached analyses are baseline-independent; the machine's baseline is applied per record
+        signature = get_baseline_store().for_record(record) if record else None
+        if signature is not None:
+            analysis = self.apply_baseline(analysis, signature)
+        return {
+            "record_id": record_id,
+            "analysis_timestamp": "2025-01-21T12:00:00Z",  # Current timestamp
+            "file_info": {
+                "filename": file_path.split('/')[-1],
+                "file_path": file_path,
+                **analysis["load_metadata"]
+            },
+            "signal_analysis": analysis["signal_analysis"],
+            "fault_detection": analysis["fault_detection"],
+            "health_score": analysis["health_score"],
+            "recommendations": analysis["recommendations"],
+            "status": "completed"
+        }
+    
+    def apply_baseline(self, analysis: dict, signature: BaselineSignature) -> dict:
+        """Score an analysis against a baseline, adding a finding when it deviates"""
+        deviation = signature.score(flatten_features(analysis["signal_analysis"]))
+        if self._rules.uses_baseline:
+            # Rules relative to the baseline could not run when the analysis was cached
+            fault_analysis, _ = self.assess(analysis["signal_analysis"], signature)
+        else:
+            fault_analysis = {
+                **analysis["fault_detection"],
+                "detected_faults": list(analysis["fault_detection"]["detected_faults"]),
+            }
+        self._add_baseline_finding(fault_analysis, deviation)
+        health_score = self._calculate_health_score(fault_analysis)
+        return {
+            **analysis,
+            "fault_detection": fault_analysis,
+            "health_score": health_score,
+            "recommendations": self._generate_recommendations(fault_analysis, health_score),
+        }
+    
+    @staticmethod
+    def _add_baseline_finding(fault_analysis: dict, deviation: dict) -> None:
+        """Attach a baseline score to fault_analysis, with a finding when the distance raises an alert"""
+        fault_analysis["baseline"] = deviation
+        distance = deviation["normalized_distance"]
+        if distance > settings.baseline_alert_distance:
+            features = ", ".join(f"{d['feature']} (z={d['z']:.1f})" for d in deviation["deviations"])
+            fault_analysis["detected_faults"].append({
+                "fault_type": "Baseline Deviation",
+                "severity": min((distance - 1.0) * 25, 100),
+                "confidence": 0.75,
+                "description": f"Features deviate from the healthy baseline: {features or 'joint deviation'}",
+                "mahalanobis": deviation["mahalanobis"],
+            })
+        fault_analysis["fault_count"] = len(fault_analysis["detected_faults"])
+    
+    def build_baseline(
+        self,
+        machine_id: str,
+        sensor_id: Optional[str] = None,
+        record_ids: Optional[List[str]] = None,
+    ) -> BaselineSignature:
+        """
+        Fit and store a baseline from healthy recordings of a machine or sensor
+        
+        Explicit record_ids are taken as healthy. Otherwise the most recent
+        processed records are used, keeping those whose rule-based health
+        score reaches baseline_min_health, up to baseline_records of them.
+        """
+        if record_ids:
+            candidates = list(record_ids)
+        else:
+            rows = get_local_db().list_records(machine_id=machine_id, sensor_id=sensor_id, status="processed")
+            candidates = [row["id"] for row in reversed(rows)]
+        
+        channels = []
+        for record_id in candidates:
+            if len(channels) >= settings.baseline_records:
+                break
+            record = self._supabase.get_vibration_record(record_id)
+            if not record:
+                raise ValueError(f"Vibration record {record_id} not found")
+            file_path = record.get('file_path') or record.get('storage_path')
+            analysis = self.analyze_file(
+                self._supabase.open_storage_buffer(file_path), file_path.split('/')[-1],
+                kinematics=self.kinematics_for(record),
+            )
+            if not record_ids and analysis["health_score"] < settings.baseline_min_health:
+                continue
+            channels.append(analysis["signal_analysis"])
+        
+        signature = fit_baseline(channels)
+        get_baseline_store().put(machine_id, sensor_id, signature)
+        return signature
+    
+    def finalize_record(self, record_id: str, result: dict) -> None:
+        """Store analysis results and mark the record as processed in every store"""
+        # Store results in database
+        self._store_analysis_results(record_id, result)
+        
+        # Mark record as processed
+        self._supabase.mark_record_processed(record_id)
+        
+        # Also mark the local copy that backs the record lists, keeping its features for re-scoring
+        signal_analysis = result.get("signal_analysis", {})
+        channels = [signal_analysis] + signal_analysis.get("channels", [])[1:]
+        try:
+            get_local_db().update_record(
+                record_id,
+                status="processed",
+                channel_features=[flatten_features(channel) for channel in channels],
+                channel_names=[channel.get("name") for channel in channels],
+            )
+        except Exception as e:
+            print(f"Failed to update local database: {e}")
+    
+    def rescore(self, machine_id: Optional[str] = None, store: bool = False) -> List[dict]:
+        """
+        Re-run the current rules over the stored features of processed records
+        
+        No signal is reloaded: the features of every channel of every record
+        form one matrix that the rule engine evaluates in a single call.
+        Records whose machine has a baseline are scored against it as in
+        apply_baseline, so deviations keep their finding. With store, each
+        record gets a new diagnosis row.
+        """
+        records = [
+            r for r in get_local_db().list_records(machine_id=machine_id, status="processed")
+            if r.get("channel_features")
+        ]
+        rows: List[dict] = []
+        groups: List[int] = []
+        names: List[Optional[str]] = []
+        for i, record in enumerate(records):
+            rows.extend(record["channel_features"])
+            groups.extend([i] * len(record["channel_features"]))
+            names.extend(record.get("channel_names") or [None] * len(record["channel_features"]))
+        
+        engine = self._rules
+        baselines = [get_baseline_store().for_record(record) for record in records]
+        means = None
+        if engine.uses_baseline:
+            means = [baselines[g].means() if baselines[g] is not None else None for g in groups]
+        triggered, severity = engine.evaluate_matrix(engine.matrix(rows), engine.baseline_matrix(means))
+        scores = engine.health_scores(triggered, severity, np.asarray(groups, dtype=np.intp), len(records))
+        
+        results = [
+            {"record_id": record["id"], "health_score": int(scores[i]), "detected_faults": []}
+            for i, record in enumerate(records)
+        ]
+        for row, faults in enumerate(engine.findings(rows, triggered, severity)):
+            result = results[groups[row]]
+            if row > 0 and groups[row - 1] == groups[row]:
+                for fault in faults:
+                    fault["channel"] = names[row]
+            result["detected_faults"].extend(faults)
+        
+        # The first channel is the one apply_baseline scores
+        for record, signature, result in zip(records, baselines, results):
+            if signature is None:
+                continue
+            fault_analysis = {"detected_faults": result["detected_faults"]}
+            self._add_baseline_finding(fault_analysis, signature.score(record["channel_features"][0]))
+            result["baseline"] = fault_analysis["baseline"]
+            result["health_score"] = self._calculate_health_score(fault_analysis)
+        
+        if store:
+            for result in results:
+                fault_detection = {"detected_faults": result["detected_faults"]}
+                if "baseline" in result:
+                    fault_detection["baseline"] = result["baseline"]
+                self._store_analysis_results(result["record_id"], {
+                    "fault_detection": fault_detection,
+                    "health_score": result["health_score"],
+                })
+            self._supabase.flush_writes()
+        return results
     
     def _calculate_health_score(self, fault_analysis: dict) -> int:
         """Calculate overall machine health score (0-100, higher is better)"""
@@ -264,13 +420,20 @@ class VibrationAnalysisService:
                     "description": "Perform balancing procedure or check for loose components"
                 })
             
-            if 'Bearing Defect' in fault_types:
+            if any(t.startswith('Bearing') for t in fault_types):
                 recommendations.append({
                     "priority": "high",
                     "action": "Inspect bearings",
                     "description": "Check bearing condition, lubrication, and consider replacement"
                 })
             
+            if 'Baseline Deviation' in fault_types:
+                recommendations.append({
+                    "priority": "medium",
+                    "action": "Compare with baseline",
+                    "description": "Vibration signature has drifted from healthy operation, review the deviating features"
+                })
+            
             if 'Gear Mesh Issues' in fault_types:
                 recommendations.append({
                     "priority": "medium",
@@ -0,0 +1,190 @@
+"""
+Write-behind buffer for Supabase diagnosis results
+
+Diagnosis rows, fault-detection rows and record status updates are queued
+in memory and sent in bulk: one insert per table and one update per status
+value, whatever the number of records. A background thread flushes when
+max_rows are pending or every flush_interval seconds. Each request is
+retried with exponential backoff; batches that still fail are appended to a
+JSONL spool file and replayed when the next buffer starts, so close() loses
+nothing even when Supabase is unreachable.
+
+Rows carry client-assigned ids and are sent as upserts that ignore existing
+ids, so a retry after a request that timed out once the server had already
+committed it (or a replay of such a batch) writes nothing twice.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class WriteBehindBuffer:
+    """Batches Supabase inserts and status updates across records"""
+
+    def __init__(
+        self,
+        client: Any,
+        max_rows: int = 500,
+        flush_interval: float = 2.0,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        spool_path: Optional[str] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._client = client
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.spool_path = spool_path or None
+        self._sleep = sleep
+        self._inserts: Dict[str, List[Dict[str, Any]]] = {"diagnoses": [], "fault_detections": []}
+        self._statuses: Dict[str, str] = {}
+        self._counters = {"flushes": 0, "requests": 0, "rows": 0, "retries": 0, "spooled": 0}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._replay_spool()
+        self._thread = threading.Thread(target=self._run, name="supabase-writes", daemon=True)
+        self._thread.start()
+
+    def add_diagnosis(self, row: Dict[str, Any]) -> None:
+        """Queue a diagnosis row; it must carry its id"""
+        self._add("diagnoses", [row])
+
+    def add_fault_detections(self, rows: List[Dict[str, Any]]) -> None:
+        """Queue fault-detection rows; each must carry its id"""
+        self._add("fault_detections", rows)
+
+    def set_status(self, record_id: str, status: str) -> None:
+        with self._lock:
+            self._statuses[record_id] = status
+        self._maybe_wake()
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(len(rows) for rows in self._inserts.values()) + len(self._statuses)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "pending": sum(len(r) for r in self._inserts.values()) + len(self._statuses)}
+
+    def flush(self) -> None:
+        """Send everything queued so far; failed batches go to the spool file"""
+        with self._flush_lock:
+            with self._lock:
+                inserts = {table: rows for table, rows in self._inserts.items() if rows}
+                statuses = self._statuses
+                self._inserts = {table: [] for table in self._inserts}
+                self._statuses = {}
+            if not inserts and not statuses:
+                return
+
+            failed: List[Dict[str, Any]] = []
+            # Results first, so a record is never marked processed without them
+            for table, rows in inserts.items():
+                query = self._client.table(table)
+                if not self._send(lambda: query.upsert(rows, on_conflict="id", ignore_duplicates=True).execute(), len(rows)):
+                    failed.append({"table": table, "rows": rows})
+
+            by_status: Dict[str, List[str]] = {}
+            for record_id, status in statuses.items():
+                by_status.setdefault(status, []).append(record_id)
+            for status, ids in by_status.items():
+                batch = {"table": "vibration_records", "status": status, "ids": ids}
+                if failed:
+                    # Hold status changes back until the results they describe are stored
+                    failed.append(batch)
+                    continue
+                table = self._client.table("vibration_records")
+                if not self._send(lambda: table.update({"status": status}).in_("id", ids).execute(), len(ids)):
+                    failed.append(batch)
+
+            with self._lock:
+                self._counters["flushes"] += 1
+            if failed:
+                self._spool(failed)
+
+    def close(self) -> None:
+        """Stop the flusher thread and flush what is left"""
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+
+    def _add(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        with self._lock:
+            self._inserts[table].extend(rows)
+        self._maybe_wake()
+
+    def _maybe_wake(self) -> None:
+        if self.pending() >= self.max_rows:
+            self._wake.set()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._closed:
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Supabase write flush failed: {e}")
+
+    def _send(self, request: Callable[[], Any], n_rows: int) -> bool:
+        for attempt in range(self.max_retries + 1):
+            try:
+                request()
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"Supabase bulk write failed after {attempt + 1} attempts: {e}")
+                    return False
+                with self._lock:
+                    self._counters["retries"] += 1
+                self._sleep(self.backoff * (2 ** attempt))
+                continue
+            with self._lock:
+                self._counters["requests"] += 1
+                self._counters["rows"] += n_rows
+            return True
+        return False
+
+    def _spool(self, batches: List[Dict[str, Any]]) -> None:
+        if not self.spool_path:
+            print(f"Dropping {len(batches)} failed Supabase write batch(es): no spool file configured")
+            return
+        directory = os.path.dirname(self.spool_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.spool_path, "a", encoding="utf-8") as f:
+            for batch in batches:
+                f.write(json.dumps(batch, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        with self._lock:
+            self._counters["spooled"] += len(batches)
+
+    def _replay_spool(self) -> None:
+        # Requeue batches a previous process could not deliver
+        if not self.spool_path or not os.path.exists(self.spool_path):
+            return
+        with open(self.spool_path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        os.remove(self.spool_path)
+        for line in lines:
+            try:
+                batch = json.loads(line)
+            except ValueError:
+                continue
+            if batch.get("table") == "vibration_records":
+                for record_id in batch["ids"]:
+                    self._statuses[record_id] = batch["status"]
+            elif batch.get("table") in self._inserts:
+                self._inserts[batch["table"]].extend(batch["rows"])
+        self._wake.set()
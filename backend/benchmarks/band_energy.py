@@ -0,0 +1,66 @@
+"""
+Benchmark: prefix-sum band energies vs one boolean mask per band
+
+Run from backend/:
+    python -m benchmarks.band_energy [path/to/test_data]
+
+Loads every .mat file under test_data, takes each record's PSD (all
+channels) once, then times the band energies of the default four bands and
+of an alarm-band grid of 1 Hz bands over the whole spectrum, with the
+previous mask-and-sum loop and with band_energies. Also reports the largest
+relative difference between the two.
+"""
+import sys
+
+import numpy as np
+
+from app.services.band_energy import DEFAULT_BAND_DEFINITIONS, band_energies, expand_band_set
+from app.services.spectral import get_spectral_engine
+from benchmarks.time_features import DEFAULT_DATA_DIR, best_of, load_records
+
+
+SAMPLING_RATE = 1000.0
+
+
+def masked_energies(frequencies: np.ndarray, psd: np.ndarray, lows: np.ndarray, highs: np.ndarray) -> np.ndarray:
+    """The original _analyze_frequency_bands loop"""
+    energies = []
+    for low, high in zip(lows, highs):
+        band_mask = (frequencies >= low) & (frequencies <= high)
+        energies.append(np.sum(psd[..., band_mask], axis=-1))
+    return np.stack(energies, axis=-1)
+
+
+def main() -> None:
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DATA_DIR
+    records = load_records(data_dir)
+    if not records:
+        sys.exit(f"No .mat files found under {data_dir}")
+
+    engine = get_spectral_engine()
+    spectra = [engine.spectrum(record, SAMPLING_RATE) for record in records]
+    band_sets = {
+        "default": {"bands": DEFAULT_BAND_DEFINITIONS},
+        "1 Hz grid": {"grid": {"low": 0, "high": SAMPLING_RATE / 2, "width": 1.0}},
+    }
+
+    print(f"{len(records)} records x {records[0].shape}")
+    print(f"{'bands':>10}{'mask ms/record':>16}{'prefix ms/record':>18}{'speedup':>10}{'max rel diff':>14}")
+    for name, band_set in band_sets.items():
+        _, names, lows, highs = expand_band_set(band_set)
+        highs = np.where(np.isinf(highs), SAMPLING_RATE / 2, highs)
+        error = 0.0
+        for spectrum in spectra:
+            expected = masked_energies(spectrum.frequencies, spectrum.psd, lows, highs)
+            actual = band_energies(spectrum.frequencies, spectrum.psd, lows, highs)
+            error = max(error, float(np.max(np.abs(actual - expected) / np.maximum(expected.max(), 1e-300))))
+        mask_s = best_of(lambda: [masked_energies(s.frequencies, s.psd, lows, highs) for s in spectra])
+        prefix_s = best_of(lambda: [band_energies(s.frequencies, s.psd, lows, highs) for s in spectra])
+        print(
+            f"{len(names):>10}{mask_s / len(spectra) * 1e3:>16.3f}{prefix_s / len(spectra) * 1e3:>18.3f}"
+            f"{mask_s / prefix_s:>9.1f}x{error:>14.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
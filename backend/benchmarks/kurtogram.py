@@ -0,0 +1,80 @@
+"""
+Benchmark: multirate FFT kurtogram vs one full-rate envelope per band
+
+Run from backend/:
+    python -m benchmarks.kurtogram [path/to/test_data]
+
+Loads every .mat file under test_data and times a 6-level kurtogram of each
+record (all channels): the fast version from the record's single rfft, and
+the direct version that builds a full-rate analytic signal for every band
+of every level. Also reports how often both pick the same band and the
+largest kurtosis difference.
+"""
+import sys
+
+import numpy as np
+from scipy import fft as sp_fft
+
+from app.services.envelope import EnvelopeAnalyzer
+from app.services.kurtogram import fast_kurtogram
+from benchmarks.time_features import DEFAULT_DATA_DIR, best_of, load_records
+
+
+SAMPLING_RATE = 1000.0
+MAX_LEVEL = 6
+
+
+def direct_kurtogram(signals: np.ndarray, sampling_rate: float, counts):
+    """Kurtosis of the same ideal bands, one full-rate analytic signal per band"""
+    rows = signals - signals.mean(axis=-1, keepdims=True)
+    n_samples = rows.shape[-1]
+    spec = sp_fft.fft(rows, axis=-1)
+    n_bins = n_samples // 2
+    levels = []
+    for n in counts:
+        width = n_bins // n
+        kurtosis = []
+        for i in range(n):
+            band = np.zeros_like(spec)
+            band[:, i * width:(i + 1) * width] = spec[:, i * width:(i + 1) * width]
+            power = np.abs(sp_fft.ifft(band, axis=-1)) ** 2
+            kurtosis.append((power * power).mean(axis=-1) / power.mean(axis=-1) ** 2 - 2.0)
+        levels.append(np.stack(kurtosis, axis=-1))
+    return levels, 0.5 * sampling_rate
+
+
+def fast(record: np.ndarray):
+    analyzer = EnvelopeAnalyzer()
+    spec, n_samples, n_fft = analyzer.transform(record)
+    return fast_kurtogram(spec, n_samples, n_fft, SAMPLING_RATE, max_level=MAX_LEVEL)
+
+
+def main() -> None:
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DATA_DIR
+    records = load_records(data_dir)
+    if not records:
+        sys.exit(f"No .mat files found under {data_dir}")
+
+    counts = fast(records[0]).counts
+    agree = 0
+    max_error = 0.0
+    for record in records:
+        kurtogram = fast(record)
+        levels, nyquist = direct_kurtogram(record, SAMPLING_RATE, counts)
+        max_error = max(max_error, max(np.abs(a - b).max() for a, b in zip(kurtogram.kurtosis, levels)))
+        # Same selection rule as Kurtogram.best_band, level 0 excluded
+        peaks = [(k.max(axis=0).max(), n, int(np.argmax(k.max(axis=0)))) for n, k in zip(counts[1:], levels[1:])]
+        _, n, i = max(peaks)
+        low, high, _, _ = kurtogram.best_band()
+        agree += bool(np.isclose(low, i * nyquist / n) and np.isclose(high, (i + 1) * nyquist / n))
+
+    print(f"{len(records)} records x {records[0].shape}, levels {kurtogram.levels}")
+    print(f"same band selected: {agree}/{len(records)}, largest kurtosis difference {max_error:.3f}")
+    fast_s = best_of(lambda: [fast(record) for record in records])
+    direct_s = best_of(lambda: [direct_kurtogram(record, SAMPLING_RATE, counts) for record in records])
+    print(f"{'direct ms/record':>18}{'fast ms/record':>16}{'speedup':>10}")
+    print(f"{direct_s / len(records) * 1e3:>18.2f}{fast_s / len(records) * 1e3:>16.3f}{direct_s / fast_s:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: fused time-domain statistics vs the previous multi-pass NumPy code
+
+Run from backend/:
+    python -m benchmarks.time_features [path/to/test_data]
+
+Loads every .mat file under test_data, then times feature extraction per
+record (all channels) and on one long capture built by concatenating the
+records, which is where avoiding full-size temporaries matters most.
+"""
+import glob
+import os
+import sys
+import timeit
+
+import numpy as np
+
+from app.services.data_loader import DataLoader
+from app.services.stats_kernel import time_features
+
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "test_data")
+
+
+def multi_pass_features(signal: np.ndarray) -> dict:
+    """The original extract_time_features, one channel at a time"""
+    features = {}
+    features['rms'] = float(np.sqrt(np.mean(signal**2)))
+    features['peak'] = float(np.max(np.abs(signal)))
+    features['peak_to_peak'] = float(np.ptp(signal))
+    features['mean'] = float(np.mean(signal))
+    features['std'] = float(np.std(signal))
+    features['variance'] = float(np.var(signal))
+    features['crest_factor'] = features['peak'] / features['rms']
+    features['form_factor'] = features['rms'] / np.mean(np.abs(signal))
+    features['skewness'] = float(np.mean(((signal - features['mean']) / features['std'])**3))
+    features['kurtosis'] = float(np.mean(((signal - features['mean']) / features['std'])**4))
+    features['impulse_factor'] = features['peak'] / np.mean(np.abs(signal))
+    return features
+
+
+def load_records(data_dir: str):
+    loader = DataLoader()
+    records = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "**", "*.mat"), recursive=True)):
+        with open(path, "rb") as f:
+            signals, _, _ = loader.load_channels_from_bytes(f.read(), os.path.basename(path))
+        records.append(np.ascontiguousarray(signals))
+    return records
+
+
+def best_of(func, repeat: int = 5) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main() -> None:
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DATA_DIR
+    records = load_records(data_dir)
+    if not records:
+        sys.exit(f"No .mat files found under {data_dir}")
+
+    # Results must agree before timings mean anything
+    for record in records[:5]:
+        fused = time_features(record)
+        for row, features in zip(record, fused):
+            reference = multi_pass_features(row)
+            for name, value in reference.items():
+                assert np.isclose(features[name], value, rtol=1e-9, atol=1e-12), name
+
+    long_capture = np.ascontiguousarray(np.concatenate(records, axis=1))
+    cases = [
+        (f"{len(records)} records x {records[0].shape}",
+         lambda: [multi_pass_features(row) for record in records for row in record],
+         lambda: [time_features(record) for record in records]),
+        (f"long capture {long_capture.shape}",
+         lambda: [multi_pass_features(row) for row in long_capture],
+         lambda: time_features(long_capture)),
+    ]
+
+    print(f"{'case':<36}{'multi-pass ms':>15}{'fused ms':>12}{'speedup':>10}")
+    for label, baseline, fused in cases:
+        baseline_s = best_of(baseline)
+        fused_s = best_of(fused)
+        print(f"{label:<36}{baseline_s * 1e3:>15.2f}{fused_s * 1e3:>12.2f}{baseline_s / fused_s:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
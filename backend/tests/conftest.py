@@ -1,5 +1,6 @@
 import os
 import sys
+import tempfile
 
 # Add backend root to sys.path so 'app' package is importable during tests
 CURRENT_DIR = os.path.dirname(__file__)
@@ -13,3 +14,6 @@ try:
     load_dotenv(os.path.join(BACKEND_ROOT, '.env'))
 except Exception:
     pass
+
+# Keep the embedded local database out of the working tree
+os.environ.setdefault('LOCAL_DB_PATH', os.path.join(tempfile.mkdtemp(prefix='rmh24-tests-'), 'local.db'))
@@ -0,0 +1,47 @@
+import os
+
+from app.services.analysis_cache import AnalysisCache
+
+
+def test_key_depends_on_content_and_params():
+    key = AnalysisCache.make_key(b"abc", {"order": 4})
+    assert key == AnalysisCache.make_key(b"abc", {"order": 4})
+    assert key != AnalysisCache.make_key(b"abd", {"order": 4})
+    assert key != AnalysisCache.make_key(b"abc", {"order": 2})
+
+
+def test_memory_lru_and_counters():
+    cache = AnalysisCache(max_entries=2)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    cache.put("c", {"v": 3})  # evicts "b", the least recently used
+
+    assert cache.get("b") is None
+    assert cache.get("c") == {"v": 3}
+    stats = cache.stats()
+    assert stats["memory_hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["memory_entries"] == 2
+
+
+def test_returned_values_are_isolated():
+    cache = AnalysisCache()
+    cache.put("a", {"nested": {"v": 1}})
+    cache.get("a")["nested"]["v"] = 99
+    assert cache.get("a") == {"nested": {"v": 1}}
+
+
+def test_disk_tier_survives_restart_and_evicts_by_size(tmp_path):
+    cache = AnalysisCache(max_entries=1, cache_dir=str(tmp_path), max_disk_bytes=10_000)
+    cache.put("a", {"payload": "x" * 4000})
+    cache.put("b", {"payload": "y" * 4000})
+    assert cache.get("a")["payload"] == "x" * 4000  # memory miss, disk hit
+    assert cache.stats()["disk_hits"] == 1
+
+    os.utime(tmp_path / "b.json", (0, 0))  # make "b" the oldest on disk
+    cache.put("c", {"payload": "z" * 4000})
+    assert not (tmp_path / "b.json").exists()
+
+    reopened = AnalysisCache(cache_dir=str(tmp_path), max_disk_bytes=10_000)
+    assert reopened.get("c")["payload"] == "z" * 4000
@@ -0,0 +1,49 @@
+import base64
+import hashlib
+import hmac
+import json
+
+import pytest
+
+from app.core.auth import TokenCache, verify_hs256
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _token(claims, secret="secret", alg="HS256"):
+    signing_input = _b64(json.dumps({"alg": alg, "typ": "JWT"}).encode()) + "." + _b64(json.dumps(claims).encode())
+    signature = hmac.new(secret.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return signing_input + "." + _b64(signature)
+
+
+def test_hs256_tokens_are_verified_locally():
+    token = _token({"sub": "u1", "exp": 2000, "role": "authenticated"})
+    assert verify_hs256(token, "secret", now=1000)["sub"] == "u1"
+
+    with pytest.raises(ValueError):
+        verify_hs256(token, "other-secret", now=1000)
+    with pytest.raises(ValueError):
+        verify_hs256(token, "secret", now=2000)
+    with pytest.raises(ValueError):
+        verify_hs256(_token({"sub": "u1", "exp": 2000}, alg="none"), "secret", now=1000)
+    with pytest.raises(ValueError):
+        verify_hs256("not-a-token", "secret")
+
+
+def test_cache_entries_expire_with_the_token_and_respect_the_cap():
+    cache = TokenCache(max_entries=2, ttl=300.0)
+    cache.put("a", {"id": "a"}, exp=1010.0, now=1000.0)
+    assert cache.get("a", now=1005.0) == {"id": "a"}
+    assert cache.get("a", now=1010.0) is None
+
+    cache.put("b", {"id": "b"}, exp=None, now=1000.0)
+    assert cache.get("b", now=1299.0) == {"id": "b"}
+    assert cache.get("b", now=1300.0) is None
+
+    for name in ("c", "d", "e"):
+        cache.put(name, {"id": name}, exp=None, now=1000.0)
+    assert cache.get("c", now=1001.0) is None
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
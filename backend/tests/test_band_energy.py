@@ -0,0 +1,102 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.band_energy import band_energies, band_set_name, expand_band_set, load_band_sets
+from app.services.envelope import machine_kinematics
+from app.services.signal_processor import SignalProcessor
+
+
+def test_prefix_sums_match_masked_sums_with_inclusive_edges():
+    rng = np.random.default_rng(0)
+    frequencies = np.arange(0, 500.5, 0.5)
+    psd = rng.random((3, len(frequencies)))
+    # Edges on bins, between bins, inverted and outside the axis
+    lows = np.array([0.0, 10.0, 10.25, 300.0, 600.0, 499.0])
+    highs = np.array([10.0, 10.0, 20.75, 200.0, 700.0, np.inf])
+
+    energies = band_energies(frequencies, psd, lows, highs)
+    assert energies.shape == (3, len(lows))
+    for i, (low, high) in enumerate(zip(lows, highs)):
+        mask = (frequencies >= low) & (frequencies <= high)
+        assert energies[:, i] == pytest.approx(psd[:, mask].sum(axis=-1))
+
+
+def test_grid_expands_to_named_narrow_bands():
+    unit, names, lows, highs = expand_band_set(
+        {"unit": "order", "bands": {"one_x": (0.8, 1.2)}, "grid": {"low": 0, "high": 10, "width": 0.5, "prefix": "o"}}
+    )
+    assert unit == "order"
+    assert names[:3] == ["one_x", "o0_0.5", "o0.5_1"]
+    assert len(names) == 21
+    np.testing.assert_allclose(highs[1:] - lows[1:], 0.5)
+    with pytest.raises(ValueError):
+        expand_band_set({"unit": "rad"})
+
+
+def _shaft_tones(fs=2000.0, shaft=25.0):
+    t = np.arange(int(2 * fs)) / fs
+    signal = np.sin(2 * np.pi * shaft * t) + 0.5 * np.sin(2 * np.pi * 16 * shaft * t)
+    return signal + 0.01 * np.random.default_rng(2).standard_normal(len(t)), fs
+
+
+def test_machine_type_picks_an_order_band_set():
+    signal, fs = _shaft_tones()
+    processor = SignalProcessor(machine_band_sets={"Gearbox": "gear_mesh"}, nominal_rpm=1500.0)
+    kinematics = machine_kinematics({"type": "gearbox", "rpm_nominal": 1500})
+
+    features = processor.process_signal(signal, fs, kinematics=kinematics)["frequency_features"]
+    assert features["band_set"] == "gear_mesh"
+    bands = features["frequency_bands"]
+    assert set(bands) == {f"{name}_energy" for name in processor.band_sets["gear_mesh"]["bands"]}
+    assert bands["gear_mesh_energy"] > 100 * bands["two_x_energy"]
+    assert bands["one_x_energy"] > 100 * bands["sub_sync_energy"]
+
+    # Unassigned types and disabled order tracking keep the default Hz bands
+    other = processor.process_signal(signal, fs, kinematics=machine_kinematics({"type": "Pump"}))
+    assert other["frequency_features"]["band_set"] == "default"
+    untracked = SignalProcessor(machine_band_sets={"gearbox": "gear_mesh"}, order_tracking=False)
+    assert untracked.process_signal(signal, fs, kinematics=kinematics)["frequency_features"]["band_set"] == "default"
+
+
+def test_hundreds_of_alarm_bands():
+    signal, fs = _shaft_tones()
+    processor = SignalProcessor(
+        band_sets={"alarm": {"unit": "hz", "grid": {"low": 0, "high": 500, "width": 1}}},
+        machine_band_sets={"fan": "alarm"},
+    )
+    result = processor.process_signal(signal, fs, kinematics=machine_kinematics({"type": "Fan"}))
+    bands = result["frequency_features"]["frequency_bands"]
+    assert len(bands) == 500
+    assert max(bands, key=bands.get) == "band_25_26_energy"
+
+
+def test_band_sets_from_settings_file(tmp_path, monkeypatch):
+    path = tmp_path / "bands.json"
+    path.write_text(json.dumps({
+        "sets": {"iso_only": {"unit": "hz", "bands": {"iso": [10, 1000]}}},
+        "machine_types": {"Axial Fan": "iso_only"},
+    }))
+    monkeypatch.setattr(settings, "band_sets_path", str(path))
+
+    band_sets, machine_types = load_band_sets()
+    assert {"default", "iso10816", "iso_only"} <= set(band_sets)
+    assert band_set_name(" axial fan ", machine_types) == "iso_only"
+    assert band_set_name(None, machine_types) == "default"
+
+
+def test_configured_default_set_and_built_in_machine_types():
+    signal, fs = _shaft_tones()
+    narrow = {"unit": "hz", "bands": {"shaft": [20, 30]}}
+    processor = SignalProcessor(band_sets={"default": narrow})
+    features = processor.process_signal(signal, fs)["frequency_features"]
+    assert set(features["frequency_bands"]) == {"shaft_energy"}
+
+    explicit = SignalProcessor(band_definitions={"all": (0, None)}, band_sets={"default": narrow})
+    assert set(explicit.process_signal(signal, fs)["frequency_features"]["frequency_bands"]) == {"all_energy"}
+
+    built_in = SignalProcessor(nominal_rpm=1500.0)
+    kinematics = machine_kinematics({"type": "Centrifugal Pump", "rpm_nominal": 1500})
+    assert built_in.process_signal(signal, fs, kinematics=kinematics)["frequency_features"]["band_set"] == "bearing"
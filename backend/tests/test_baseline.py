@@ -0,0 +1,99 @@
+import uuid
+
+import numpy as np
+
+from app.services.baseline import BaselineSignature, BaselineStore, flatten_features, get_baseline_store
+from app.services.local_db import LocalDatabase, get_local_db
+from app.services.supabase_service import SupabaseService
+from app.services.vibration_analysis import VibrationAnalysisService
+
+
+def _channel(rms, kurtosis, gear_mesh):
+    return {
+        "time_features": {"rms": rms, "kurtosis": kurtosis},
+        "frequency_features": {
+            "dominant_frequency": 30.0,
+            "harmonics": [{"order": 2}],
+            "frequency_bands": {"gear_mesh": gear_mesh},
+        },
+    }
+
+
+def _healthy(n=30, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        flatten_features(_channel(0.2 + 0.01 * rng.standard_normal(), 3.0 + 0.1 * rng.standard_normal(), 1.0 + 0.05 * rng.standard_normal()))
+        for _ in range(n)
+    ]
+
+
+def test_flatten_keeps_scalars_under_prefixed_names():
+    flat = flatten_features(_channel(0.2, 3.0, 1.0))
+    assert flat == {
+        "time.rms": 0.2,
+        "time.kurtosis": 3.0,
+        "freq.dominant_frequency": 30.0,
+        "freq.harmonic_count": 1,
+        "freq.harmonic_mean_magnitude": 0.0,
+        "band.gear_mesh": 1.0,
+    }
+
+
+def test_score_flags_the_deviating_feature_and_matches_batch_scoring():
+    signature = BaselineSignature.fit(_healthy())
+
+    healthy = signature.score(flatten_features(_channel(0.2, 3.0, 1.0)))
+    assert healthy["normalized_distance"] < 2.0
+    assert healthy["deviations"] == []
+
+    faulty = flatten_features(_channel(0.2, 6.0, 1.0))
+    score = signature.score(faulty)
+    assert score["deviations"][0]["feature"] == "time.kurtosis"
+    assert score["normalized_distance"] > 3.0
+
+    X = np.stack([signature.vector(f) for f in _healthy(5, seed=1) + [faulty]])
+    _, distances = signature.score_matrix(X)
+    assert np.isclose(distances[-1], score["mahalanobis"])
+
+
+def test_signatures_round_trip_through_the_store(tmp_path):
+    signature = BaselineSignature.fit(_healthy())
+    store = BaselineStore(LocalDatabase(str(tmp_path / "local.db")))
+    store.put("m1", None, signature)
+    store.clear()
+
+    loaded = store.for_record({"machine_id": "m1", "sensor_id": "s1"})
+    assert loaded.names == signature.names
+    np.testing.assert_allclose(loaded.mean, signature.mean, rtol=1e-6)
+    np.testing.assert_allclose(loaded.precision, signature.precision, rtol=1e-5)
+    assert store.for_record({"machine_id": "m2"}) is None
+
+
+def test_supabase_records_find_the_baseline_through_their_sensor(tmp_path, monkeypatch):
+    signature = BaselineSignature.fit(_healthy())
+    store = BaselineStore(LocalDatabase(str(tmp_path / "local.db")))
+    store.put("m1", None, signature)
+
+    supabase = SupabaseService()
+    monkeypatch.setattr(supabase, "_client", object())
+    monkeypatch.setattr(supabase, "get_sensor", lambda sensor_id: {"id": sensor_id, "machine_id": "m1"})
+    assert store.for_record({"sensor_id": "s1"}).names == signature.names
+
+
+def test_rescore_keeps_baseline_deviation_findings():
+    machine_id = f"m-{uuid.uuid4()}"
+    get_baseline_store().put(machine_id, None, BaselineSignature.fit(_healthy()))
+    record_id = str(uuid.uuid4())
+    get_local_db().put_record({
+        "id": record_id,
+        "machine_id": machine_id,
+        "status": "processed",
+        "channel_features": [flatten_features(_channel(0.2, 6.0, 1.0))],
+        "channel_names": [None],
+    })
+
+    [result] = VibrationAnalysisService().rescore(machine_id)
+    assert result["record_id"] == record_id
+    assert "Baseline Deviation" in [f["fault_type"] for f in result["detected_faults"]]
+    assert result["baseline"]["normalized_distance"] > 3.0
+    assert result["health_score"] < 95
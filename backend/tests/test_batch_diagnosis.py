@@ -0,0 +1,56 @@
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+from scipy.io import savemat
+
+from app.services.batch_diagnosis import BatchDiagnosisService
+
+
+@pytest.fixture
+def mat_file_bytes():
+    t = np.arange(4000) / 1000.0
+    bytes_io = io.BytesIO()
+    savemat(bytes_io, {'data': np.sin(2 * np.pi * 30 * t), 'fs': 1000.0})
+    return bytes_io.getvalue()
+
+
+@pytest.fixture
+def supabase(mocker, mat_file_bytes):
+    records = {
+        "r1": {"id": "r1", "file_path": "local/a.mat"},
+        "r2": {"id": "r2", "file_path": "local/b.mat"},
+    }
+    mock_cls = mocker.patch('app.services.batch_diagnosis.SupabaseService')
+    mocker.patch('app.services.vibration_analysis.SupabaseService', mock_cls)
+    instance = mock_cls.return_value
+    instance.get_vibration_record.side_effect = records.get
+    instance.open_storage_buffer.return_value = mat_file_bytes
+    return instance
+
+
+def test_batch_run_reports_results_and_timings(supabase):
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        service = BatchDiagnosisService(pool=pool)
+        results = list(service.run(["r1", "r2", "missing"]))
+
+    by_id = {r["record_id"]: r for r in results}
+    assert set(by_id) == {"r1", "r2", "missing"}
+    assert by_id["missing"]["status"] == "error"
+    for record_id in ("r1", "r2"):
+        assert by_id[record_id]["status"] == "completed"
+        assert by_id[record_id]["timings"]["analysis_seconds"] >= 0
+        assert by_id[record_id]["timings"]["total_seconds"] >= by_id[record_id]["timings"]["download_seconds"]
+    assert supabase.mark_record_processed.call_count == 2
+
+
+def test_resolve_record_ids(supabase):
+    service = BatchDiagnosisService()
+    assert service.resolve_record_ids(["a", "b", "a"]) == ["a", "b"]
+
+    supabase.list_vibration_records.return_value = [{"id": "r1"}, {"id": "r2"}]
+    assert service.resolve_record_ids(machine_id="m1") == ["r1", "r2"]
+
+    with pytest.raises(ValueError):
+        service.resolve_record_ids()
@@ -29,3 +29,44 @@ def test_load_signal_mat(mocker, mat_file_bytes):
     assert isinstance(signal, np.ndarray)
     assert signal.shape == (5,)
     np.testing.assert_array_equal(signal, np.array([1, 2, 3, 4, 5]))
+
+
+def test_load_wav_from_memoryview():
+    """WAV frames are read straight from the buffer; channel 0 is normalized to float64."""
+    import wave
+
+    frames = (np.arange(20, dtype='<i2').reshape(10, 2) * 100)
+    bytes_io = io.BytesIO()
+    with wave.open(bytes_io, 'wb') as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(8000)
+        wav_file.writeframes(frames.tobytes())
+
+    signal, sampling_rate, metadata = DataLoader().load_from_bytes(memoryview(bytes_io.getvalue()), "a.wav")
+
+    assert sampling_rate == 8000.0
+    assert signal.dtype == np.float64
+    np.testing.assert_allclose(signal, frames[:, 0] / 32768.0)
+    assert metadata["channel_count"] == 2
+
+
+def test_load_mat_channels_and_process():
+    """A (samples, channels) matrix loads as channel rows and each row gets its own features."""
+    from app.services.signal_processor import SignalProcessor
+
+    t = np.arange(2000) / 1000.0
+    matrix = np.column_stack([np.sin(2 * np.pi * 50 * t), np.sin(2 * np.pi * 120 * t), 0.1 * np.sin(2 * np.pi * 200 * t)])
+    bytes_io = io.BytesIO()
+    savemat(bytes_io, {'H': matrix})
+
+    signals, fs, metadata = DataLoader().load_channels_from_bytes(bytes_io.getvalue(), "multi.mat")
+    assert signals.shape == (3, 2000)
+    assert [c["name"] for c in metadata["channels"]] == ["H[0]", "H[1]", "H[2]"]
+
+    result = SignalProcessor().process_signal(signals, fs, metadata["channels"])
+    assert result["processing_status"] == "success"
+    dominant = [c["frequency_features"]["dominant_frequency"] for c in result["channels"]]
+    np.testing.assert_allclose(dominant, [50, 120, 200], atol=1)
+    assert result["frequency_features"]["dominant_frequency"] == dominant[0]
+    assert result["channels"][2]["time_features"]["rms"] < result["channels"][0]["time_features"]["rms"]
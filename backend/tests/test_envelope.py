@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from app.services.baseline import flatten_features
+from app.services.envelope import EnvelopeAnalyzer, bearing_frequencies, machine_kinematics
+from app.services.kurtogram import fast_kurtogram
+from app.services.rule_engine import RuleEngine
+from app.services.signal_processor import SignalProcessor
+
+# Drive-end 6205 bearing
+BEARING = {"n_balls": 9, "ball_diameter": 0.3126, "pitch_diameter": 1.537}
+
+
+def test_bearing_frequencies_match_published_multiples():
+    freqs = bearing_frequencies(1.0, BEARING)
+    assert freqs["bpfo"] == pytest.approx(3.5848, abs=1e-3)
+    assert freqs["bpfi"] == pytest.approx(5.4152, abs=1e-3)
+    assert freqs["bsf"] == pytest.approx(2.3568, abs=1e-3)
+    assert freqs["ftf"] == pytest.approx(0.3983, abs=1e-3)
+
+
+def _outer_race_fault(fs=12000.0, seconds=1.0, rpm=1797.0, seed=0):
+    # Decaying 3 kHz ringing repeated at BPFO, buried in noise and a strong 1x tone
+    t = np.arange(int(fs * seconds)) / fs
+    bpfo = bearing_frequencies(rpm / 60.0, BEARING)["bpfo"]
+    impacts = np.zeros_like(t)
+    impacts[(np.arange(0, seconds, 1.0 / bpfo) * fs).astype(int)] = 1.0
+    ring = np.exp(-800 * t[:200]) * np.sin(2 * np.pi * 3000 * t[:200])
+    rng = np.random.default_rng(seed)
+    signal = np.convolve(impacts, ring)[: len(t)] + 0.5 * np.sin(2 * np.pi * rpm / 60.0 * t)
+    return signal + 0.05 * rng.standard_normal(len(t)), fs, bpfo
+
+
+def test_envelope_finds_outer_race_defect():
+    signal, fs, bpfo = _outer_race_fault()
+    kinematics = machine_kinematics({"rpm_nominal": 1797, "bearing": BEARING})
+    [section] = EnvelopeAnalyzer().analyze(signal[None, :], fs, kinematics)
+
+    assert section["band"][0] <= 3000 <= section["band"][1]
+    outer = section["defects"]["bpfo"]
+    assert outer["peak_frequency"] == pytest.approx(bpfo, abs=1.5)
+    assert outer["snr_db"] > 20
+    assert outer["harmonics_detected"] == 3
+    assert section["defects"]["bpfi"]["snr_db"] < outer["snr_db"] - 10
+
+
+def test_processed_signal_reports_bearing_fault():
+    signal, fs, _ = _outer_race_fault()
+    kinematics = machine_kinematics({"rpm_nominal": 1797, "bearing": BEARING})
+    result = SignalProcessor().process_signal(np.stack([signal, signal]), fs, kinematics=kinematics)
+
+    assert set(result["envelope"]["defects"]) == {"bpfo", "bpfi", "bsf", "ftf"}
+    assert "spectrum" in result["envelope"]
+    assert result["channels"][1]["envelope"]["defects"]["bpfo"]["snr_db"] > 20
+    faults = [f["fault_type"] for f in RuleEngine().evaluate(flatten_features(result))]
+    assert "Bearing Outer Race Defect" in faults
+    assert "Bearing Inner Race Defect" not in faults
+
+
+def test_no_defects_without_bearing_geometry():
+    signal, fs, _ = _outer_race_fault()
+    result = SignalProcessor().process_signal(signal, fs, kinematics=machine_kinematics({"rpm_nominal": 1797}))
+    assert result["envelope"]["defects"] == {}
+    assert result["envelope"]["shaft_frequency"] == pytest.approx(29.95, abs=0.05)
+    assert not any(name.startswith("env.") for name in flatten_features(result))
+
+
+def test_kurtogram_picks_the_ringing_band():
+    signal, fs, _ = _outer_race_fault()
+    analyzer = EnvelopeAnalyzer()
+    spec, n_samples, n_fft = analyzer.transform(signal)
+    kurtogram = fast_kurtogram(spec, n_samples, n_fft, fs)
+
+    low, high, level, kurtosis = kurtogram.best_band()
+    assert low <= 3000 <= high and level > 0
+    matrix = kurtogram.matrix()
+    assert matrix.shape == (len(kurtogram.counts), 192)
+    assert kurtosis == pytest.approx(matrix.max())
+
+    # Gaussian noise is not impulsive in any band
+    noise = np.random.default_rng(1).standard_normal((2, 12000))
+    spec, n_samples, n_fft = analyzer.transform(noise)
+    assert np.abs(fast_kurtogram(spec, n_samples, n_fft, fs).matrix()).max() < 1.0
+
+
+def test_processed_signal_exposes_the_kurtogram():
+    signal, fs, _ = _outer_race_fault()
+    envelope = SignalProcessor().process_signal(signal, fs)["envelope"]
+    selected = envelope["kurtogram"]["selected"]
+    assert envelope["band"] == pytest.approx([selected["low"], selected["high"]], abs=1.0)
+    assert len(envelope["kurtogram"]["kurtosis"]) == len(envelope["kurtogram"]["levels"])
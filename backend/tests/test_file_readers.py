@@ -0,0 +1,146 @@
+import struct
+
+import numpy as np
+import pytest
+
+from app.services.data_loader import DataLoader
+from app.services.mdf_reader import MdfFile
+from app.services.tdms_reader import TdmsFile
+
+
+def _tdms_string(value):
+    encoded = value.encode("utf-8")
+    return struct.pack("<I", len(encoded)) + encoded
+
+
+def _tdms_segment(objects, raw, toc):
+    meta = b""
+    if objects is not None:
+        meta = struct.pack("<I", len(objects))
+        for path, index, props in objects:
+            meta += _tdms_string(path)
+            if index is None:
+                meta += struct.pack("<I", 0xFFFFFFFF)
+            else:
+                type_code, n_values = index
+                meta += struct.pack("<IIIQ", 20, type_code, 1, n_values)
+            meta += struct.pack("<I", len(props))
+            for name, type_code, value in props:
+                meta += _tdms_string(name) + struct.pack("<I", type_code) + value
+    lead_in = b"TDSm" + struct.pack("<II", toc, 4713) + struct.pack("<QQ", len(meta) + len(raw), len(meta))
+    return lead_in + meta + raw
+
+
+@pytest.fixture
+def tdms_bytes():
+    ch1 = np.arange(8, dtype="<f8")
+    ch2 = np.arange(100, 108, dtype="<i2")
+    objects = [
+        ("/", None, []),
+        ("/'Group'", None, []),
+        ("/'Group'/'accel'", (0x0A, 4), [
+            ("wf_increment", 0x0A, struct.pack("<d", 1 / 2000.0)),
+            ("unit_string", 0x20, _tdms_string("g")),
+        ]),
+        ("/'Group'/'temp'", (0x02, 4), []),
+    ]
+    raw = ch1[:4].tobytes() + ch2[:4].tobytes()
+    first = _tdms_segment(objects, raw, toc=(1 << 1) | (1 << 2) | (1 << 3))
+    # Second segment reuses the previous object list and raw data index
+    second = _tdms_segment(None, ch1[4:].tobytes() + ch2[4:].tobytes(), toc=1 << 3)
+    return first + second, ch1, ch2
+
+
+def test_tdms_reads_single_channel_lazily(tdms_bytes):
+    data, ch1, ch2 = tdms_bytes
+    tdms = TdmsFile(data)
+
+    assert tdms.channels() == ["Group/accel", "Group/temp"]
+    assert tdms.sampling_rate("accel") == pytest.approx(2000.0)
+    np.testing.assert_array_equal(tdms.channel_data("Group/accel"), ch1)
+    np.testing.assert_array_equal(tdms.channel_data("temp"), ch2)
+
+
+def test_data_loader_uses_tdms_properties(tdms_bytes):
+    data, _, ch2 = tdms_bytes
+    signal, sampling_rate, metadata = DataLoader().load_from_bytes(data, "run.tdms", channel="temp")
+
+    np.testing.assert_array_equal(signal, ch2.astype(np.float64))
+    assert sampling_rate == 1000.0  # temp has no wf_increment
+    assert metadata["format"] == "tdms"
+    assert metadata["available_channels"] == ["Group/accel", "Group/temp"]
+    assert [c["name"] for c in metadata["channels"]] == ["temp"]
+
+
+def test_tdms_channels_at_another_rate_are_reported(tdms_bytes):
+    data, ch1, _ = tdms_bytes
+    loader = DataLoader()
+    signals, sampling_rate, metadata = loader.load_channels_from_bytes(data, "run.tdms")
+
+    np.testing.assert_array_equal(signals, ch1[None, :])
+    assert sampling_rate == pytest.approx(2000.0)
+    assert metadata["skipped_channels"] == [{"name": "Group/temp", "sampling_rate": 1000.0}]
+    with pytest.raises(ValueError, match="temp"):
+        loader.load_channels_from_bytes(data, "run.tdms", channels=["accel", "temp"])
+
+
+class _MdfBuilder:
+    """Lays out MDF4 blocks; links refer to other blocks by name"""
+
+    def __init__(self):
+        self.blocks = []
+
+    def add(self, name, block_id, links, data):
+        self.blocks.append((name, block_id, links, data))
+
+    def build(self):
+        offsets, pos = {}, 64
+        for name, _, links, data in self.blocks:
+            offsets[name] = pos
+            pos += 24 + 8 * len(links) + len(data)
+        out = b"MDF     4.10    pytest  " + b"\0" * 4 + struct.pack("<H", 410)
+        out = out.ljust(64, b"\0")
+        for name, block_id, links, data in self.blocks:
+            resolved = [offsets[l] if isinstance(l, str) else l for l in links]
+            out += struct.pack("<4s4xQQ", block_id, 24 + 8 * len(links) + len(data), len(links))
+            out += struct.pack(f"<{len(links)}Q", *resolved) + data
+        return out
+
+
+def _text(value):
+    encoded = value.encode("utf-8") + b"\0"
+    return encoded.ljust((len(encoded) + 7) // 8 * 8, b"\0")
+
+
+def _cn(cn_type, sync_type, data_type, byte_offset, bit_count):
+    return struct.pack("<BBBBIIIIBBH6d", cn_type, sync_type, data_type, 0, byte_offset, bit_count, 0, 0, 0, 0, 0, *([0.0] * 6))
+
+
+def test_mdf_reads_channel_with_conversion_and_rate():
+    n, fs = 16, 2000.0
+    time = np.arange(n) / fs
+    raw = np.arange(n, dtype="<i2") - 8
+    records = b"".join(struct.pack("<dh", t, v) for t, v in zip(time, raw))
+
+    b = _MdfBuilder()
+    b.add("hd", b"##HD", ["dg", 0, 0, 0, 0, 0], b"\0" * 32)
+    b.add("dg", b"##DG", [0, "cg", "dt", 0], struct.pack("<B7x", 0))
+    b.add("cg", b"##CG", [0, "cn_time", 0, 0, 0, 0], struct.pack("<QQHH4xII", 0, n, 0, 0, 10, 0))
+    b.add("cn_time", b"##CN", ["cn_accel", 0, "tx_time", 0, 0, 0, 0, 0], _cn(2, 1, 4, 0, 64))
+    b.add("cn_accel", b"##CN", [0, 0, "tx_accel", 0, "cc", 0, "tx_unit", 0], _cn(0, 0, 2, 8, 16))
+    b.add("cc", b"##CC", [0, 0, 0, 0], struct.pack("<BBHHHdd", 1, 0, 0, 0, 2, 0.0, 0.0) + struct.pack("<2d", 0.5, 0.01))
+    b.add("tx_time", b"##TX", [], _text("t"))
+    b.add("tx_accel", b"##TX", [], _text("accel_x"))
+    b.add("tx_unit", b"##TX", [], _text("g"))
+    b.add("dt", b"##DT", [], records)
+    data = b.build()
+
+    mdf = MdfFile(data)
+    assert mdf.channels() == ["accel_x"]
+    assert mdf.sampling_rate("accel_x") == pytest.approx(fs)
+    np.testing.assert_allclose(mdf.channel_data("accel_x"), 0.5 + 0.01 * raw)
+
+    signal, sampling_rate, metadata = DataLoader().load_from_bytes(data, "run.mf4")
+    assert sampling_rate == pytest.approx(fs)
+    assert metadata["units"] == {"accel_x": "g"}
+    np.testing.assert_allclose(signal, 0.5 + 0.01 * raw)
@@ -0,0 +1,45 @@
+import numpy as np
+from scipy import signal as sps
+
+from app.services.filter_bank import FilterBank, design_sos
+from app.services.signal_processor import SignalProcessor
+
+
+STAGES = [("highpass", 4, 5.0), ("lowpass", 4, 200.0)]
+
+
+def test_designs_are_cached_and_cascaded_into_one_matrix():
+    assert design_sos("lowpass", 4, 200.0, 1000.0) is design_sos("lowpass", 4, 200.0, 1000.0)
+
+    bank = FilterBank(STAGES, 1000.0)
+    assert bank.sos.shape == (4, 6)
+    assert FilterBank(STAGES, 1000.0).sos is bank.sos
+
+    x = np.random.default_rng(0).standard_normal((2, 3000))
+    sequential = sps.sosfilt(design_sos("lowpass", 4, 200.0, 1000.0), sps.sosfilt(design_sos("highpass", 4, 5.0, 1000.0), x))
+    np.testing.assert_allclose(bank.apply(x), sequential)
+
+
+def test_streaming_blocks_match_one_shot_filtering():
+    bank = FilterBank(STAGES, 1000.0)
+    x = np.random.default_rng(1).standard_normal((3, 5000)) + 2.0
+
+    stream = bank.stream()
+    blocks = [stream.process(x[:, start:start + 613]) for start in range(0, 5000, 613)]
+
+    zi = sps.sosfilt_zi(bank.sos)[:, None, :] * x[:, 0][None, :, None]
+    expected, _ = sps.sosfilt(bank.sos, x, axis=-1, zi=zi)
+    np.testing.assert_allclose(np.concatenate(blocks, axis=-1), expected)
+
+
+def test_zero_phase_conditioning_has_no_lag():
+    fs = 1000.0
+    t = np.arange(4000) / fs
+    x = np.sin(2 * np.pi * 150 * t)
+
+    causal = SignalProcessor().condition_signal(x, fs)
+    zero_phase = SignalProcessor(zero_phase=True).condition_signal(x, fs)
+
+    middle = slice(1000, 3000)
+    assert np.max(np.abs(zero_phase[middle] - x[middle])) < 0.05
+    assert np.max(np.abs(causal[middle] - x[middle])) > 0.1
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from app.services.harmonics import find_family
+from app.services.signal_processor import SignalProcessor
+
+
+FS = 4096.0
+
+
+def _spectrum(signal):
+    n = signal.shape[-1]
+    magnitude = np.abs(np.fft.rfft(signal * np.hanning(n), axis=-1)) * 2.0 / n
+    return np.fft.rfftfreq(n, 1.0 / FS), np.atleast_2d(magnitude)
+
+
+def test_fifty_harmonics_located_between_bins():
+    # Fundamental deliberately off the 1 Hz bin grid
+    t = np.arange(int(FS)) / FS
+    fundamental = 30.37
+    signal = sum(np.sin(2 * np.pi * k * fundamental * t) / k for k in range(1, 51))
+    frequencies, magnitude = _spectrum(signal)
+
+    family = find_family(frequencies, magnitude, fundamental, n_harmonics=50)
+    harmonics = family.harmonics()
+    assert [h["order"] for h in harmonics] == list(range(1, 51))
+    errors = np.array([h["frequency"] - h["order"] * fundamental for h in harmonics])
+    # Nearest bin alone is off by up to half a bin
+    assert np.abs(errors).max() < 0.1
+
+
+def test_gear_mesh_sidebands_per_channel():
+    t = np.arange(int(FS)) / FS
+    mesh, shaft = 400.0, 25.0
+    carrier = np.sin(2 * np.pi * mesh * t) + 0.5 * np.sin(2 * np.pi * 2 * mesh * t)
+    modulated = carrier * (1.0 + 0.4 * np.sin(2 * np.pi * shaft * t))
+    frequencies, magnitude = _spectrum(np.stack([modulated, carrier]))
+
+    family = find_family(frequencies, magnitude, mesh, n_harmonics=2, sidebands=1, spacing=shaft)
+    assert family.found.shape == (2, 2, 3)
+    [first, second] = family.harmonics(0)
+    assert [s["offset"] for s in first["sidebands"]] == [-1, 1]
+    assert first["sidebands"][0]["frequency"] == pytest.approx(mesh - shaft, abs=0.05)
+    assert first["sidebands"][1]["magnitude"] == pytest.approx(0.2 * first["magnitude"], rel=0.1)
+    assert second["frequency"] == pytest.approx(2 * mesh, abs=0.05)
+    # The unmodulated channel has nothing at the sideband frequencies
+    carrier_sidebands = [s["magnitude"] for h in family.harmonics(1) for s in h["sidebands"]]
+    assert max(carrier_sidebands, default=0.0) < 1e-3
+
+
+def test_targets_outside_the_spectrum_are_not_found():
+    frequencies = np.arange(0, 101, dtype=float)
+    magnitude = np.ones_like(frequencies)
+    family = find_family(frequencies, magnitude, np.array([40.0]), n_harmonics=5)
+    assert [h["order"] for h in family.harmonics()] == [1, 2]
+    assert not find_family(frequencies, magnitude, 0.0).found.any()
+
+
+def test_processor_lists_sidebands_at_running_speed():
+    t = np.arange(int(FS)) / FS
+    shaft = 30.0
+    signal = np.sin(2 * np.pi * shaft * t) * (1.0 + 0.3 * np.sin(2 * np.pi * shaft * t)) + 0.8 * np.sin(
+        2 * np.pi * 2 * shaft * t
+    )
+    processor = SignalProcessor(sidebands=2, nominal_rpm=1800.0)
+    features = processor.extract_frequency_features(signal, FS, running_speed=shaft)
+    assert features["dominant_frequency"] == pytest.approx(shaft, abs=1.0)
+    assert [h["order"] for h in features["harmonics"]][:1] == [2]
+    assert all("sidebands" in h for h in features["harmonics"])
+
+    plain = SignalProcessor().extract_frequency_features(signal, FS)
+    assert all("sidebands" not in h for h in plain["harmonics"])
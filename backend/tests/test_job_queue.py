@@ -0,0 +1,56 @@
+import threading
+import time
+
+from app.services.job_queue import DiagnosisJobQueue
+
+
+def _wait_for(queue, job_id, status, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}")
+
+
+def test_job_lifecycle_and_queue_depth():
+    release = threading.Event()
+
+    def runner(record_id):
+        release.wait(5)
+        if record_id == "bad":
+            return {"record_id": record_id, "status": "error", "error_message": "boom"}
+        return {"record_id": record_id, "status": "completed"}
+
+    queue = DiagnosisJobQueue(max_workers=1, runner=runner)
+    try:
+        first = queue.submit("r1")
+        second = queue.submit("bad")
+        _wait_for(queue, first["id"], "running")
+        assert queue.get(second["id"])["status"] == "queued"
+        assert queue.stats()["queue_depth"] == 1
+
+        release.set()
+        done = _wait_for(queue, first["id"], "done")
+        failed = _wait_for(queue, second["id"], "failed")
+    finally:
+        queue.shutdown()
+
+    assert done["result"]["status"] == "completed"
+    assert done["elapsed_seconds"] >= 0
+    assert failed["error"] == "boom"
+    assert queue.get("unknown") is None
+
+
+def test_finished_jobs_are_evicted():
+    queue = DiagnosisJobQueue(max_workers=1, max_finished_jobs=2, runner=lambda r: {"status": "completed"})
+    try:
+        ids = []
+        for i in range(4):
+            ids.append(queue.submit(str(i))["id"])
+            _wait_for(queue, ids[-1], "done")
+    finally:
+        queue.shutdown()
+    assert queue.get(ids[0]) is None
+    assert queue.get(ids[-1]) is not None
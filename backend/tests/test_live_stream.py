@@ -0,0 +1,62 @@
+import numpy as np
+
+from app.services.live_stream import LiveSensorStream
+from app.services.signal_processor import SignalProcessor
+from app.services.stats_kernel import time_features
+
+
+FS = 2000.0
+
+
+def test_rolling_windows_match_one_shot_features():
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((2, 10000)).astype(np.float32)
+
+    stream = LiveSensorStream("s1", FS, n_channels=2, window_size=2048, hop_size=512)
+    payload = x.T.tobytes()
+    windows = []
+    # Uneven chunks that split frames and samples across calls
+    for start in range(0, len(payload), 3001):
+        windows.extend(stream.push_bytes(payload[start:start + 3001]))
+
+    assert stream.samples_seen == 10000
+    assert len(windows) == (10000 - 2048) // 512 + 1
+    assert [w["window_index"] for w in windows] == list(range(len(windows)))
+
+    filtered = SignalProcessor().filter_bank(FS).stream().process(x.astype(float))
+    last = windows[-1]
+    end = int(round(last["end_seconds"] * FS))
+    expected = time_features(filtered[:, end - 2048:end])
+    for channel, features in zip(last["channels"], expected):
+        for name in ("rms", "kurtosis", "crest_factor"):
+            assert np.isclose(channel["time_features"][name], features[name])
+    assert set(last["frequency_features"]["frequency_bands"]) >= {"bearing_freq_energy"}
+    assert stream.status()["latest"] is last
+    # Only the open hop keeps an update scratch buffer
+    assert all(hop._scratch is None for hop in stream._hops)
+
+
+def test_rules_run_on_each_window():
+    t = np.arange(8192) / FS
+    x = 0.1 * np.sin(2 * np.pi * 120 * t)
+    x[::400] += 3.0
+
+    stream = LiveSensorStream("s2", FS, window_size=4096)
+    windows = stream.push(x)
+
+    assert len(windows) == 2
+    fault_types = {f["fault_type"] for f in windows[-1]["fault_detection"]["detected_faults"]}
+    assert "Impulsive Behavior" in fault_types
+    assert windows[-1]["health_score"] < 95
+
+
+def test_failed_frequency_features_still_emit_a_window(monkeypatch):
+    stream = LiveSensorStream("s3", FS, n_channels=2, window_size=1024)
+    monkeypatch.setattr(
+        stream._processor, "extract_frequency_features", lambda *args: {"error": "Frequency feature extraction failed"}
+    )
+    [window] = stream.push(np.ones((2, 1024)))
+
+    assert window["frequency_features"] == {"error": "Frequency feature extraction failed"}
+    assert all("error" in channel["frequency_features"] for channel in window["channels"])
+    assert "rms" in window["time_features"]
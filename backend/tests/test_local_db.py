@@ -0,0 +1,125 @@
+import uuid
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.local_db import LocalDatabase
+
+
+def _record(i, machine_id):
+    return {
+        "id": f"r{i:05d}",
+        "machine_id": machine_id,
+        "sensor_id": f"s{i % 3}",
+        "status": "unprocessed",
+        "created_at": f"2025-01-{1 + i % 28:02d}T00:00:{i % 60:02d}",
+        "timestamp": f"2025-01-{1 + i % 28:02d}T00:00:00Z",
+    }
+
+
+def test_records_merge_filter_and_page_by_keyset(tmp_path):
+    db = LocalDatabase(str(tmp_path / "local.db"))
+    for i in range(200):
+        db.put_record(_record(i, "m1" if i % 2 else "m2"))
+
+    db.put_record({"id": "r00001", "file_name": "a.csv"})
+    assert db.get_record("r00001")["machine_id"] == "m1"
+    assert db.get_record("r00001")["file_name"] == "a.csv"
+    assert db.update_record("missing", status="processed") is None
+
+    everything = db.list_records(machine_id="m1")
+    pages, after = [], None
+    while True:
+        page = db.list_records(machine_id="m1", after=after, limit=30)
+        if not page:
+            break
+        pages.extend(page)
+        after = (page[-1]["created_at"], page[-1]["id"])
+    assert [r["id"] for r in pages] == [r["id"] for r in everything]
+    assert len(everything) == db.count_records(machine_id="m1") == 100
+
+    in_range = db.list_records(start_time=datetime(2025, 1, 10), end_time=datetime(2025, 1, 12))
+    assert {r["timestamp"][:10] for r in in_range} == {"2025-01-10", "2025-01-11", "2025-01-12"}
+
+    plan = db._conn().execute(
+        "EXPLAIN QUERY PLAN SELECT data FROM vibration_records WHERE machine_id = ? ORDER BY created_at, id", ("m1",)
+    ).fetchall()
+    assert any("idx_records_machine" in row[-1] for row in plan)
+
+
+def test_listing_extracts_only_the_requested_keys(tmp_path):
+    db = LocalDatabase(str(tmp_path / "local.db"))
+    db.put_record({**_record(1, "m1"), "file_name": "a.csv", "channel_features": [{"time.rms": 1.0}] * 100})
+    db.put_record(_record(2, "m1"))
+
+    rows = db.list_records(machine_id="m1", keys=["file_name", "status"])
+    assert rows[0] == {
+        "id": "r00001", "created_at": "2025-01-02T00:00:01", "file_name": "a.csv", "status": "unprocessed",
+    }
+    # Missing keys are left out rather than returned as None
+    assert "file_name" not in rows[1]
+
+
+def test_data_survives_reopening(tmp_path):
+    path = str(tmp_path / "local.db")
+    db = LocalDatabase(path)
+    machine = db.put_machine({"name": "Pump"})
+    db.put_record(_record(1, machine["id"]))
+    db.update_record("r00001", status="processed")
+    db.insert_diagnosis({"record_id": "r00001", "health_score": 80})
+    db.close()
+
+    reopened = LocalDatabase(path)
+    assert reopened.get_machine(machine["id"])["name"] == "Pump"
+    assert reopened.get_record("r00001")["status"] == "processed"
+    assert reopened.list_diagnoses("r00001")[0]["health_score"] == 80
+
+
+def test_vibration_record_endpoints_use_the_local_database():
+    client = TestClient(app)
+    machine_id = client.get("/records/machines").json()[0]["id"]
+
+    created = client.post("/records/vibrations", json={
+        "machine_id": machine_id,
+        "file_url": "/uploads/x.csv",
+        "file_name": "x.csv",
+    }).json()
+    assert created["processed"] is False
+
+    by_machine = client.get(f"/records/vibrations/machine/{machine_id}").json()
+    assert created["id"] in [r["id"] for r in by_machine]
+    assert client.delete(f"/records/vibrations/{created['id']}").status_code == 200
+    assert client.delete(f"/records/vibrations/{created['id']}").status_code == 404
+
+
+def test_vibration_list_pages_by_cursor_and_projects_fields():
+    client = TestClient(app)
+    machine_id = f"m-{uuid.uuid4()}"
+    created = [
+        client.post("/records/vibrations", json={
+            "machine_id": machine_id,
+            "file_url": f"/uploads/{i}.csv",
+            "file_name": f"{i}.csv",
+        }).json()["id"]
+        for i in range(5)
+    ]
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, "fields": "id,file_name,processed"}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client.get(f"/records/vibrations/machine/{machine_id}", params=params)
+        assert resp.status_code == 200
+        page = resp.json()
+        assert all(set(r) == {"id", "file_name", "processed"} for r in page)
+        seen.extend(r["id"] for r in page)
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(created) and len(seen) == 5
+
+    assert client.get("/records/vibrations", params={"machine_id": machine_id, "status": "processed"}).json() == []
+    assert client.get("/records/vibrations", params={"fields": "nope"}).status_code == 400
+    assert client.get("/records/vibrations", params={"cursor": "%%%"}).status_code == 400
@@ -0,0 +1,61 @@
+import asyncio
+import hashlib
+import io
+
+import numpy as np
+import pytest
+from fastapi import UploadFile
+
+from app.services.local_storage import LocalStorage, UploadTooLargeError
+
+
+class CountingFile(io.BytesIO):
+    """BytesIO that records the largest single read request"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.max_read = 0
+
+    def read(self, size=-1):
+        self.max_read = max(self.max_read, size)
+        return super().read(size)
+
+
+def test_save_upload_streams_in_chunks(tmp_path):
+    payload = bytes(range(256)) * 1000
+    source = CountingFile(payload)
+    storage = LocalStorage(root=str(tmp_path))
+
+    size, checksum = asyncio.run(
+        storage.save_upload(UploadFile(source, filename="a.mat"), "a.mat", chunk_size=4096, max_bytes=10**6)
+    )
+
+    assert size == len(payload)
+    assert checksum == hashlib.sha256(payload).hexdigest()
+    assert source.max_read == 4096
+    assert (tmp_path / "a.mat").read_bytes() == payload
+
+
+def test_save_upload_enforces_max_size(tmp_path):
+    storage = LocalStorage(root=str(tmp_path))
+    upload = UploadFile(io.BytesIO(b"x" * 10_000), filename="big.mat")
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(storage.save_upload(upload, "big.mat", chunk_size=1024, max_bytes=5000))
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_open_mapped_returns_zero_copy_view(tmp_path):
+    payload = np.arange(1000, dtype=np.float32).tobytes()
+    (tmp_path / "raw.tdms").write_bytes(payload)
+    storage = LocalStorage(root=str(tmp_path))
+
+    view = storage.open_mapped("raw.tdms")
+    array = np.frombuffer(view, dtype=np.float32)
+
+    assert view.readonly
+    assert not array.flags.owndata
+    np.testing.assert_array_equal(array, np.arange(1000, dtype=np.float32))
+    assert LocalStorage.name_from_storage_path("local/raw.tdms") == "raw.tdms"
+    assert LocalStorage.name_from_storage_path("uploads/raw.tdms") is None
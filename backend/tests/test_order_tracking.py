@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from app.services.baseline import flatten_features
+from app.services.order_tracking import OrderTracker, tach_pulse_times
+from app.services.rule_engine import RuleEngine
+from app.services.signal_processor import SignalProcessor
+from app.services.spectral import get_spectral_engine
+
+
+def test_running_speed_is_found_near_nominal():
+    fs, speed = 5000.0, 1750 / 60.0
+    t = np.arange(int(4 * fs)) / fs
+    signal = 0.5 * np.sin(2 * np.pi * speed * t) + 0.2 * np.sin(4 * np.pi * speed * t + 1.0)
+    signal += 0.01 * np.random.default_rng(0).standard_normal(len(t))
+
+    result = SignalProcessor().process_signal(signal, fs, kinematics={"rpm": 1800.0, "bearing": None})
+    orders = result["orders"]
+    assert orders["speed_source"] == "spectrum"
+    assert orders["running_speed_hz"] == pytest.approx(speed, abs=0.05)
+    assert orders["amplitudes"]["1x"] == pytest.approx(0.5, rel=0.05)
+    assert orders["amplitudes"]["2x"] == pytest.approx(0.2, rel=0.05)
+    assert orders["dominant_order"] == pytest.approx(1.0)
+
+    # Imbalance no longer depends on the speed being 30 Hz
+    faults = RuleEngine().evaluate(flatten_features(result))
+    [imbalance] = [f for f in faults if f["fault_type"] == "Imbalance"]
+    assert imbalance["frequency"] == pytest.approx(speed, abs=0.05)
+
+
+def test_tach_channel_tracks_a_speed_ramp():
+    # Run-up from 20 to 30 Hz: the 1x line smears in the FFT but not in orders
+    fs, seconds = 5000.0, 4.0
+    t = np.arange(int(seconds * fs)) / fs
+    angle = 20.0 * t + 1.25 * t * t  # revolutions
+    vibration = 0.3 * np.sin(2 * np.pi * angle) + 0.1 * np.sin(2 * np.pi * 3 * angle)
+    tach = (np.mod(angle, 1.0) < 0.1).astype(float)
+    assert len(tach_pulse_times(tach, fs)) == pytest.approx(angle[-1], abs=1)
+
+    signals = np.stack([vibration, tach])
+    channels = [{"name": "accel_x"}, {"name": "tacho"}]
+    spectrum = get_spectral_engine().spectrum(signals, fs)
+    sections = OrderTracker().analyze(signals, fs, spectrum, channels)
+    vib = sections[0]
+    assert vib["speed_source"] == "tach"
+    assert vib["amplitudes"]["1x"] == pytest.approx(0.3, rel=0.05)
+    assert vib["amplitudes"]["3x"] == pytest.approx(0.1, rel=0.1)
+    assert vib["amplitudes"]["2x"] < 0.01
+    assert spectrum.magnitude[0].max() * 2 / len(t) < 0.15
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from app.services.ring_buffer import RingBufferRegistry, SignalRingBuffer
+
+
+def test_latest_is_a_zero_copy_view_across_wraparound():
+    buffer = SignalRingBuffer(2, capacity=100, sampling_rate=50.0)
+    x = np.arange(2 * 437, dtype=float).reshape(2, 437)
+    for start in range(0, 437, 37):
+        buffer.write(x[:, start:start + 37])
+
+    window = buffer.latest(80)
+    np.testing.assert_array_equal(window, x[:, -80:])
+    assert window.dtype == np.float32
+    assert np.shares_memory(window, buffer._data)
+    assert not window.flags.writeable
+    np.testing.assert_array_equal(buffer.last_seconds(1.0), x[:, -50:])
+
+    buffer.write(x[:, :250])
+    np.testing.assert_array_equal(buffer.latest(100), x[:, 150:250])
+
+
+def test_latest_rejects_more_than_buffered():
+    buffer = SignalRingBuffer(1, capacity=10, sampling_rate=1.0)
+    buffer.write(np.ones(4))
+    with pytest.raises(ValueError):
+        buffer.latest(5)
+    assert buffer.last_seconds(100.0).shape == (1, 4)
+
+
+def test_registry_stays_within_budget_and_drops_idle_sensors():
+    nbytes = SignalRingBuffer(1, 1000, 1.0).nbytes
+    registry = RingBufferRegistry(max_bytes=3 * nbytes, idle_seconds=60.0)
+    for i in range(3):
+        registry.put(f"s{i}", SignalRingBuffer(1, 1000, 1.0))
+
+    registry.get("s0")
+    registry.put("s3", SignalRingBuffer(1, 1000, 1.0))
+    assert "s1" not in registry and "s0" in registry
+    assert registry.stats()["bytes"] <= 3 * nbytes
+
+    registry.get("s2").last_update = 0.0
+    assert registry.evict_idle() == 1
+    assert "s2" not in registry
+    assert registry.stats()["evictions"] == 2
+
+    with pytest.raises(ValueError):
+        registry.put("huge", SignalRingBuffer(1, 10000, 1.0))
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from app.services.rule_engine import RuleEngine
+
+
+def test_default_rules_report_the_same_findings_as_before():
+    engine = RuleEngine()
+    findings = engine.evaluate({
+        "time.crest_factor": 5.0,
+        "time.kurtosis": 4.0,
+        "time.rms": 0.2,
+        "order.running_speed": 29.2,
+        "order.dominant_order": 1.02,
+        "order.fft_peak_1x": 0.4,
+        "freq.harmonic_count": 2,
+    })
+
+    assert [f["fault_type"] for f in findings] == ["Imbalance", "Bearing Defect"]
+    imbalance, bearing = findings
+    assert imbalance["severity"] == pytest.approx(40.0)
+    assert imbalance["description"] == "High 1x component (0.400) at 29.2 Hz"
+    assert imbalance["frequency"] == 29.2
+    assert bearing["severity"] == pytest.approx(50.0)
+    assert bearing["crest_factor"] == 5.0
+
+
+def test_many_records_are_scored_in_one_call():
+    engine = RuleEngine([{
+        "fault_type": "Loose",
+        "when": [{"feature": "time.rms", "op": ">", "value": 1.0}],
+        "severity": {"feature": "time.rms", "curve": [[1.0, 0.0], [2.0, 100.0]]},
+        "confidence": 1.0,
+    }])
+    rms = np.linspace(0.0, 3.0, 10001)
+    triggered, severity = engine.evaluate_matrix(rms[:, None])
+    assert triggered[:, 0].tolist() == (rms > 1.0).tolist()
+    np.testing.assert_allclose(severity[:, 0], np.where(rms > 1.0, np.clip((rms - 1.0) * 100, 0, 100), 0))
+
+    # Two channels per record count toward one score
+    groups = np.repeat(np.arange(5001), 2)[:10001]
+    scores = engine.health_scores(triggered, severity, groups)
+    assert scores.shape == (5001,)
+    assert scores[0] == 95 and scores[-1] == 0
+
+
+def test_baseline_ratio_conditions_need_a_baseline():
+    engine = RuleEngine([{
+        "fault_type": "Imbalance",
+        "when": [{"feature": "freq.dominant_magnitude", "op": ">", "baseline_ratio": 1.5}],
+        "severity": {"feature": "freq.dominant_magnitude", "baseline_ratio": True, "curve": [[1.0, 0.0], [2.0, 100.0]]},
+    }])
+    assert engine.uses_baseline
+    row = {"freq.dominant_magnitude": 0.9}
+    assert engine.evaluate(row) == []
+    assert engine.evaluate(row, {"freq.dominant_magnitude": 0.8}) == []
+    [finding] = engine.evaluate(row, {"freq.dominant_magnitude": 0.5})
+    assert finding["severity"] == pytest.approx(80.0)
+
+
+def test_invalid_rules_are_rejected():
+    with pytest.raises(ValueError):
+        RuleEngine([{"fault_type": "X", "when": [{"feature": "time.rms", "op": "~", "value": 1}],
+                     "severity": {"feature": "time.rms", "curve": [[0, 0], [1, 100]]}}])
+    with pytest.raises(ValueError):
+        RuleEngine([{"fault_type": "X", "when": [{"feature": "time.rms", "op": ">", "value": 1}],
+                     "severity": {"feature": "time.rms", "curve": [[1, 0], [0, 100]]}}])
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from app.services.spectral import SpectralEngine, fast_length, frequency_axis
+
+
+def test_spectrum_pads_and_fills_caller_buffers():
+    fs = 1000.0
+    t = np.arange(4999) / fs
+    signals = np.vstack([np.sin(2 * np.pi * 60 * t), np.sin(2 * np.pi * 150 * t)])
+    engine = SpectralEngine()
+
+    spectrum = engine.spectrum(signals, fs)
+    assert spectrum.n_fft == fast_length(4999) >= 4999
+    assert spectrum.magnitude.shape == (2, spectrum.n_fft // 2)
+    dominant = spectrum.frequencies[np.argmax(spectrum.magnitude, axis=-1)]
+    np.testing.assert_allclose(dominant, [60, 150], atol=0.5)
+    # Parseval: one-sided PSD integrates to roughly the mean power (0.5 for a unit sine)
+    np.testing.assert_allclose(2 * spectrum.psd.sum(axis=-1) * fs / spectrum.n_fft, 0.5, rtol=0.05)
+
+    # Each call returns its own arrays unless buffers are passed in
+    first = spectrum.magnitude.copy()
+    again = engine.spectrum(signals[::-1], fs)
+    assert again.magnitude is not spectrum.magnitude
+    np.testing.assert_array_equal(spectrum.magnitude, first)
+    assert again.frequencies.base is frequency_axis(spectrum.n_fft, fs)
+
+    buffers = (np.empty_like(first), np.empty_like(first))
+    into = engine.spectrum(signals, fs, out=buffers)
+    assert into.magnitude is buffers[0] and into.psd is buffers[1]
+    np.testing.assert_array_equal(into.magnitude, first)
+    with pytest.raises(ValueError):
+        engine.spectrum(signals[:1], fs, out=buffers)
+
+
+def test_streaming_spectrogram_matches_welch_with_bounded_columns():
+    from scipy.signal import welch
+
+    from app.services.spectral import StreamingSpectrogram
+
+    fs = 1000.0
+    rng = np.random.default_rng(0)
+    signals = rng.standard_normal((2, 60000))
+    accumulator = StreamingSpectrogram(fs, segment_length=512, overlap=0.5, max_frames=16)
+    for start in range(0, signals.shape[1], 777):
+        accumulator.feed(signals[:, start:start + 777])
+
+    frequencies, psd = accumulator.welch()
+    expected_freqs, expected_psd = welch(signals, fs, nperseg=512, noverlap=256)
+    np.testing.assert_allclose(frequencies, expected_freqs)
+    np.testing.assert_allclose(psd, expected_psd)
+
+    times, bins, power = accumulator.spectrogram(max_bins=64)
+    assert 8 <= power.shape[1] <= 16
+    assert power.shape[-1] <= 64 and len(bins) == power.shape[-1]
+    assert np.all(np.diff(times) > 0) and times[-1] < signals.shape[1] / fs
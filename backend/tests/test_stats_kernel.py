@@ -0,0 +1,41 @@
+import numpy as np
+from scipy import stats
+
+from app.services.stats_kernel import RunningMoments, time_features
+
+
+def test_blocked_features_match_numpy():
+    rng = np.random.default_rng(3)
+    signals = rng.gamma(2.0, size=(2, 20001)) - 1.0
+
+    features = time_features(signals, block_size=1000)
+    for row, result in zip(signals, features):
+        assert np.isclose(result["rms"], np.sqrt(np.mean(row ** 2)))
+        assert np.isclose(result["peak"], np.max(np.abs(row)))
+        assert np.isclose(result["peak_to_peak"], np.ptp(row))
+        assert np.isclose(result["variance"], np.var(row))
+        assert np.isclose(result["skewness"], stats.skew(row))
+        assert np.isclose(result["kurtosis"], stats.kurtosis(row, fisher=False))
+        assert np.isclose(result["impulse_factor"], np.max(np.abs(row)) / np.mean(np.abs(row)))
+
+
+def test_incremental_updates_and_merge_agree_with_one_shot():
+    rng = np.random.default_rng(4)
+    signals = rng.standard_normal((3, 9000)) * [[1.0], [2.0], [0.5]] + 3.0
+
+    streamed = RunningMoments(3)
+    for start in range(0, 9000, 700):
+        streamed.update(signals[:, start:start + 700])
+    merged = RunningMoments(3).update(signals[:, :4321]).merge(RunningMoments(3).update(signals[:, 4321:]))
+
+    expected = time_features(signals)
+    for result in (streamed.features(), merged.features()):
+        for got, want in zip(result, expected):
+            for name in want:
+                assert np.isclose(got[name], want[name]), name
+
+
+def test_constant_signal_has_zero_shape_moments():
+    features = time_features(np.full(100, 2.0))[0]
+    assert features["std"] == 0 and features["skewness"] == 0 and features["kurtosis"] == 0
+    assert features["crest_factor"] == 1.0
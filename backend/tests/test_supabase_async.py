@@ -0,0 +1,37 @@
+import asyncio
+import json
+
+import httpx
+
+from app.services.supabase_async import AsyncSupabaseService
+
+
+def _service(handler):
+    client = httpx.AsyncClient(base_url="https://example.supabase.co", transport=httpx.MockTransport(handler))
+    return AsyncSupabaseService(client)
+
+
+def test_concurrent_calls_share_the_client_within_the_concurrency_bound():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        body = json.loads(request.content)
+        return httpx.Response(201, json=[{"id": body["position"], **body}])
+
+    async def run():
+        service = _service(handler)
+        service._limit = asyncio.Semaphore(4)
+        ids = await asyncio.gather(*(
+            service.create_sensor("m1", f"s{i}", "x", 1000.0) for i in range(20)
+        ))
+        await service.aclose()
+        return ids
+
+    assert asyncio.run(run()) == [f"s{i}" for i in range(20)]
+    assert 1 < peak <= 4
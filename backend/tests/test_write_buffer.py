@@ -0,0 +1,111 @@
+from app.services.write_buffer import WriteBehindBuffer
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.call = {"table": table}
+
+    def upsert(self, rows, on_conflict="", ignore_duplicates=False):
+        self.call.update(op="upsert", rows=rows, on_conflict=on_conflict, ignore_duplicates=ignore_duplicates)
+        return self
+
+    def update(self, values):
+        self.call.update(op="update", values=values)
+        return self
+
+    def in_(self, column, values):
+        self.call.update(ids=list(values))
+        return self
+
+    def execute(self):
+        if self.client.failures > 0:
+            self.client.failures -= 1
+            raise ConnectionError("unreachable")
+        self.client.calls.append(self.call)
+        if self.call["op"] == "upsert":
+            stored = self.client.rows.setdefault(self.call["table"], {})
+            for row in self.call["rows"]:
+                if row["id"] in stored and not self.call["ignore_duplicates"]:
+                    raise ValueError(f"duplicate key {row['id']}")
+                stored.setdefault(row["id"], row)
+        if self.client.lost_responses > 0:
+            # The server committed the write but the response never arrived
+            self.client.lost_responses -= 1
+            raise TimeoutError("read timed out")
+
+
+class FakeClient:
+    def __init__(self, failures=0, lost_responses=0):
+        self.failures = failures
+        self.lost_responses = lost_responses
+        self.calls = []
+        self.rows = {}
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def _queue_records(buffer, n):
+    for i in range(n):
+        buffer.add_diagnosis({"id": f"d{i}", "record_id": f"r{i}", "health_score": 90})
+        buffer.add_fault_detections([{"id": f"f{i}-{k}", "record_id": f"r{i}", "fault_type": "Imbalance"} for k in range(2)])
+        buffer.set_status(f"r{i}", "processed")
+
+
+def test_records_are_written_in_one_request_per_table():
+    client = FakeClient()
+    buffer = WriteBehindBuffer(client, max_rows=10_000, flush_interval=60.0)
+    _queue_records(buffer, 50)
+    buffer.close()
+
+    assert [(c["table"], c["op"]) for c in client.calls] == [
+        ("diagnoses", "upsert"),
+        ("fault_detections", "upsert"),
+        ("vibration_records", "update"),
+    ]
+    assert len(client.calls[1]["rows"]) == 100
+    assert len(client.calls[2]["ids"]) == 50
+    assert buffer.stats()["pending"] == 0
+
+
+def test_transient_errors_are_retried_with_backoff():
+    client = FakeClient(failures=2)
+    delays = []
+    buffer = WriteBehindBuffer(client, flush_interval=60.0, sleep=delays.append)
+    _queue_records(buffer, 3)
+    buffer.close()
+
+    assert delays == [0.5, 1.0]
+    assert len(client.calls) == 3
+    assert buffer.stats()["retries"] == 2
+
+
+def test_undeliverable_batches_are_spooled_and_replayed(tmp_path):
+    spool = str(tmp_path / "spool.jsonl")
+    down = FakeClient(failures=1000)
+    buffer = WriteBehindBuffer(down, flush_interval=60.0, max_retries=1, spool_path=spool, sleep=lambda s: None)
+    _queue_records(buffer, 4)
+    buffer.close()
+    assert down.calls == []
+    assert buffer.stats()["spooled"] == 3
+
+    up = FakeClient()
+    replayed = WriteBehindBuffer(up, flush_interval=60.0, spool_path=spool)
+    replayed.close()
+    assert [c["table"] for c in up.calls] == ["diagnoses", "fault_detections", "vibration_records"]
+    assert len(up.calls[0]["rows"]) == 4
+
+
+def test_retry_after_a_committed_write_stores_each_row_once(tmp_path):
+    client = FakeClient(lost_responses=2)
+    buffer = WriteBehindBuffer(client, flush_interval=60.0, spool_path=str(tmp_path / "spool.jsonl"), sleep=lambda s: None)
+    _queue_records(buffer, 3)
+    buffer.close()
+
+    assert buffer.stats()["retries"] == 2
+    assert buffer.stats()["spooled"] == 0
+    assert sorted(client.rows["diagnoses"]) == ["d0", "d1", "d2"]
+    assert len(client.rows["fault_detections"]) == 6
+    # Both lost responses hit the diagnoses batch, which the server had already stored
+    assert [c["table"] for c in client.calls].count("diagnoses") == 3
@@ -35,6 +35,23 @@ interface AnalysisResult {
       time_domain?: Array<{ time: number; amplitude: number }>;
       frequency_domain?: Array<{ frequency: number; magnitude: number }>;
     };
+    envelope?: {
+      band: [number, number];
+      defects: Record<string, {
+        frequency: number;
+        peak_frequency: number;
+        snr_db: number;
+        harmonics_detected: number;
+      }>;
+      kurtogram?: {
+        levels: number[];
+        band_counts: number[];
+        max_frequency: number;
+        // One row per level; each band repeats over the columns it covers
+        kurtosis: number[][];
+        selected?: { low: number; high: number; level: number; kurtosis: number };
+      };
+    };
   };
   fault_detection?: {
     detected_faults: Array<{
@@ -28,6 +28,25 @@ async function apiCall<T>(
   return response.json();
 }
 
+// Fetch every page of a cursor-paginated list endpoint
+async function fetchAllPages<T>(endpoint: string, pageSize = 500): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const separator = endpoint.includes('?') ? '&' : '?';
+    const params = new URLSearchParams({ limit: String(pageSize) });
+    if (cursor) params.set('cursor', cursor);
+    const response = await fetch(`${API_URL}${endpoint}${separator}${params}`);
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || `API Error: ${response.status}`);
+    }
+    items.push(...(await response.json()));
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return items;
+}
+
 // Machine API endpoints
 export const machineAPI = {
   getAll: () => apiCall<Machine[]>('/records/machines'),
@@ -57,7 +76,7 @@ export const vibrationAPI = {
   getAll: async () => {
     console.log('🔍 Fetching all vibration records...');
     try {
-      const result = await apiCall<VibrationRecord[]>('/records/vibrations');
+      const result = await fetchAllPages<VibrationRecord>('/records/vibrations');
       console.log('✅ Successfully fetched vibration records:', result);
       return result;
     } catch (error) {
@@ -67,7 +86,7 @@ export const vibrationAPI = {
   },
   
   getByMachineId: (machineId: string) => 
-    apiCall<VibrationRecord[]>(`/records/vibrations/machine/${machineId}`),
+    fetchAllPages<VibrationRecord>(`/records/vibrations/machine/${machineId}`),
   
   create: (record: Partial<VibrationRecord>) =>
     apiCall<VibrationRecord>('/records/vibrations', {